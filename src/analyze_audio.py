@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Script to analyze the quality of the recordings in audio_files/.
+Results are stored next to the recordings, so later runs only analyze new files.
+"""
+import os
+import sys
+import argparse
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add src to path if needed
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_recorder.audio_handlers.quality import DEFAULT_THRESHOLDS, failed_checks, update_quality_index
+
+def main():
+    """Analyze recordings and list the ones that fail the quality checks"""
+    parser = argparse.ArgumentParser(description="Analyze the quality of recordings")
+    parser.add_argument("--audio-dir", default="audio_files", help="Directory containing the audio files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)")
+    for name, limit in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=limit, help=f"Quality limit (default: {limit})")
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.audio_dir):
+        logger.error(f"Audio directory not found: {args.audio_dir}")
+        return 1
+    
+    thresholds = {name: getattr(args, name) for name in DEFAULT_THRESHOLDS}
+    index = update_quality_index(args.audio_dir, workers=args.workers)
+    failing = {name: failed_checks(metrics, thresholds) for name, metrics in sorted(index.items())}
+    failing = {name: checks for name, checks in failing.items() if checks}
+    
+    for name, checks in failing.items():
+        print(f"{name}: {', '.join(checks)}")
+    total_hours = sum(metrics["duration"] for metrics in index.values()) / 3600
+    voiced_hours = sum(metrics["voiced_seconds"] for metrics in index.values()) / 3600
+    logger.info(f"{len(index)} recordings ({total_hours:.2f} h, {voiced_hours:.2f} h voiced), "
+                f"{len(failing)} fail the quality checks")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
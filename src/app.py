@@ -1,20 +1,31 @@
+# Streamlit renders the sidebar and title in main(); `streamlit run` has
+# already imported it by the time this module loads, so it costs nothing here
 import streamlit as st
+import importlib
 import logging
-import os
 
 # Import utility functions
 from voice_recorder.utils.config import setup_logging, setup_page
 from voice_recorder.utils.common import ensure_directories
 
-# Import pages
-from voice_recorder.pages.record_page import show_record_page
-from voice_recorder.pages.add_text_page import show_add_text_page
-from voice_recorder.pages.dataset_page import show_dataset_page
-from voice_recorder.pages.export_page import show_export_page
-
 # Setup logging
 logger = setup_logging()
 
+# Navigation labels and the (module, function) that renders each page.
+# Page modules are imported on first use so heavy dependencies such as
+# sounddevice, datasets and huggingface_hub only load when needed.
+PAGES = {
+    "Record from CSV": ("voice_recorder.pages.record_page", "show_record_page"),
+    "Add New Text": ("voice_recorder.pages.add_text_page", "show_add_text_page"),
+    "View Data": ("voice_recorder.pages.dataset_page", "show_dataset_page"),
+    "Export Dataset": ("voice_recorder.pages.export_page", "show_export_page"),
+}
+
+def load_page(label):
+    """Import a page module on demand and return its render function"""
+    module_name, function_name = PAGES[label]
+    return getattr(importlib.import_module(module_name), function_name)
+
 def main():
     """Main application entry point"""
     logger.info("Starting Streamlit application")
@@ -29,29 +40,14 @@ def main():
     st.sidebar.title("Voice Recording App")
     st.sidebar.markdown("Record your voice for text-to-speech training")
     
+    # Page selection is kept in session state, so it survives reruns
+    selected_page = st.sidebar.radio("Go to", list(PAGES.keys()), key="active_page")
+    
     # App title
     st.title("Voice Recording Application")
     
-    # Create tabs for different functionalities
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "Record from CSV", 
-        "Add New Text", 
-        "View Data",
-        "Export Dataset"
-    ])
-    
-    # Display different pages in each tab
-    with tab1:
-        show_record_page()
-    
-    with tab2:
-        show_add_text_page()
-    
-    with tab3:
-        show_dataset_page()
-        
-    with tab4:
-        show_export_page()
+    # Only the selected page is rendered on each rerun
+    load_page(selected_page)()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Script to measure cold-start time of the app and the command line scripts.
+Every run starts a fresh interpreter with -X importtime.
+"""
+import os
+import sys
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Target name -> interpreter arguments. The app module is imported rather
+# than run, so the Streamlit server is not started. Pages load on first use,
+# so "app_first_page" adds the default page a first render imports.
+TARGETS = {
+    "app": ["-c", "import app"],
+    "app_first_page": ["-c", "import app; app.load_page(next(iter(app.PAGES)))"],
+    "import_texts": [os.path.join(SRC_DIR, "import_texts.py"), "--help"],
+    "push_to_hf": [os.path.join(SRC_DIR, "push_to_hf.py"), "--help"],
+}
+
+def parse_importtime(stderr):
+    """
+    Parse the -X importtime report of one run
+
+    Args:
+        stderr: Standard error of the interpreter
+
+    Returns:
+        tuple: (total import time in ms, dict of top-level module -> cumulative ms)
+    """
+    total_us = 0
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Header line
+            continue
+        name = fields[2].rstrip()
+        total_us += self_us
+        # Nested imports are indented by two spaces per level
+        if not name.startswith("  "):
+            top_level[name.strip()] = top_level.get(name.strip(), 0) + cumulative_us / 1000
+    return total_us / 1000, top_level
+
+def run_target(args, runs=5):
+    """
+    Start a target several times in fresh interpreters
+
+    Args:
+        args: Interpreter arguments, as in TARGETS
+        runs: Number of runs
+
+    Returns:
+        dict: "wall_ms" and "import_ms" medians, and the slowest top-level imports of the median run
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    results = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        process = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=SRC_DIR, env=env,
+                                 capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - start_time) * 1000
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "failed")
+        import_ms, top_level = parse_importtime(process.stderr)
+        results.append((wall_ms, import_ms, top_level))
+
+    results.sort(key=lambda result: result[0])
+    slowest = sorted(results[len(results) // 2][2].items(), key=lambda item: -item[1])[:10]
+    return {
+        "wall_ms": round(statistics.median(result[0] for result in results), 1),
+        "import_ms": round(statistics.median(result[1] for result in results), 1),
+        "slowest_imports": [[name, round(ms, 1)] for name, ms in slowest],
+    }
+
+def compare(results, baseline):
+    """Log the change of every target against a baseline"""
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for key in ("wall_ms", "import_ms"):
+            change = (result[key] - before[key]) / before[key] if before[key] else 0.0
+            logger.info(f"{name} {key}: {before[key]:.1f} -> {result[key]:.1f} ({change:+.0%})")
+
+def main():
+    """Measure startup time of the app and the scripts"""
+    parser = argparse.ArgumentParser(description="Measure cold-start time with -X importtime")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per target (default: 5)")
+    parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS), help="Targets to measure")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier --output run to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.targets:
+        try:
+            results[name] = run_target(TARGETS[name], runs=args.runs)
+        except RuntimeError as e:
+            logger.error(f"{name} failed to start: {e}")
+            return 1
+        result = results[name]
+        logger.info(f"{name}: median wall {result['wall_ms']:.1f} ms, imports {result['import_ms']:.1f} ms")
+        for module, ms in result["slowest_imports"][:5]:
+            logger.info(f"    {module}: {ms:.1f} ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Script to convert the recordings in audio_files/ to another storage codec.
+FLAC is lossless and about half the size of 16-bit WAV.
+"""
+import os
+import sys
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add src to path if needed
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_recorder.utils.common import DATA_PATH
+from voice_recorder.audio_handlers.audio_layout import audio_path, iter_audio_files
+from voice_recorder.audio_handlers.audio_processor import AUDIO_CODECS, codec_for_path, convert_audio_file, delete_audio_file
+
+def _convert(item):
+    """Convert one file (runs in a worker process)"""
+    source_path, target_path, codec = item
+    try:
+        return convert_audio_file(source_path, target_path, codec), None
+    except Exception as e:
+        return None, f"{source_path}: {e!r}"
+
+def convert_audio_dir(audio_dir, data_path, codec="flac", workers=1, keep_originals=False):
+    """
+    Convert every audio file in a directory to a codec and update the dataset
+    
+    Files are converted in a process pool and checked sample by sample. The
+    dataset is updated in one write, and the original files are removed only
+    after that write succeeded.
+    
+    Args:
+        audio_dir: Directory containing the audio files
+        data_path: Path to the dataset (CSV, or .db for SQLite)
+        codec: Target codec ("flac" or "wav")
+        workers: Number of worker processes
+        keep_originals: Keep the original files after converting them
+        
+    Returns:
+        bool: True if every file was converted and the dataset updated
+    """
+    from voice_recorder.data_handlers.csv_handler import load_data, rename_audio_files
+    
+    extension = AUDIO_CODECS[codec]
+    items = []
+    names = {}
+    for name, entry in sorted(iter_audio_files(audio_dir)):
+        if codec_for_path(name) == codec:
+            continue
+        # The converted file stays in the same shard directory
+        target_name = os.path.splitext(name)[0] + extension
+        target_path = audio_path(audio_dir, target_name)
+        if os.path.exists(target_path):
+            logger.warning(f"Skipping {name}: {target_name} already exists")
+            continue
+        names[entry.path] = (name, target_name)
+        items.append((entry.path, target_path, codec))
+    
+    if not items:
+        logger.info(f"No audio files to convert to {codec} in {audio_dir}")
+        return True
+    
+    logger.info(f"Converting {len(items)} audio files to {codec} with {workers} workers")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_convert, items, chunksize=max(1, len(items) // (workers * 4))))
+    else:
+        results = [_convert(item) for item in items]
+    
+    renames = {}
+    source_bytes = target_bytes = 0
+    for (source_path, target_path, _), (sizes, error) in zip(items, results):
+        if error:
+            logger.error(f"Could not convert {error}")
+            continue
+        source_name, target_name = names[source_path]
+        renames[source_name] = target_name
+        source_bytes += sizes[0]
+        target_bytes += sizes[1]
+    
+    # Link the dataset to the converted files before touching the originals
+    success, _ = rename_audio_files(load_data(data_path), renames, data_path)
+    if not success:
+        logger.error(f"Failed to update {data_path}; the original files were kept")
+        return False
+    
+    if not keep_originals:
+        for name in renames:
+            delete_audio_file(audio_path(audio_dir, name))
+    
+    ratio = target_bytes / source_bytes if source_bytes else 0.0
+    logger.info(f"Converted {len(renames)} files: {source_bytes / 1024 / 1024:.1f} MB -> "
+                f"{target_bytes / 1024 / 1024:.1f} MB ({ratio:.0%})")
+    return len(renames) == len(items)
+
+def main():
+    """Convert the stored recordings to another codec"""
+    parser = argparse.ArgumentParser(description="Convert recordings to another storage codec")
+    parser.add_argument("--audio-dir", default="audio_files", help="Directory containing the audio files")
+    parser.add_argument("--data", default=DATA_PATH, help="Dataset to update (CSV, or .db for SQLite)")
+    parser.add_argument("--codec", choices=list(AUDIO_CODECS), default="flac", help="Target codec (default: flac)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--keep-originals", action="store_true", help="Keep the original files after converting them")
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.audio_dir):
+        logger.error(f"Audio directory not found: {args.audio_dir}")
+        return 1
+    
+    success = convert_audio_dir(args.audio_dir, args.data, codec=args.codec, workers=args.workers,
+                                keep_originals=args.keep_originals)
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
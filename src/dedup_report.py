@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Script to report groups of near-duplicate texts in the dataset.
+"""
+import os
+import sys
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add src to path if needed
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_recorder.utils.common import DATA_PATH
+from voice_recorder.data_handlers import near_duplicates
+from voice_recorder.data_handlers.csv_handler import load_data, load_near_duplicate_index
+
+def dedup_report(data_path, output_path, threshold=near_duplicates.DEFAULT_THRESHOLD):
+    """
+    Write a CSV listing every group of near-duplicate texts
+
+    Args:
+        data_path: Path to the dataset (CSV, or .db for SQLite)
+        output_path: Path of the report to write
+        threshold: Minimum estimated Jaccard similarity of character 5-grams
+
+    Returns:
+        pd.DataFrame: The report, one row per text in a group (group, row, similarity, recorded, text)
+    """
+    start_time = time.perf_counter()
+    df = load_data(data_path)
+    index = load_near_duplicate_index(data_path)
+    groups = near_duplicates.duplicate_groups(index, threshold)
+
+    rows = []
+    for group_number, members in enumerate(groups):
+        for position, similarity in members:
+            rows.append({
+                "group": group_number,
+                "row": df.index[position],
+                "similarity": round(similarity, 3),
+                "recorded": bool(df["recorded"].iloc[position]),
+                "text": df["text"].iloc[position],
+            })
+    report = pd.DataFrame(rows, columns=["group", "row", "similarity", "recorded", "text"])
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    report.to_csv(output_path, index=False)
+
+    extra = len(report) - len(groups)
+    logger.info(f"Found {len(groups)} groups of near-duplicates in {len(df)} texts; {extra} texts could be removed "
+                f"({time.perf_counter() - start_time:.2f}s). Report written to {output_path}")
+    return report
+
+def main():
+    """Report near-duplicate texts"""
+    parser = argparse.ArgumentParser(description="Report groups of near-duplicate texts in the dataset")
+    parser.add_argument("--data", default=DATA_PATH, help="Dataset to check (CSV, or .db for SQLite)")
+    parser.add_argument("--output", default="data/near_duplicates.csv", help="Report file to write")
+    parser.add_argument("--threshold", type=float, default=near_duplicates.DEFAULT_THRESHOLD,
+                        help=f"Similarity from which texts count as near-duplicates (default: {near_duplicates.DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        logger.error(f"Dataset not found: {args.data}")
+        return 1
+
+    dedup_report(args.data, args.output, threshold=args.threshold)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,65 +1,186 @@
 import pandas as pd
 import os
-import sys
+import time
+import argparse
 import logging
 
+from voice_recorder.data_handlers import journal, near_duplicates, sqlite_store, text_index
+from voice_recorder.data_handlers.csv_handler import dataset_signature, invalidate_cache, load_near_duplicate_index
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def import_texts(sample_file, output_file):
+# Number of source rows read and written per chunk
+DEFAULT_CHUNKSIZE = 50000
+
+def prepare_chunk(chunk):
+    """
+    Clean one chunk of source texts
+
+    Args:
+        chunk: DataFrame with a "text" column read from the sample file
+
+    Returns:
+        pd.DataFrame: Valid rows in the app data layout (text, audio, recorded)
+    """
+    text = chunk["text"].astype("string")
+
+    # Handle potential quotes in text
+    quoted = text.str.startswith('"') & text.str.endswith('"')
+    text = text.where(~quoted.fillna(False), text.str.strip('"'))
+
+    # Keep only texts within the 32-140 character limit
+    lengths = text.str.len()
+    valid = lengths.between(32, 140).fillna(False)
+    text = text[valid]
+
+    return pd.DataFrame({
+        "text": text.astype(object),
+        "audio": None,
+        "recorded": False
+    })
+
+def drop_near_duplicates(app_df, indexes, batch_index):
+    """
+    Drop rows whose text is very similar to an indexed text
+
+    Args:
+        app_df: Prepared chunk in the app data layout
+        indexes: Indexes of texts to compare against (the existing dataset)
+        batch_index: Index of the texts kept so far in this import; kept texts are added to it
+
+    Returns:
+        pd.DataFrame: The rows to keep
+    """
+    keep = []
+    for text in app_df["text"]:
+        signature = near_duplicates.minhash(text)
+        duplicate = any(index.query(signature) for index in indexes) or bool(batch_index.query(signature))
+        if not duplicate:
+            batch_index.add(signature)
+        keep.append(not duplicate)
+    return app_df[keep]
+
+def import_texts(sample_file, output_file, append=False, chunksize=DEFAULT_CHUNKSIZE, skip_near_duplicates=False):
     """
     Import texts from a sample file to the app's data structure
-    
+
+    The sample file is streamed in chunks and written out in a single pass,
+    so memory use depends on the chunk size rather than the file size.
+
     Args:
         sample_file: Path to the sample texts file (CSV)
-        output_file: Path to save the app data (CSV)
+        output_file: Path to save the app data (CSV, or .db for SQLite)
+        append: Add the texts to the existing data instead of replacing it
+        chunksize: Number of rows to process at a time
+        skip_near_duplicates: Leave out texts very similar to a text already in the
+            dataset (when appending) or earlier in the import
+
+    Returns:
+        bool: True if successful, False otherwise
     """
     # Create data directory if it doesn't exist
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
     try:
-        # Read the sample texts
         logger.info(f"Reading sample texts from {sample_file}")
-        sample_df = pd.read_csv(sample_file)
-        
-        # Create the app data structure
-        app_df = pd.DataFrame(columns=["text", "audio", "recorded"])
-        
-        # Add sample texts to the app data
-        for _, row in sample_df.iterrows():
-            # Handle potential quotes in text
-            text = row["text"]
-            if isinstance(text, str) and text.startswith('"') and text.endswith('"'):
-                text = text.strip('"')
-                
-            app_df = pd.concat([
-                app_df, 
-                pd.DataFrame({
-                    "text": [text],
-                    "audio": [None],
-                    "recorded": [False]
-                })
-            ], ignore_index=True)
-        
-        # Save to the app's data file
-        logger.info(f"Saving {len(app_df)} texts to {output_file}")
-        app_df.to_csv(output_file, index=False)
-        
-        logger.info(f"Successfully imported {len(app_df)} texts into the app data.")
+        start_time = time.perf_counter()
+        total_rows = 0
+        imported_rows = 0
+
+        chunks = pd.read_csv(sample_file, usecols=["text"], chunksize=chunksize)
+        if append and not sqlite_store.is_sqlite_path(output_file):
+            # Fold pending app changes into the CSV so rows can be appended to it
+            if not journal.compact(output_file):
+                return False
+        existing_indexes = []
+        batch_index = near_duplicates.NearDuplicateIndex()
+        if skip_near_duplicates and append and os.path.exists(output_file):
+            existing_indexes.append(load_near_duplicate_index(output_file))
+        # The index loaded above is in step with the dataset as it is now
+        previous_signature = dataset_signature(output_file)
+
+        def prepare(chunk):
+            app_df = prepare_chunk(chunk)
+            if skip_near_duplicates:
+                app_df = drop_near_duplicates(app_df, existing_indexes, batch_index)
+            return app_df
+
+        if sqlite_store.is_sqlite_path(output_file):
+            if not append:
+                sqlite_store.import_dataframe(output_file, pd.DataFrame(columns=["text", "audio", "recorded"]))
+            for chunk in chunks:
+                total_rows += len(chunk)
+                app_df = prepare(chunk)
+                sqlite_store.insert_texts(output_file, app_df["text"].tolist())
+                imported_rows += len(app_df)
+        else:
+            if append:
+                target_file = output_file
+            else:
+                target_file = f"{output_file}.importing"
+                if os.path.exists(target_file):
+                    os.remove(target_file)
+
+            with journal.lock:
+                if append and journal.has_pending(output_file):
+                    logger.error(f"{output_file} was modified during the import. Please try again.")
+                    return False
+
+                write_header = not os.path.exists(target_file)
+                for chunk in chunks:
+                    total_rows += len(chunk)
+                    app_df = prepare(chunk)
+                    app_df.to_csv(target_file, mode="a", header=write_header, index=False)
+                    write_header = False
+                    imported_rows += len(app_df)
+
+                if write_header:
+                    pd.DataFrame(columns=["text", "audio", "recorded"]).to_csv(target_file, index=False)
+                if not append:
+                    os.replace(target_file, output_file)
+                    journal.discard(output_file)
+        invalidate_cache(output_file)
+        if not append:
+            text_index.discard(output_file)
+            near_duplicates.discard(output_file)
+        if skip_near_duplicates and existing_indexes:
+            # The signatures of the imported rows extend the near-duplicate index
+            near_duplicates.record_commit(output_file, previous_signature, dataset_signature(output_file),
+                                          signatures=batch_index.signatures)
+        elif skip_near_duplicates and not append:
+            near_duplicates.save_index(output_file, batch_index.signatures, dataset_signature(output_file))
+
+        elapsed = time.perf_counter() - start_time
+        skipped_rows = total_rows - imported_rows
+        if skipped_rows:
+            reason = "empty, not within 32-140 characters or near-duplicates" if skip_near_duplicates else \
+                "empty or not within 32-140 characters"
+            logger.warning(f"Skipped {skipped_rows} texts that are {reason}.")
+        rate = total_rows / elapsed if elapsed > 0 else float("inf")
+        logger.info(f"Successfully imported {imported_rows} texts into {output_file} "
+                    f"({'appended' if append else 'replaced'}) in {elapsed:.2f}s ({rate:,.0f} rows/s).")
         return True
     except Exception as e:
         logger.error(f"Error importing texts: {e}")
         return False
 
 if __name__ == "__main__":
-    # Use command line arguments if provided, otherwise use defaults
-    sample_file = sys.argv[1] if len(sys.argv) > 1 else "sample_texts.csv"
-    output_file = sys.argv[2] if len(sys.argv) > 2 else "data/data.csv"
-    
-    success = import_texts(sample_file, output_file)
-    
+    parser = argparse.ArgumentParser(description="Import texts to record into the app's data file")
+    parser.add_argument("sample_file", nargs="?", default="sample_texts.csv", help="CSV file with a 'text' column")
+    parser.add_argument("output_file", nargs="?", default="data/data.csv", help="App data file to write (CSV, or .db for SQLite)")
+    parser.add_argument("--append", action="store_true", help="Add the texts to the existing data instead of replacing it")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Number of rows to process at a time")
+    parser.add_argument("--skip-near-duplicates", action="store_true",
+                        help="Leave out texts very similar to texts already in the data or earlier in the file")
+    args = parser.parse_args()
+
+    success = import_texts(args.sample_file, args.output_file, append=args.append, chunksize=args.chunksize,
+                           skip_near_duplicates=args.skip_near_duplicates)
+
     if success:
         print(f"Imported texts successfully. You can now run the app with: streamlit run src/app.py")
     else:
-        print("Failed to import texts. Check the logs for details.") 
\ No newline at end of file
+        print("Failed to import texts. Check the logs for details.")
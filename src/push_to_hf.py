@@ -17,9 +17,7 @@ logger = logging.getLogger(__name__)
 if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Import Hugging Face uploader
-from voice_recorder.data_handlers.huggingface_uploader import push_to_huggingface
-from voice_recorder.data_handlers.export_handler import export_dataset
+from voice_recorder.utils.common import DATA_PATH
 
 def main():
     """Push a dataset to the Hugging Face Hub"""
@@ -30,11 +28,40 @@ def main():
     parser.add_argument("--token", help="Hugging Face API token (if not provided, will ask or use HUGGINGFACE_TOKEN env var)")
     parser.add_argument("--public", action="store_true", help="Make the repository public (default is private)")
     parser.add_argument("--export-first", action="store_true", help="Export the dataset before pushing")
-    parser.add_argument("--input-csv", default="data/data.csv", help="Path to input CSV (if exporting)")
+    parser.add_argument("--input-csv", default=DATA_PATH, help="Path to input CSV or SQLite .db dataset (if exporting)")
     parser.add_argument("--audio-dir", default="audio_files", help="Path to audio directory (if exporting)")
+    parser.add_argument("--incremental", action="store_true", help="Only encode recordings that changed since the last incremental export")
+    # Defaults of None are filled in from the handler modules once they are imported
+    parser.add_argument("--row-group-size", type=int, help="Maximum rows per Parquet row group when exporting (default: export_handler.DEFAULT_ROW_GROUP_SIZE)")
+    parser.add_argument("--max-memory-mb", type=int, help="Ceiling on audio buffered in memory when exporting, in MB (default: export_handler.DEFAULT_MAX_MEMORY_MB)")
+    parser.add_argument("--shard-size-mb", type=int, help="Target size of each exported Parquet shard in MB, 0 for a single dataset.parquet (default: export_handler.DEFAULT_SHARD_SIZE_MB)")
+    parser.add_argument("--audio-codec", choices=["flac", "wav"], help="Transcode the exported audio to this codec (default: keep the stored files)")
+    parser.add_argument("--quality-filter", action="store_true", help="Leave out recordings that fail the default quality checks (clipping, level, SNR, voiced duration)")
+    parser.add_argument("--delta", action="store_true", help="Only upload files that differ from the repository, in a single commit")
+    parser.add_argument("--upload-workers", type=int, help="Number of files uploaded at the same time (default: huggingface_uploader.DEFAULT_UPLOAD_WORKERS)")
+    parser.add_argument("--max-retries", type=int, help="Retries per file, with exponential backoff, before the upload fails (default: huggingface_uploader.DEFAULT_MAX_RETRIES)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Threads used to read and encode audio when exporting, and processes used for quality checks (default: CPU count)")
     
     args = parser.parse_args()
     
+    # Import the handlers only after the arguments are parsed, so --help and
+    # usage errors don't pay for importing datasets and huggingface_hub
+    from voice_recorder.data_handlers import export_handler, huggingface_uploader
+    from voice_recorder.data_handlers.huggingface_uploader import push_to_huggingface
+    from voice_recorder.data_handlers.export_handler import export_dataset
+    from voice_recorder.audio_handlers.quality import DEFAULT_THRESHOLDS
+    
+    defaults = {
+        "row_group_size": export_handler.DEFAULT_ROW_GROUP_SIZE,
+        "max_memory_mb": export_handler.DEFAULT_MAX_MEMORY_MB,
+        "shard_size_mb": export_handler.DEFAULT_SHARD_SIZE_MB,
+        "upload_workers": huggingface_uploader.DEFAULT_UPLOAD_WORKERS,
+        "max_retries": huggingface_uploader.DEFAULT_MAX_RETRIES,
+    }
+    for name, value in defaults.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    
     # Export the dataset if requested
     if args.export_first:
         logger.info(f"Exporting dataset first: {args.input_csv} -> {args.dataset}")
@@ -46,7 +73,10 @@ def main():
             logger.error(f"Audio directory not found: {args.audio_dir}")
             return 1
         
-        success = export_dataset(args.input_csv, args.audio_dir, args.dataset)
+        success = export_dataset(args.input_csv, args.audio_dir, args.dataset, incremental=args.incremental, workers=args.workers,
+                                 row_group_size=args.row_group_size, max_memory_mb=args.max_memory_mb,
+                                 shard_size_mb=args.shard_size_mb, audio_codec=args.audio_codec,
+                                 quality_thresholds=DEFAULT_THRESHOLDS if args.quality_filter else None)
         if not success:
             logger.error("Export failed. Aborting push to Hugging Face.")
             return 1
@@ -73,14 +103,17 @@ def main():
         dataset_dir=args.dataset,
         repo_id=args.repo_id,
         private=not args.public,
-        token=token
+        token=token,
+        delta=args.delta,
+        workers=args.upload_workers,
+        max_retries=args.max_retries
     )
     
     if success:
         logger.info(f"Dataset successfully pushed to: {repo_url}")
         return 0
     else:
-        logger.error("Failed to push dataset to Hugging Face.")
+        logger.error("Failed to push dataset to Hugging Face. Run the same command again to resume the upload.")
         return 1
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Script to move recordings from the flat audio_files/ layout into shard
+directories (audio_files/ab/cd/<name>) and point the dataset at them.
+"""
+import os
+import sys
+import argparse
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add src to path if needed
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_recorder.utils.common import AUDIO_DIR, DATA_PATH
+from voice_recorder.audio_handlers import audio_index
+from voice_recorder.audio_handlers.audio_layout import audio_name, is_sharded, iter_audio_files, sharded_path
+from voice_recorder.audio_handlers.quality import load_quality_index, save_quality_index
+
+def shard_audio_dir(audio_dir, data_path, dry_run=False):
+    """
+    Move flat audio files into shard directories and update the dataset
+
+    Files are moved first and the dataset is updated in one write
+    afterwards. Rows are pointed at a sharded file whenever it exists, so
+    running the script again after an interruption finishes the job. File
+    names and modification times are kept, and the audio and quality
+    indexes are renamed rather than rebuilt.
+
+    Args:
+        audio_dir: Directory containing the audio files
+        data_path: Path to the dataset (CSV, or .db for SQLite)
+        dry_run: Only report what would be moved
+
+    Returns:
+        bool: True if every file was moved and the dataset updated
+    """
+    from voice_recorder.data_handlers.csv_handler import load_data, rename_audio_files
+
+    flat = sorted(name for name, _ in iter_audio_files(audio_dir) if "/" not in name)
+    if dry_run:
+        logger.info(f"Would move {len(flat)} audio files into shard directories of {audio_dir}")
+        return True
+
+    moved = {}
+    failed = 0
+    for name in flat:
+        target = sharded_path(audio_dir, name)
+        if os.path.exists(target):
+            logger.warning(f"Skipping {name}: {audio_name(name)} already exists")
+            failed += 1
+            continue
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(audio_dir, name), target)
+            moved[name] = audio_name(name)
+        except OSError as e:
+            logger.error(f"Could not move {name}: {e}")
+            failed += 1
+
+    audio_index.rename_files(audio_dir, moved)
+    quality = load_quality_index(audio_dir)
+    if any(name in quality for name in moved):
+        save_quality_index(audio_dir, {moved.get(name, name): metrics for name, metrics in quality.items()})
+
+    # Rows left over from an interrupted run are picked up here as well
+    df = load_data(data_path)
+    recorded = df.loc[df["recorded"] == True, "audio"].dropna()
+    renames = {
+        name: audio_name(name) for name in recorded
+        if not is_sharded(name) and os.path.exists(sharded_path(audio_dir, name))
+    }
+    success, _ = rename_audio_files(df, renames, data_path)
+    if not success:
+        logger.error(f"Failed to update {data_path}; run the script again to retry")
+        return False
+
+    logger.info(f"Moved {len(moved)} audio files into shard directories and updated {len(renames)} recordings")
+    return failed == 0
+
+def main():
+    """Move the stored recordings into the sharded layout"""
+    parser = argparse.ArgumentParser(description="Move recordings into shard directories and update the dataset")
+    parser.add_argument("--audio-dir", default=AUDIO_DIR, help="Directory containing the audio files")
+    parser.add_argument("--data", default=DATA_PATH, help="Dataset to update (CSV, or .db for SQLite)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many files would be moved")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.audio_dir):
+        logger.error(f"Audio directory not found: {args.audio_dir}")
+        return 1
+
+    success = shard_audio_dir(args.audio_dir, args.data, dry_run=args.dry_run)
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
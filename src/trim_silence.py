@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Script to trim leading and trailing silence from the recordings in audio_files/.
+Files are rewritten in place with the same name and codec.
+"""
+import os
+import sys
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Add src to path if needed
+if os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice_recorder.audio_handlers.audio_layout import iter_audio_files
+from voice_recorder.audio_handlers.vad import DEFAULT_PADDING_MS, DEFAULT_THRESHOLD_DB, trim_file
+
+def _trim(path, threshold_db, padding_ms, dry_run):
+    """Trim one file (runs in a worker process)"""
+    try:
+        return trim_file(path, threshold_db=threshold_db, padding_ms=padding_ms, dry_run=dry_run), None
+    except Exception as e:
+        return None, f"{path}: {e!r}"
+
+def trim_audio_dir(audio_dir, threshold_db=DEFAULT_THRESHOLD_DB, padding_ms=DEFAULT_PADDING_MS,
+                   workers=1, dry_run=False):
+    """
+    Trim silence from every WAV and FLAC file in a directory
+    
+    Args:
+        audio_dir: Directory containing the audio files
+        threshold_db: Frame energy (dBFS) above which a frame counts as voiced
+        padding_ms: Silence to keep before and after the speech
+        workers: Number of worker processes
+        dry_run: Only report how much would be trimmed
+        
+    Returns:
+        bool: True if every file was processed
+    """
+    paths = [entry.path for _, entry in sorted(iter_audio_files(audio_dir))]
+    if not paths:
+        logger.info(f"No audio files found in {audio_dir}")
+        return True
+    
+    trim = partial(_trim, threshold_db=threshold_db, padding_ms=padding_ms, dry_run=dry_run)
+    logger.info(f"{'Measuring' if dry_run else 'Trimming'} silence in {len(paths)} files with {workers} workers")
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(trim, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        results = [trim(path) for path in paths]
+    
+    before_seconds = after_seconds = 0.0
+    trimmed_files = failed_files = 0
+    for result, error in results:
+        if error:
+            logger.error(f"Could not trim {error}")
+            failed_files += 1
+            continue
+        before, after, sample_rate = result
+        before_seconds += before / sample_rate
+        after_seconds += after / sample_rate
+        trimmed_files += after < before
+    
+    saved = before_seconds - after_seconds
+    share = saved / before_seconds if before_seconds else 0.0
+    logger.info(f"{'Would trim' if dry_run else 'Trimmed'} {trimmed_files} of {len(paths)} files: "
+                f"{before_seconds / 3600:.2f} h -> {after_seconds / 3600:.2f} h ({saved:.1f}s, {share:.0%} less)")
+    return failed_files == 0
+
+def main():
+    """Trim silence from the stored recordings"""
+    parser = argparse.ArgumentParser(description="Trim leading and trailing silence from recordings")
+    parser.add_argument("--audio-dir", default="audio_files", help="Directory containing the audio files")
+    parser.add_argument("--threshold-db", type=float, default=DEFAULT_THRESHOLD_DB, help=f"Frame energy in dBFS above which a frame counts as voiced (default: {DEFAULT_THRESHOLD_DB})")
+    parser.add_argument("--padding-ms", type=int, default=DEFAULT_PADDING_MS, help=f"Silence to keep before and after the speech (default: {DEFAULT_PADDING_MS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how much silence would be trimmed")
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.audio_dir):
+        logger.error(f"Audio directory not found: {args.audio_dir}")
+        return 1
+    
+    success = trim_audio_dir(args.audio_dir, threshold_db=args.threshold_db, padding_ms=args.padding_ms,
+                             workers=args.workers, dry_run=args.dry_run)
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
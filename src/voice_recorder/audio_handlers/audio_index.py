@@ -0,0 +1,365 @@
+import json
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+from voice_recorder.audio_handlers.audio_layout import iter_audio_files, split_audio_path
+
+logger = logging.getLogger(__name__)
+
+# Metadata index kept in each audio directory
+INDEX_FILE = ".audio_index.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio (
+    name TEXT PRIMARY KEY,
+    duration REAL NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    frames INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+
+-- Audio file of each recorded row of the dataset, and running totals over
+-- them kept up to date by the triggers below, so the recorded duration is
+-- read without going through the rows
+CREATE TABLE IF NOT EXISTS linked (
+    row INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS linked_name ON linked (name);
+CREATE TABLE IF NOT EXISTS linked_totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    files INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    bytes INTEGER NOT NULL,
+    signature TEXT
+);
+INSERT OR IGNORE INTO linked_totals (id, files, seconds, bytes) VALUES (0, 0, 0, 0);
+
+CREATE TRIGGER IF NOT EXISTS linked_insert AFTER INSERT ON linked BEGIN
+    UPDATE linked_totals SET files = files + 1,
+        seconds = seconds + (SELECT duration FROM audio WHERE name = NEW.name),
+        bytes = bytes + (SELECT bytes FROM audio WHERE name = NEW.name)
+    WHERE EXISTS (SELECT 1 FROM audio WHERE name = NEW.name);
+END;
+CREATE TRIGGER IF NOT EXISTS linked_delete AFTER DELETE ON linked BEGIN
+    UPDATE linked_totals SET files = files - 1,
+        seconds = seconds - (SELECT duration FROM audio WHERE name = OLD.name),
+        bytes = bytes - (SELECT bytes FROM audio WHERE name = OLD.name)
+    WHERE EXISTS (SELECT 1 FROM audio WHERE name = OLD.name);
+END;
+CREATE TRIGGER IF NOT EXISTS linked_update AFTER UPDATE OF name ON linked BEGIN
+    UPDATE linked_totals SET files = files - 1,
+        seconds = seconds - (SELECT duration FROM audio WHERE name = OLD.name),
+        bytes = bytes - (SELECT bytes FROM audio WHERE name = OLD.name)
+    WHERE EXISTS (SELECT 1 FROM audio WHERE name = OLD.name);
+    UPDATE linked_totals SET files = files + 1,
+        seconds = seconds + (SELECT duration FROM audio WHERE name = NEW.name),
+        bytes = bytes + (SELECT bytes FROM audio WHERE name = NEW.name)
+    WHERE EXISTS (SELECT 1 FROM audio WHERE name = NEW.name);
+END;
+CREATE TRIGGER IF NOT EXISTS audio_insert AFTER INSERT ON audio BEGIN
+    UPDATE linked_totals SET
+        files = files + (SELECT COUNT(*) FROM linked WHERE name = NEW.name),
+        seconds = seconds + NEW.duration * (SELECT COUNT(*) FROM linked WHERE name = NEW.name),
+        bytes = bytes + NEW.bytes * (SELECT COUNT(*) FROM linked WHERE name = NEW.name);
+END;
+CREATE TRIGGER IF NOT EXISTS audio_delete AFTER DELETE ON audio BEGIN
+    UPDATE linked_totals SET
+        files = files - (SELECT COUNT(*) FROM linked WHERE name = OLD.name),
+        seconds = seconds - OLD.duration * (SELECT COUNT(*) FROM linked WHERE name = OLD.name),
+        bytes = bytes - OLD.bytes * (SELECT COUNT(*) FROM linked WHERE name = OLD.name);
+END;
+CREATE TRIGGER IF NOT EXISTS audio_update AFTER UPDATE ON audio BEGIN
+    UPDATE linked_totals SET
+        files = files - (SELECT COUNT(*) FROM linked WHERE name = OLD.name)
+                      + (SELECT COUNT(*) FROM linked WHERE name = NEW.name),
+        seconds = seconds - OLD.duration * (SELECT COUNT(*) FROM linked WHERE name = OLD.name)
+                          + NEW.duration * (SELECT COUNT(*) FROM linked WHERE name = NEW.name),
+        bytes = bytes - OLD.bytes * (SELECT COUNT(*) FROM linked WHERE name = OLD.name)
+                      + NEW.bytes * (SELECT COUNT(*) FROM linked WHERE name = NEW.name);
+END;
+"""
+
+COLUMNS = ["duration", "sample_rate", "channels", "frames", "bytes", "mtime_ns"]
+
+def index_path(audio_dir):
+    """Path of the metadata index of an audio directory"""
+    return os.path.join(audio_dir, INDEX_FILE)
+
+def connect(audio_dir):
+    """
+    Open the metadata index of an audio directory, creating it if needed
+
+    Args:
+        audio_dir: Directory containing the audio files
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    conn = sqlite3.connect(index_path(audio_dir), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Rows replaced by INSERT OR REPLACE then fire the delete triggers, which keep linked_totals right
+    conn.execute("PRAGMA recursive_triggers=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+def read_metadata(path, stat=None):
+    """
+    Read the metadata of an audio file from its header
+
+    Args:
+        path: Path of a WAV or FLAC file
+        stat: os.stat result of the file, if already known
+
+    Returns:
+        tuple: Values in COLUMNS order
+    """
+    # Imported here so the app starts without loading libsndfile
+    import soundfile as sf
+
+    stat = stat or os.stat(path)
+    info = sf.info(path)
+    return (info.frames / info.samplerate, info.samplerate, info.channels, info.frames,
+            stat.st_size, stat.st_mtime_ns)
+
+def _upsert(conn, rows):
+    conn.executemany(
+        f"INSERT OR REPLACE INTO audio (name, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+def record_file(path):
+    """
+    Add or refresh the index entry of one audio file
+
+    Args:
+        path: Path of the audio file; the index of its audio directory is updated
+
+    Returns:
+        bool: True if the entry was written
+    """
+    try:
+        audio_dir, name = split_audio_path(path)
+        row = (name,) + read_metadata(path)
+        with closing(connect(audio_dir)) as conn:
+            with conn:
+                _upsert(conn, [row])
+        return True
+    except Exception as e:
+        logger.warning(f"Could not index audio file {path}: {e}")
+        return False
+
+def remove_file(path):
+    """
+    Drop the index entry of a deleted audio file
+
+    Args:
+        path: Path of the audio file
+    """
+    audio_dir, name = split_audio_path(path)
+    if not os.path.exists(index_path(audio_dir)):
+        return
+    try:
+        with closing(connect(audio_dir)) as conn:
+            with conn:
+                conn.execute("DELETE FROM audio WHERE name = ?", (name,))
+    except Exception as e:
+        logger.warning(f"Could not remove {path} from the audio index: {e}")
+
+def reconcile(audio_dir):
+    """
+    Bring the index in line with the files in the directory and its shards
+
+    Only file sizes and modification times are compared, so headers are read
+    just for files that are new or changed; entries of missing files are
+    removed.
+
+    Args:
+        audio_dir: Directory containing the audio files
+
+    Returns:
+        dict: Counts of "added", "updated", "removed" and "unchanged" entries
+    """
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    with closing(connect(audio_dir)) as conn:
+        known = {name: (size, mtime_ns) for name, size, mtime_ns in
+                 conn.execute("SELECT name, bytes, mtime_ns FROM audio")}
+        rows = []
+        seen = set()
+        for name, entry in iter_audio_files(audio_dir):
+            seen.add(name)
+            stat = entry.stat()
+            old = known.get(name)
+            if old == (stat.st_size, stat.st_mtime_ns):
+                counts["unchanged"] += 1
+                continue
+            try:
+                rows.append((name,) + read_metadata(entry.path, stat))
+            except Exception as e:
+                logger.warning(f"Could not read audio header of {entry.path}: {e}")
+                continue
+            counts["added" if old is None else "updated"] += 1
+        missing = [(name,) for name in known if name not in seen]
+        counts["removed"] = len(missing)
+        with conn:
+            _upsert(conn, rows)
+            conn.executemany("DELETE FROM audio WHERE name = ?", missing)
+    if rows or missing:
+        logger.info(f"Reconciled audio index of {audio_dir}: {counts}")
+    return counts
+
+def rename_files(audio_dir, renames):
+    """
+    Move index entries to new names after files were moved within the directory
+
+    Args:
+        audio_dir: Directory containing the audio files
+        renames: Dict of old name -> new name
+    """
+    if not renames or not os.path.exists(index_path(audio_dir)):
+        return
+    with closing(connect(audio_dir)) as conn:
+        with conn:
+            conn.executemany("DELETE FROM audio WHERE name = ?", [(new,) for new in renames.values()])
+            conn.executemany("UPDATE audio SET name = ? WHERE name = ?",
+                             [(new, old) for old, new in renames.items()])
+
+def get_metadata(audio_dir, names):
+    """
+    Look up the metadata of some audio files
+
+    Args:
+        audio_dir: Directory containing the audio files
+        names: Audio file names
+
+    Returns:
+        dict: File name -> dict of COLUMNS, for the names found in the index
+    """
+    names = [name for name in dict.fromkeys(names) if isinstance(name, str)]
+    result = {}
+    with closing(connect(audio_dir)) as conn:
+        # Stay well below SQLite's limit on query parameters
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            query = f"SELECT name, {', '.join(COLUMNS)} FROM audio WHERE name IN ({', '.join('?' * len(batch))})"
+            for row in conn.execute(query, batch):
+                result[row[0]] = dict(zip(COLUMNS, row[1:]))
+    return result
+
+def summary(audio_dir, names=None):
+    """
+    Totals over indexed audio files
+
+    Args:
+        audio_dir: Directory containing the audio files
+        names: Only count these audio file names (such as the recorded rows
+            of a dataset), None to count every indexed file
+
+    Returns:
+        dict: "files", "seconds" and "bytes"
+    """
+    totals = "SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(bytes), 0) FROM audio"
+    with closing(connect(audio_dir)) as conn:
+        if names is None:
+            files, seconds, size = conn.execute(totals).fetchone()
+        else:
+            # Join against a temporary table rather than one IN list per batch of names
+            conn.execute("CREATE TEMP TABLE wanted (name TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO wanted (name) VALUES (?)",
+                             ((name,) for name in names if isinstance(name, str)))
+            files, seconds, size = conn.execute(
+                f"{totals} WHERE name IN (SELECT name FROM wanted)"
+            ).fetchone()
+    return {"files": files, "seconds": seconds, "bytes": size}
+
+def _stored_signature(dataset, dataset_signature):
+    """Dataset path and signature as stored next to the links"""
+    return json.dumps([os.path.abspath(dataset), dataset_signature])
+
+def linked_summary(audio_dir, dataset, dataset_signature):
+    """
+    Totals over the audio files of the recorded rows of a dataset
+
+    The totals are kept up to date as files and links change, so this is a
+    single lookup however many rows are recorded.
+
+    Args:
+        audio_dir: Directory containing the audio files
+        dataset: Path to the dataset
+        dataset_signature: Current signature of the dataset files (as csv_handler computes it)
+
+    Returns:
+        dict: "files", "seconds" and "bytes", or None if the links are not in
+            step with the dataset and have to be set again with link_files
+    """
+    with closing(connect(audio_dir)) as conn:
+        files, seconds, size, signature = conn.execute(
+            "SELECT files, seconds, bytes, signature FROM linked_totals WHERE id = 0"
+        ).fetchone()
+    if signature != _stored_signature(dataset, dataset_signature):
+        return None
+    return {"files": files, "seconds": max(seconds, 0.0), "bytes": size}
+
+def link_files(audio_dir, links, dataset, dataset_signature):
+    """
+    Replace the links between recorded rows and audio files
+
+    Args:
+        audio_dir: Directory containing the audio files
+        links: Dict of row index -> audio file name of every recorded row
+        dataset: Path to the dataset
+        dataset_signature: Signature of the dataset files links was read from
+    """
+    rows = [(int(row), name) for row, name in links.items() if isinstance(name, str)]
+    with closing(connect(audio_dir)) as conn:
+        with conn:
+            conn.execute("DELETE FROM linked")
+            conn.executemany("INSERT INTO linked (row, name) VALUES (?, ?)", rows)
+            # Recount once instead of trusting the running totals after a full rebuild
+            files, seconds, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(duration), 0), COALESCE(SUM(bytes), 0) "
+                "FROM linked JOIN audio USING (name)"
+            ).fetchone()
+            conn.execute(
+                "UPDATE linked_totals SET files = ?, seconds = ?, bytes = ?, signature = ? WHERE id = 0",
+                (files, seconds, size, _stored_signature(dataset, dataset_signature))
+            )
+    logger.info(f"Linked {len(rows)} recorded rows of {dataset} to the audio index of {audio_dir}")
+
+def record_commit(audio_dir, dataset, previous_signature, dataset_signature, links):
+    """
+    Keep the links in step with a write to the dataset
+
+    The links are updated and the new dataset signature is stored, but only
+    if they were in step with the dataset before the write; otherwise they
+    are left to be set again on next use.
+
+    Args:
+        audio_dir: Directory containing the audio files
+        dataset: Path to the dataset
+        previous_signature: Signature of the dataset files before the write
+        dataset_signature: Signature of the dataset files after the write
+        links: Dict of row index -> new audio file name, or None where the
+            recording was cleared
+    """
+    if not os.path.exists(index_path(audio_dir)):
+        return
+    try:
+        with closing(connect(audio_dir)) as conn:
+            with conn:
+                stored = conn.execute("SELECT signature FROM linked_totals WHERE id = 0").fetchone()[0]
+                if stored != _stored_signature(dataset, previous_signature):
+                    return
+                conn.executemany("DELETE FROM linked WHERE row = ?",
+                                 [(int(row),) for row, name in links.items() if name is None])
+                conn.executemany("INSERT OR REPLACE INTO linked (row, name) VALUES (?, ?)",
+                                 [(int(row), name) for row, name in links.items() if name is not None])
+                conn.execute("UPDATE linked_totals SET signature = ? WHERE id = 0",
+                             (_stored_signature(dataset, dataset_signature),))
+    except Exception as e:
+        logger.warning(f"Could not update the recorded files in the audio index of {audio_dir}: {e}")
@@ -0,0 +1,246 @@
+import numpy as np
+import logging
+import mmap
+import os
+import struct
+import wave
+
+logger = logging.getLogger(__name__)
+
+# Samples converted per step, so conversion needs only a small fixed buffer
+CHUNK_SAMPLES = 64 * 1024
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+def float_to_int16(audio, out=None, chunk_samples=CHUNK_SAMPLES):
+    """
+    Convert float samples in [-1, 1] to int16, with rounding and clipping
+
+    The conversion runs in chunks through one small float32 scratch buffer,
+    so the only full-size allocation is the int16 result (none if out is
+    given).
+
+    Args:
+        audio: Array of float samples
+        out: int16 array of the same shape to write into, allocated if not given
+        chunk_samples: Number of samples converted per step
+
+    Returns:
+        np.ndarray: The int16 samples
+    """
+    audio = np.asarray(audio)
+    flat = audio.reshape(-1)
+    if out is None:
+        out = np.empty(audio.shape, dtype=np.int16)
+    flat_out = out.reshape(-1)
+    scratch = np.empty(min(chunk_samples, max(1, len(flat))), dtype=np.float32)
+    for start in range(0, len(flat), chunk_samples):
+        chunk = flat[start:start + chunk_samples]
+        buffer = scratch[:len(chunk)]
+        np.multiply(chunk, 32767, out=buffer, casting="unsafe")
+        np.rint(buffer, out=buffer)
+        np.clip(buffer, -32768, 32767, out=buffer)
+        flat_out[start:start + len(chunk)] = buffer
+    return out
+
+def iter_int16_chunks(audio, chunk_samples=CHUNK_SAMPLES):
+    """
+    Yield the audio as int16 in consecutive chunks
+
+    Float audio is converted through one reused buffer; int16 audio is
+    yielded as views without copying. Each chunk is only valid until the
+    next one is requested.
+
+    Args:
+        audio: Array of float or int16 samples
+        chunk_samples: Number of samples per chunk
+
+    Yields:
+        np.ndarray: int16 chunk
+    """
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        for start in range(0, len(audio), chunk_samples):
+            yield audio[start:start + chunk_samples]
+        return
+    buffer = np.empty((min(chunk_samples, max(1, len(audio))),) + audio.shape[1:], dtype=np.int16)
+    for start in range(0, len(audio), chunk_samples):
+        chunk = audio[start:start + chunk_samples]
+        yield float_to_int16(chunk, out=buffer[:len(chunk)], chunk_samples=chunk_samples)
+
+def write_audio(path, audio, sample_rate, codec="wav", chunk_samples=CHUNK_SAMPLES):
+    """
+    Write float or int16 audio as a 16-bit WAV or FLAC file, chunk by chunk
+
+    Args:
+        path: Path of the file to write
+        audio: Array of samples, (frames,) or (frames, channels)
+        sample_rate: Sample rate in Hz
+        codec: "wav" or "flac"
+        chunk_samples: Number of frames converted and written per step
+    """
+    audio = np.asarray(audio)
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    if codec == "wav":
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            for chunk in iter_int16_chunks(audio, chunk_samples):
+                wf.writeframesraw(np.ascontiguousarray(chunk).astype("<i2", copy=False).data)
+    elif codec == "flac":
+        # Imported here so the app starts without loading libsndfile
+        import soundfile as sf
+        with sf.SoundFile(path, mode="w", samplerate=sample_rate, channels=channels,
+                          format="FLAC", subtype="PCM_16") as sound_file:
+            for chunk in iter_int16_chunks(audio, chunk_samples):
+                sound_file.write(chunk)
+    else:
+        raise ValueError(f"Unknown audio codec: {codec}")
+
+class MappedWav:
+    """
+    A 16-bit PCM WAV file whose samples are a memory-mapped NumPy view
+
+    Slicing samples reads only the pages that are touched, so playback
+    slices, analysis and export do not load the whole file. The view is
+    read-only and stays valid until close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path}: not a WAV file")
+        try:
+            self.sample_rate, self.channels, offset, size = _parse_wav(self._map, path)
+            frames = size // (2 * self.channels)
+            self.samples = np.frombuffer(self._map, dtype="<i2", count=frames * self.channels,
+                                         offset=offset).reshape(frames, self.channels)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def frames(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def mono(self):
+        """Samples of the first channel (a view for mono files)"""
+        return self.samples[:, 0]
+
+    def close(self):
+        self.samples = None
+        if getattr(self, "_map", None) is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A caller still holds a view; the map is released with it
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _parse_wav(data, path):
+    """
+    Find the format and data chunk of a RIFF/WAVE file
+
+    Returns:
+        tuple: (sample rate, channels, data offset, data size in bytes)
+
+    Raises:
+        ValueError: If the file is not 16-bit PCM WAV
+    """
+    if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError(f"{path}: not a WAV file")
+    position = 12
+    fmt = None
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        chunk_size = struct.unpack_from("<I", data, position + 4)[0]
+        body = position + 8
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                format_tag = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError(f"{path}: data chunk before fmt chunk")
+            format_tag, channels, sample_rate, bits = fmt
+            if format_tag != WAVE_FORMAT_PCM or bits != 16:
+                raise ValueError(f"{path}: only 16-bit PCM WAV can be memory-mapped")
+            # A take that was cut off may claim more data than the file holds
+            return sample_rate, channels, body, min(chunk_size, len(data) - body)
+        # Chunks are padded to an even size
+        position = body + chunk_size + (chunk_size & 1)
+    raise ValueError(f"{path}: no data chunk")
+
+def open_audio(path, codec=None):
+    """
+    Open an audio file for reading int16 samples with as little copying as possible
+
+    WAV files are memory-mapped; other formats (FLAC) are decoded into
+    memory, since their samples are compressed.
+
+    Args:
+        path: Path of a WAV or FLAC file
+        codec: "wav" or "flac"; taken from the file extension if not given,
+            for files written under a temporary name such as .part
+
+    Returns:
+        MappedWav or DecodedAudio: Object with samples (frames, channels),
+            sample_rate, channels, frames, duration, mono() and close()
+    """
+    if codec is None:
+        codec = "wav" if os.path.splitext(path)[1].lower() == ".wav" else None
+    if codec == "wav":
+        try:
+            return MappedWav(path)
+        except ValueError as e:
+            logger.debug(f"Falling back to decoding: {e}")
+    return DecodedAudio(path)
+
+class DecodedAudio:
+    """Decoded int16 samples of a file that cannot be memory-mapped, with the MappedWav interface"""
+
+    def __init__(self, path):
+        import soundfile as sf
+
+        self.path = path
+        self.samples, self.sample_rate = sf.read(path, dtype="int16", always_2d=True)
+        self.channels = self.samples.shape[1]
+
+    @property
+    def frames(self):
+        return len(self.samples)
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def mono(self):
+        return self.samples[:, 0]
+
+    def close(self):
+        self.samples = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,86 @@
+import hashlib
+import os
+import re
+
+# Recordings are spread over two levels of shard directories named by two
+# hex digits (audio_files/ab/cd/<name>), so no directory grows past a few
+# thousand entries. Files written before sharding sit directly in the
+# audio directory and are still found.
+SHARD_PATTERN = re.compile(r"^[0-9a-f]{2}$")
+
+def shard_of(filename):
+    """
+    Shard directories of an audio file name, such as "ab/cd"
+
+    The shard is taken from a hash of the name without its extension, so a
+    recording keeps its shard when it is converted to another codec.
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    digest = hashlib.blake2b(stem.encode("utf-8"), digest_size=2).hexdigest()
+    return f"{digest[:2]}/{digest[2:]}"
+
+def audio_name(filename):
+    """Name of an audio file relative to the audio directory, as stored in the dataset"""
+    return f"{shard_of(filename)}/{os.path.basename(filename)}"
+
+def audio_path(audio_dir, name):
+    """Path of an audio file from its stored name (sharded or not)"""
+    return os.path.join(audio_dir, *name.split("/"))
+
+def sharded_path(audio_dir, filename):
+    """Path an audio file name gets in the sharded layout"""
+    return audio_path(audio_dir, audio_name(filename))
+
+def is_sharded(name):
+    """True if a stored audio name already points into a shard directory"""
+    parts = name.split("/")
+    return len(parts) == 3 and all(SHARD_PATTERN.match(part) for part in parts[:2])
+
+def split_audio_path(path):
+    """
+    Split the path of an audio file into the audio directory and the stored name
+
+    Args:
+        path: Path of a file in the audio directory or in one of its shards
+
+    Returns:
+        tuple: (audio directory, name relative to it with "/" separators)
+    """
+    directory, filename = os.path.split(path)
+    outer, inner = os.path.split(directory)
+    root, top = os.path.split(outer)
+    if SHARD_PATTERN.match(top) and SHARD_PATTERN.match(inner):
+        return root or ".", f"{top}/{inner}/{filename}"
+    return directory or ".", filename
+
+def iter_audio_files(audio_dir, extensions=None):
+    """
+    Find the WAV and FLAC files in an audio directory and its shards
+
+    Args:
+        audio_dir: Directory containing the audio files
+        extensions: File extensions to look for instead of the audio codecs, such as (".part",)
+
+    Yields:
+        tuple: (stored name, os.DirEntry) of each file
+    """
+    from voice_recorder.audio_handlers.audio_processor import AUDIO_CODECS
+
+    extensions = tuple(extensions or AUDIO_CODECS.values())
+
+    def is_audio(entry):
+        return entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+
+    with os.scandir(audio_dir) as entries:
+        top_level = list(entries)
+    for entry in top_level:
+        if is_audio(entry):
+            yield entry.name, entry
+        elif entry.is_dir() and SHARD_PATTERN.match(entry.name):
+            with os.scandir(entry.path) as inner_entries:
+                shards = [inner for inner in inner_entries if inner.is_dir() and SHARD_PATTERN.match(inner.name)]
+            for shard in shards:
+                with os.scandir(shard.path) as files:
+                    for file_entry in files:
+                        if is_audio(file_entry):
+                            yield f"{entry.name}/{shard.name}/{file_entry.name}", file_entry
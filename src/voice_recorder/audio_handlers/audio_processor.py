@@ -1,56 +1,132 @@
-import wave
+import io
 import numpy as np
 import os
 import logging
+import secrets
 from datetime import datetime
 
+from voice_recorder.audio_handlers import audio_index, audio_io
+from voice_recorder.audio_handlers.audio_layout import sharded_path
+
 logger = logging.getLogger(__name__)
 
-def save_audio(audio_data, sample_rate, file_path):
+# Storage codecs for recordings and the file extension each one uses
+AUDIO_CODECS = {"wav": ".wav", "flac": ".flac"}
+
+def codec_for_path(file_path):
+    """Pick the storage codec from a file extension, defaulting to WAV"""
+    extension = os.path.splitext(file_path)[1].lower()
+    for codec, codec_extension in AUDIO_CODECS.items():
+        if extension == codec_extension:
+            return codec
+    return "wav"
+
+def save_audio(audio_data, sample_rate, file_path, codec=None, trim=False):
     """
-    Save audio data as a WAV file
+    Save audio data as a 16-bit mono WAV or FLAC file
     
     Args:
         audio_data: NumPy array of audio data
         sample_rate: Sample rate of audio (Hz)
-        file_path: Path to save the WAV file
+        file_path: Path to save the audio file
+        codec: "wav" or "flac"; taken from the file extension if not given
+        trim: Remove leading and trailing silence before writing
     
     Returns:
         bool: True if successful, False otherwise
     """
+    codec = codec or codec_for_path(file_path)
     try:
-        # Ensure the audio is in float32 format and normalize if needed
-        audio_data = np.array(audio_data, dtype=np.float32)
+        # Float32 input is used as is; other types are converted once
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        if trim:
+            from voice_recorder.audio_handlers.vad import trim_silence
+            audio_data = trim_silence(audio_data, sample_rate)
         
-        # Convert from float32 to int16 for WAV file
-        audio_data_int = (audio_data * 32767).astype(np.int16)
-        
-        # Create WAV file
-        with wave.open(file_path, 'wb') as wf:
-            wf.setnchannels(1)  # Mono
-            wf.setsampwidth(2)  # 16-bit
-            wf.setframerate(sample_rate)
-            wf.writeframes(audio_data_int.tobytes())
+        # Converted to int16 and written in chunks, so no full-size copy is made
+        audio_io.write_audio(file_path, audio_data, sample_rate, codec)
         logger.info(f"Successfully saved audio to {file_path}")
+        audio_index.record_file(file_path)
         return True
     except Exception as e:
         logger.error(f"Error saving audio to {file_path}: {e}")
         return False
 
+def transcode_audio(data, codec):
+    """
+    Re-encode audio file bytes with another storage codec, losslessly
+    
+    Args:
+        data: Bytes of a WAV or FLAC file
+        codec: Target codec ("wav" or "flac")
+        
+    Returns:
+        bytes: The audio encoded with the target codec
+    """
+    import soundfile as sf
+    
+    audio, sample_rate = sf.read(io.BytesIO(data), dtype="int16")
+    output = io.BytesIO()
+    sf.write(output, audio, sample_rate, format=codec.upper(), subtype="PCM_16")
+    return output.getvalue()
+
+def convert_audio_file(source_path, target_path, codec):
+    """
+    Convert an audio file to another storage codec and check the result
+    
+    The converted file is written under a temporary name and read back; it
+    is only moved into place if its samples match the source exactly.
+    
+    Args:
+        source_path: Path of the existing WAV or FLAC file
+        target_path: Path of the file to write
+        codec: Target codec ("wav" or "flac")
+        
+    Returns:
+        tuple: (source size in bytes, target size in bytes)
+        
+    Raises:
+        ValueError: If the converted audio does not match the source
+    """
+    tmp_path = f"{target_path}.tmp"
+    try:
+        # WAV files are memory-mapped rather than read into memory
+        with audio_io.open_audio(source_path) as source:
+            audio_io.write_audio(tmp_path, source.samples, source.sample_rate, codec)
+            with audio_io.open_audio(tmp_path) as converted:
+                if (converted.sample_rate != source.sample_rate
+                        or not np.array_equal(converted.samples, source.samples)):
+                    raise ValueError(f"Converted audio in {target_path} does not match {source_path}")
+        os.replace(tmp_path, target_path)
+        audio_index.record_file(target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return os.path.getsize(source_path), os.path.getsize(target_path)
+
 def create_unique_filename(directory, prefix="audio_", extension=".wav"):
     """
-    Create a unique filename based on timestamp
+    Create a unique filename in the sharded layout of an audio directory
+    
+    The name is a timestamp followed by 48 random bits, so takes saved in the
+    same second, or by two sessions at once, never get the same name. The
+    shard directories are created if needed.
     
     Args:
-        directory: Directory to save the file
+        directory: Audio directory to save the file in
         prefix: Prefix for the filename
         extension: File extension
         
     Returns:
-        str: Full path to the new file
+        str: Full path to the new file (directory/ab/cd/<name>)
     """
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return os.path.join(directory, f"{prefix}{timestamp}{extension}")
+    while True:
+        file_path = sharded_path(directory, f"{prefix}{timestamp}_{secrets.token_hex(6)}{extension}")
+        if not os.path.exists(file_path) and not os.path.exists(f"{file_path}.part"):
+            break
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return file_path
 
 def delete_audio_file(audio_path):
     """
@@ -65,6 +141,7 @@ def delete_audio_file(audio_path):
     try:
         if os.path.exists(audio_path):
             os.remove(audio_path)
+            audio_index.remove_file(audio_path)
             logger.info(f"Deleted audio file: {audio_path}")
             return True
         else:
@@ -0,0 +1,187 @@
+import numpy as np
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from voice_recorder.audio_handlers import audio_io
+from voice_recorder.audio_handlers.audio_io import CHUNK_SAMPLES
+from voice_recorder.audio_handlers.audio_layout import iter_audio_files
+from voice_recorder.audio_handlers.vad import DEFAULT_THRESHOLD_DB, FRAME_MS, as_float, frame_energy_db
+
+logger = logging.getLogger(__name__)
+
+# Sidecar index of quality metrics, kept in the audio directory
+QUALITY_INDEX_FILE = ".quality_index.json"
+
+# Metrics stored for every file, in display order
+METRICS = ["duration", "voiced_seconds", "peak_dbfs", "rms_dbfs", "snr_db", "clipping_ratio"]
+
+# Takes outside these limits fail the quality check
+DEFAULT_THRESHOLDS = {
+    "max_clipping_ratio": 0.001,
+    "min_rms_dbfs": -40.0,
+    "min_snr_db": 15.0,
+    "min_voiced_seconds": 0.5,
+}
+
+def _db(value):
+    return float(20 * np.log10(max(float(value), 1e-10)))
+
+def analyze_audio(audio, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB):
+    """
+    Compute quality metrics of a take
+
+    SNR is estimated from frame energies, as the mean power of voiced frames
+    against the mean power of silent frames. It is None when the take has
+    no voiced or no silent frames, and the SNR check is then skipped.
+
+    Args:
+        audio: Array of int16 or float samples
+        sample_rate: Sample rate in Hz
+        threshold_db: Frame energy above which a frame counts as voiced
+
+    Returns:
+        dict: duration, voiced_seconds, peak_dbfs, rms_dbfs, snr_db and clipping_ratio
+    """
+    audio = np.asarray(audio)
+    if len(audio) == 0:
+        return {"duration": 0.0, "voiced_seconds": 0.0, "peak_dbfs": -200.0, "rms_dbfs": -200.0,
+                "snr_db": None, "clipping_ratio": 0.0}
+
+    # Level statistics are gathered a chunk at a time, so int16 input (such
+    # as a memory-mapped file) is never converted as a whole
+    peak, clipped, square_sum = 0.0, 0, 0.0
+    for start in range(0, len(audio), CHUNK_SAMPLES):
+        chunk = as_float(audio[start:start + CHUNK_SAMPLES])
+        magnitude = np.abs(chunk)
+        peak = max(peak, float(magnitude.max()))
+        clipped += int(np.count_nonzero(magnitude >= 32767 / 32768))
+        square_sum += float(np.dot(chunk.astype(np.float64), chunk))
+
+    energy_db = frame_energy_db(audio, sample_rate)
+    voiced = energy_db > threshold_db
+    power = np.power(10.0, energy_db / 10)
+    if voiced.any() and not voiced.all():
+        snr_db = float(10 * np.log10(power[voiced].mean() / max(power[~voiced].mean(), 1e-20)))
+    else:
+        snr_db = None
+
+    return {
+        "duration": len(audio) / sample_rate,
+        "voiced_seconds": int(voiced.sum()) * FRAME_MS / 1000,
+        "peak_dbfs": _db(peak),
+        "rms_dbfs": _db(np.sqrt(square_sum / len(audio))),
+        "snr_db": snr_db,
+        "clipping_ratio": clipped / len(audio),
+    }
+
+def analyze_file(path):
+    """Compute quality metrics of a WAV or FLAC file"""
+    with audio_io.open_audio(path) as audio:
+        return analyze_audio(audio.samples, audio.sample_rate)
+
+def _analyze(item):
+    """Analyze one file (runs in a worker process)"""
+    name, path = item
+    try:
+        return name, analyze_file(path), None
+    except Exception as e:
+        return name, None, f"{path}: {e!r}"
+
+def load_quality_index(audio_dir):
+    """
+    Load the quality metrics stored for an audio directory
+
+    Args:
+        audio_dir: Directory containing the audio files
+
+    Returns:
+        dict: Stored audio name -> {"mtime_ns", "size", and every name in METRICS}
+    """
+    try:
+        with open(os.path.join(audio_dir, QUALITY_INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def update_quality_index(audio_dir, workers=1):
+    """
+    Analyze audio files that are new or changed since the last run
+
+    A file is re-analyzed when its modification time or size differs from
+    the index; entries of deleted files are dropped.
+
+    Args:
+        audio_dir: Directory containing the audio files
+        workers: Number of worker processes
+
+    Returns:
+        dict: The updated index, as returned by load_quality_index
+    """
+    index = load_quality_index(audio_dir)
+    current, pending = {}, []
+    for name, entry in iter_audio_files(audio_dir):
+        stat = entry.stat()
+        old = index.get(name)
+        if old is not None and old["mtime_ns"] == stat.st_mtime_ns and old["size"] == stat.st_size:
+            current[name] = old
+        else:
+            current[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+            pending.append((name, entry.path))
+
+    if pending:
+        logger.info(f"Analyzing {len(pending)} new or changed audio files with {workers} workers")
+        if workers > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_analyze, pending, chunksize=max(1, len(pending) // (workers * 4))))
+        else:
+            results = [_analyze(item) for item in pending]
+        for name, metrics, error in results:
+            if error:
+                logger.warning(f"Could not analyze {error}")
+                del current[name]
+            else:
+                current[name].update(metrics)
+
+    if pending or len(current) != len(index):
+        save_quality_index(audio_dir, current)
+    return current
+
+def save_quality_index(audio_dir, index):
+    """
+    Write the quality metrics of an audio directory atomically
+
+    Args:
+        audio_dir: Directory containing the audio files
+        index: Dict as returned by load_quality_index
+    """
+    path = os.path.join(audio_dir, QUALITY_INDEX_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+def failed_checks(metrics, thresholds=None):
+    """
+    List the quality checks a take fails
+
+    Args:
+        metrics: Metrics of one file, as stored in the index
+        thresholds: Limits to check, DEFAULT_THRESHOLDS if not given
+
+    Returns:
+        list: Names of the failed checks, empty if the take passes
+    """
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    failed = []
+    for name, limit in thresholds.items():
+        if limit is None:
+            continue
+        bound, metric = name.split("_", 1)
+        value = metrics.get(metric)
+        if value is None:
+            continue
+        if (bound == "max" and value > limit) or (bound == "min" and value < limit):
+            failed.append(name)
+    return failed
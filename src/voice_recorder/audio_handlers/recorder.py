@@ -1,48 +1,263 @@
-import streamlit as st
-import sounddevice as sd
-import time
+import numpy as np
 import logging
+import os
+import threading
+import time
+
+from voice_recorder.audio_handlers import audio_index, audio_io
+from voice_recorder.audio_handlers.audio_layout import iter_audio_files
 
 logger = logging.getLogger(__name__)
 
-def record_audio(duration, sample_rate=24000):
+# Audio buffered between the input callback and the file writer
+DEFAULT_BUFFER_SECONDS = 10
+
+# A .part file not written to for this long belongs to an abandoned take
+STALE_PART_SECONDS = 300
+
+# .part files of the takes being recorded by this process
+_active_parts = set()
+
+def remove_stale_parts(audio_dir, max_age=STALE_PART_SECONDS):
     """
-    Record audio for a specified duration
-    
+    Remove the .part files left behind by takes that were never stopped
+
+    A take abandoned by leaving the record page, or by a crash, keeps its
+    .part file. Files of takes still recording in this process are kept, as
+    are files written to within max_age seconds, which may belong to another
+    session.
+
     Args:
-        duration: Duration in seconds
-        sample_rate: Sample rate in Hz
-        
+        audio_dir: Directory containing the audio files
+        max_age: Seconds since the last write after which a .part file is removed
+
     Returns:
-        audio_data: NumPy array of recorded audio
+        int: Number of files removed
     """
-    logger.info(f"Recording audio for {duration} seconds at {sample_rate}Hz")
-    
-    # Record audio using sounddevice
-    audio_data = sd.rec(
-        int(duration * sample_rate),
-        samplerate=sample_rate,
-        channels=1,
-        dtype='float32'
-    )
-    
-    # Create a progress bar
-    progress_bar = st.progress(0)
-    start_time = time.time()
-    
-    # Update progress bar
-    while (time.time() - start_time) < duration:
-        # Calculate progress percentage
-        elapsed_time = time.time() - start_time
-        progress = min(int((elapsed_time / duration) * 100), 100)
-        progress_bar.progress(progress)
-        time.sleep(0.1)  # Small sleep to avoid busy-waiting
-    
-    # Complete progress bar
-    progress_bar.progress(100)
-    
-    # Wait for recording to complete
-    sd.wait()
-    
-    logger.info("Recording finished")
-    return audio_data.flatten() 
\ No newline at end of file
+    if not os.path.isdir(audio_dir):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name, entry in iter_audio_files(audio_dir, extensions=(".part",)):
+        if os.path.abspath(entry.path) in _active_parts:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    if removed:
+        logger.info(f"Removed {removed} abandoned .part files from {audio_dir}")
+    return removed
+
+class RingBuffer:
+    """
+    Fixed-size single-producer, single-consumer buffer of float32 samples
+
+    The audio callback writes into it and the writer thread reads from it,
+    so memory use is set by the capacity rather than by the take length.
+    """
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._capacity = capacity
+        self._read = 0
+        self._write = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._write - self._read
+
+    def write(self, samples):
+        """Append samples, dropping the ones that do not fit (never blocks)"""
+        with self._lock:
+            free = self._capacity - (self._write - self._read)
+            if len(samples) > free:
+                self.dropped += len(samples) - free
+                samples = samples[:free]
+            start = self._write % self._capacity
+            first = min(len(samples), self._capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:len(samples) - first] = samples[first:]
+            self._write += len(samples)
+
+    def read(self, max_samples=None):
+        """Remove and return up to max_samples of the oldest samples"""
+        with self._lock:
+            available = self._write - self._read
+            count = available if max_samples is None else min(available, max_samples)
+            start = self._read % self._capacity
+            first = min(count, self._capacity - start)
+            samples = np.concatenate([self._data[start:start + first], self._data[:count - first]])
+            self._read += count
+            return samples
+
+class StreamingRecorder:
+    """
+    Record from the default input device straight into an audio file
+
+    An input stream callback feeds a ring buffer, and a background thread
+    drains it into a 16-bit WAV or FLAC file as the take goes on. The
+    recording runs until stop() is called, max_duration is reached or,
+    with stop_on_silence, the speaker has been silent for that long. It
+    does not block the caller. The file is written under a .part name and
+    only moved to file_path by stop().
+    """
+
+    def __init__(self, file_path, sample_rate=24000, codec=None, max_duration=None,
+                 buffer_seconds=DEFAULT_BUFFER_SECONDS, stop_on_silence=None, trim=False):
+        """
+        Args:
+            file_path: Path of the audio file to write
+            sample_rate: Sample rate in Hz
+            codec: "wav" or "flac"; taken from the file extension if not given
+            max_duration: Stop writing after this many seconds, None for no limit
+            buffer_seconds: Capacity of the ring buffer in seconds
+            stop_on_silence: Stop after this many seconds of silence following speech, None to disable
+            trim: Trim leading and trailing silence from the file when the take is stopped
+        """
+        from voice_recorder.audio_handlers.audio_processor import codec_for_path
+        from voice_recorder.audio_handlers.vad import SilenceDetector
+
+        self.file_path = file_path
+        self.sample_rate = sample_rate
+        self.codec = codec or codec_for_path(file_path)
+        self.max_frames = int(max_duration * sample_rate) if max_duration else None
+        self.frames_written = 0
+        self.trim = trim
+        self._silence = SilenceDetector(sample_rate, stop_after=stop_on_silence) if stop_on_silence else None
+        self.error = None
+        self._buffer = RingBuffer(int(buffer_seconds * sample_rate))
+        self._stopping = threading.Event()
+        self._stream = None
+        self._writer = None
+        self._started_at = None
+        self._finished = False
+
+    @property
+    def part_path(self):
+        return f"{self.file_path}.part"
+
+    @property
+    def elapsed(self):
+        """Seconds since the recording started"""
+        return time.monotonic() - self._started_at if self._started_at else 0.0
+
+    @property
+    def duration(self):
+        """Seconds of audio written to the file so far"""
+        return self.frames_written / self.sample_rate
+
+    @property
+    def active(self):
+        """True while the writer thread is still running"""
+        return self._writer is not None and self._writer.is_alive()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            logger.warning(f"Input stream status: {status}")
+        self._buffer.write(indata[:, 0])
+
+    def _write_loop(self, sound_file):
+        try:
+            while True:
+                stopping = self._stopping.is_set()
+                samples = self._buffer.read()
+                if self.max_frames is not None:
+                    samples = samples[:self.max_frames - self.frames_written]
+                if len(samples):
+                    sound_file.write(audio_io.float_to_int16(samples))
+                    self.frames_written += len(samples)
+                    if self._silence is not None and self._silence.update(samples):
+                        logger.info(f"Stopping after trailing silence at {self.duration:.1f}s")
+                        break
+                if self.max_frames is not None and self.frames_written >= self.max_frames:
+                    logger.info(f"Reached the maximum duration of {self.duration:.1f}s")
+                    break
+                if stopping:
+                    break
+                time.sleep(0.05)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error writing audio to {self.part_path}: {e}")
+        finally:
+            sound_file.close()
+
+    def start(self):
+        """Open the input stream and start writing"""
+        # Imported here so the app starts without loading PortAudio and libsndfile
+        import sounddevice as sd
+        import soundfile as sf
+
+        # The file is opened first so a failure anywhere below can close and remove it
+        sound_file = sf.SoundFile(self.part_path, mode="w", samplerate=self.sample_rate, channels=1,
+                                  format=self.codec.upper(), subtype="PCM_16")
+        _active_parts.add(os.path.abspath(self.part_path))
+        try:
+            self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype="float32",
+                                          callback=self._callback)
+            self._writer = threading.Thread(target=self._write_loop, args=(sound_file,), daemon=True)
+            self._started_at = time.monotonic()
+            self._writer.start()
+            self._stream.start()
+        except Exception:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+            self._stopping.set()
+            if self._writer is not None and self._writer.is_alive():
+                self._writer.join()
+            sound_file.close()
+            _active_parts.discard(os.path.abspath(self.part_path))
+            os.remove(self.part_path)
+            raise
+        logger.info(f"Recording to {self.file_path} at {self.sample_rate}Hz ({self.codec})")
+        return self
+
+    def stop(self):
+        """
+        Stop recording and finish the file
+
+        Returns:
+            bool: True if the take was written to file_path
+        """
+        if self._finished:
+            return os.path.exists(self.file_path)
+        self._finished = True
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        self._stopping.set()
+        if self._writer is not None:
+            self._writer.join()
+        _active_parts.discard(os.path.abspath(self.part_path))
+
+        if self._buffer.dropped:
+            logger.warning(f"Dropped {self._buffer.dropped} samples because the writer fell behind")
+        if self.error is not None or self.frames_written == 0 or not os.path.exists(self.part_path):
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            return False
+        if self.trim:
+            from voice_recorder.audio_handlers.vad import trim_file
+            # The .part name hides the format, so WAV takes would otherwise be decoded
+            # into memory; the finished file is indexed below under its real name
+            before, after, _ = trim_file(self.part_path, codec=self.codec, update_index=False)
+            if after < before:
+                logger.info(f"Trimmed {(before - after) / self.sample_rate:.1f}s of silence")
+                self.frames_written = after
+        os.replace(self.part_path, self.file_path)
+        audio_index.record_file(self.file_path)
+        logger.info(f"Recording finished: {self.duration:.1f}s written to {self.file_path}")
+        return True
+
+    def discard(self):
+        """Stop recording and remove the file"""
+        self.stop()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+            audio_index.remove_file(self.file_path)
@@ -0,0 +1,192 @@
+import numpy as np
+import logging
+import os
+
+from voice_recorder.audio_handlers import audio_index, audio_io
+from voice_recorder.audio_handlers.audio_io import CHUNK_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+# Length of the frames whose energy is compared against the threshold
+FRAME_MS = 30
+# Frames quieter than this (RMS, in dBFS) count as silence
+DEFAULT_THRESHOLD_DB = -45.0
+# Silence kept before the first and after the last voiced frame when trimming
+DEFAULT_PADDING_MS = 200
+# Trailing silence that stops a streaming recording
+DEFAULT_STOP_SILENCE_SECONDS = 2.0
+
+def as_float(audio):
+    """View int16 or float audio as float32 in [-1, 1]"""
+    audio = np.asarray(audio)
+    if np.issubdtype(audio.dtype, np.integer):
+        audio = audio.astype(np.float32) / 32768.0
+    else:
+        audio = audio.astype(np.float32, copy=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio
+
+def frame_energy_db(audio, sample_rate, frame_ms=FRAME_MS):
+    """
+    RMS energy of consecutive frames, in dBFS
+
+    Args:
+        audio: 1-D array of int16 or float samples (2-D arrays are mixed to mono)
+        sample_rate: Sample rate in Hz
+        frame_ms: Frame length in milliseconds; a trailing partial frame is ignored
+
+    Returns:
+        np.ndarray: One energy value per frame
+    """
+    audio = np.asarray(audio)
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    frame_count = len(audio) // frame_length
+    # Frames are converted a block at a time, so int16 input (such as a
+    # memory-mapped file) is never copied as a whole
+    block_frames = max(1, CHUNK_SAMPLES // frame_length)
+    power = np.empty(frame_count, dtype=np.float64)
+    for start in range(0, frame_count, block_frames):
+        stop = min(frame_count, start + block_frames)
+        frames = as_float(audio[start * frame_length:stop * frame_length]).reshape(-1, frame_length)
+        power[start:stop] = np.mean(np.square(frames, dtype=np.float64), axis=1)
+    return 20 * np.log10(np.maximum(np.sqrt(power), 1e-10))
+
+def voiced_bounds(audio, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB, padding_ms=DEFAULT_PADDING_MS,
+                  frame_ms=FRAME_MS):
+    """
+    Sample range from the first to the last voiced frame, with padding
+
+    Args:
+        audio: 1-D array of int16 or float samples
+        sample_rate: Sample rate in Hz
+        threshold_db: Frame energy above which a frame counts as voiced
+        padding_ms: Silence to keep on each side of the voiced range
+        frame_ms: Frame length in milliseconds
+
+    Returns:
+        tuple: (start, end) sample indices, or None if no frame is voiced
+    """
+    voiced = np.flatnonzero(frame_energy_db(audio, sample_rate, frame_ms) > threshold_db)
+    if len(voiced) == 0:
+        return None
+    # Padding is kept in whole frames so trimming a trimmed file changes nothing
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    padding_frames = int(round(padding_ms / frame_ms))
+    start = max(0, (voiced[0] - padding_frames) * frame_length)
+    end = min(len(audio), (voiced[-1] + 1 + padding_frames) * frame_length)
+    return int(start), int(end)
+
+def trim_silence(audio, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB, padding_ms=DEFAULT_PADDING_MS):
+    """
+    Remove leading and trailing silence
+
+    Audio without any voiced frame is returned unchanged, so a quiet take is
+    never trimmed away completely.
+
+    Args:
+        audio: Array of samples
+        sample_rate: Sample rate in Hz
+        threshold_db: Frame energy above which a frame counts as voiced
+        padding_ms: Silence to keep on each side of the voiced range
+
+    Returns:
+        np.ndarray: The trimmed audio (a view of the input)
+    """
+    bounds = voiced_bounds(audio, sample_rate, threshold_db, padding_ms)
+    if bounds is None:
+        logger.warning("No voice detected; keeping the audio untrimmed")
+        return audio
+    return audio[bounds[0]:bounds[1]]
+
+def trim_file(path, threshold_db=DEFAULT_THRESHOLD_DB, padding_ms=DEFAULT_PADDING_MS, dry_run=False, codec=None,
+              update_index=True):
+    """
+    Trim leading and trailing silence from a WAV or FLAC file in place
+
+    Args:
+        path: Path of the audio file
+        threshold_db: Frame energy above which a frame counts as voiced
+        padding_ms: Silence to keep on each side of the voiced range
+        dry_run: Only measure, do not rewrite the file
+        codec: "wav" or "flac"; taken from the file extension if not given
+        update_index: Refresh the file's audio index entry after rewriting it
+
+    Returns:
+        tuple: (frames before, frames after, sample rate)
+    """
+    # Imported here so the app starts without loading libsndfile
+    import soundfile as sf
+
+    info = sf.info(path)
+    tmp_path = f"{path}.tmp"
+    try:
+        # WAV files are memory-mapped, so only the kept range is copied
+        with audio_io.open_audio(path, codec) as audio:
+            sample_rate = audio.sample_rate
+            frames = audio.frames
+            bounds = voiced_bounds(audio.samples, sample_rate, threshold_db, padding_ms)
+            if bounds is None or bounds == (0, frames):
+                return frames, frames, sample_rate
+            if not dry_run:
+                sf.write(tmp_path, audio.samples[bounds[0]:bounds[1]], sample_rate,
+                         format=info.format, subtype=info.subtype)
+        if not dry_run:
+            os.replace(tmp_path, path)
+            if update_index:
+                audio_index.record_file(path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return frames, bounds[1] - bounds[0], sample_rate
+
+class SilenceDetector:
+    """
+    Track trailing silence in a stream of audio blocks
+
+    Silence only counts once voice has been heard, so a take does not stop
+    before the speaker starts.
+    """
+
+    def __init__(self, sample_rate, stop_after=DEFAULT_STOP_SILENCE_SECONDS, threshold_db=DEFAULT_THRESHOLD_DB,
+                 frame_ms=FRAME_MS):
+        """
+        Args:
+            sample_rate: Sample rate in Hz
+            stop_after: Seconds of trailing silence after which should_stop is True
+            threshold_db: Frame energy above which a frame counts as voiced
+            frame_ms: Frame length in milliseconds
+        """
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.frame_ms = frame_ms
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.stop_frames = int(stop_after * 1000 / frame_ms)
+        self.heard_voice = False
+        self.silent_frames = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    @property
+    def should_stop(self):
+        return self.heard_voice and self.silent_frames >= self.stop_frames
+
+    def update(self, samples):
+        """
+        Add a block of samples
+
+        Returns:
+            bool: True once the trailing silence is long enough to stop
+        """
+        audio = np.concatenate([self._pending, as_float(samples)])
+        frame_count = len(audio) // self.frame_length
+        self._pending = audio[frame_count * self.frame_length:]
+        if frame_count:
+            voiced = frame_energy_db(audio[:frame_count * self.frame_length], self.sample_rate,
+                                     self.frame_ms) > self.threshold_db
+            hits = np.flatnonzero(voiced)
+            if len(hits):
+                self.heard_voice = True
+                self.silent_frames = frame_count - 1 - hits[-1]
+            else:
+                self.silent_frames += frame_count
+        return self.should_stop
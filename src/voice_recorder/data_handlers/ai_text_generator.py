@@ -2,9 +2,34 @@ import logging
 import os
 import requests
 import json
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from voice_recorder.data_handlers import suggestion_cache
+from voice_recorder.data_handlers.text_index import normalize_text, text_hash
 
 logger = logging.getLogger(__name__)
 
+# API root; point it at a proxy or a local stub server with GEMINI_BASE_URL
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Requests in flight at once
+DEFAULT_CONCURRENCY = 4
+# Suggestions asked for per request; longer lists tend to come back cut off
+BATCH_SIZE = 20
+# Seconds to wait for one response
+REQUEST_TIMEOUT = 60
+# Attempts for rate-limited (429) and failed (5xx) requests, with exponential backoff
+MAX_RETRIES = 3
+
+# Pooled sessions shared by every generation in this process, by pool size
+_sessions = {}
+_sessions_lock = threading.Lock()
+
 def estimate_character_count(speech_duration, language="English"):
     """
     Estimate the appropriate character count for a given speech duration
@@ -48,11 +73,215 @@ def estimate_character_count(speech_duration, language="English"):
     logger.info(f"Estimated {min_length}-{max_length} characters for {speech_duration}s of speech in {language}")
     return min_length, max_length
 
+def get_session(pool_size=DEFAULT_CONCURRENCY):
+    """
+    HTTP session with a connection pool and retries, shared within the process
+    
+    Connections are kept alive between requests, and 429 and 5xx responses
+    are retried with exponential backoff (honouring Retry-After).
+    
+    Args:
+        pool_size: Connections kept open per host
+        
+    Returns:
+        requests.Session: The shared session
+    """
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            retry = Retry(total=MAX_RETRIES, backoff_factor=1.0, status_forcelist=[429, 500, 502, 503, 504],
+                          allowed_methods=frozenset({"POST"}), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Content-Type"] = "application/json"
+            _sessions[pool_size] = session
+        return session
+
+def _build_prompt(count, language, min_length, max_length, speech_duration=None, domain=None, context=None):
+    """Prompt asking for count sentences as a JSON array"""
+    # Create domain-specific text if provided
+    domain_text = ""
+    if domain:
+        domain_text = f"The sentences should be related to the domain or topic of '{domain}'. "
+        
+    # Add context if provided
+    context_text = ""
+    if context:
+        context_text = f"Consider this specific context or requirement: '{context}'. "
+    
+    return f"""Generate {count} natural-sounding sentences in {language} that would be good for 
+        voice recording samples. Each sentence should be between {min_length} and {max_length} characters, 
+        be conversational, clear, and engaging.
+        {domain_text}
+        {context_text}
+        These sentences should take approximately {speech_duration if speech_duration else 'unknown'} seconds to read aloud.
+        Make them sound natural, as if spoken by a real person.
+        
+        Format the output as a JSON array of strings, with no additional text or explanation.
+        Example format: ["First sentence here", "Second sentence here", "Third sentence here"]
+        """
+
+def _parse_suggestions(text):
+    """
+    Extract the sentences from the text of a response
+    
+    Args:
+        text: Model output, ideally a JSON array of strings
+        
+    Returns:
+        list: Candidate sentences, not yet checked for length
+    """
+    # Extract just the JSON array part if needed
+    if '[' in text and ']' in text:
+        json_str = text[text.find('['):text.rfind(']') + 1]
+    else:
+        json_str = text
+    try:
+        suggestions = json.loads(json_str)
+        if isinstance(suggestions, list):
+            return [s.strip() for s in suggestions if isinstance(s, str)]
+    except json.JSONDecodeError as e:
+        logger.warning(f"Failed to parse JSON from Gemini response: {e}")
+    # Fall back to splitting the text into sentences
+    return [s.strip() for s in text.split('.') if s.strip()]
+
+def _request_suggestions(session, url, api_key, prompt, seed):
+    """
+    Send one generation request (runs in a worker thread)
+    
+    Returns:
+        list: Candidate sentences from the response
+        
+    Raises:
+        requests.RequestException: If the request failed after retries
+    """
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": 0.7,
+            "topP": 0.95,
+            "topK": 40,
+            # A different seed per request keeps parallel batches from repeating each other
+            "seed": seed
+        }
+    }
+    response = session.post(url, headers={"x-goog-api-key": api_key}, data=json.dumps(payload),
+                             timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    candidates = response.json().get("candidates") or []
+    if not candidates:
+        return []
+    parts = candidates[0].get("content", {}).get("parts") or []
+    return _parse_suggestions("".join(part.get("text", "") for part in parts))
+
+def generate_suggestions(api_key, count, language="English", min_length=32, max_length=140, speech_duration=None,
+                         domain=None, context=None, concurrency=DEFAULT_CONCURRENCY, batch_size=BATCH_SIZE,
+                         base_url=None, exclude=None, exclude_hashes=None, reject=None, max_requests=None,
+                         session=None):
+    """
+    Generate count valid, unique text suggestions with concurrent Gemini requests
+    
+    Requests asking for batch_size sentences each are kept in flight, at most
+    concurrency at a time, until count sentences within the length bounds
+    and distinct from each other (and from exclude, after normalizing case
+    and whitespace) have been collected. Generation stops early after
+    max_requests requests or on an error that retrying cannot fix, such as
+    an invalid API key.
+    
+    Args:
+        api_key: Gemini API key
+        count: Number of suggestions wanted
+        language: Target language for the suggestions
+        min_length: Minimum text length
+        max_length: Maximum text length
+        speech_duration: Target speech duration in seconds, used in the prompt
+        domain: Domain or topic for the suggestions
+        context: Additional context or specific requirements for the suggestions
+        concurrency: Maximum number of requests in flight
+        batch_size: Suggestions asked for per request
+        base_url: API root, GEMINI_BASE_URL if not given
+        exclude: Texts that must not be suggested
+        exclude_hashes: text_index hashes of texts that must not be suggested, such as the dataset's
+        reject: Callable returning True for other texts to leave out, such as near-duplicates;
+            it is called once for each suggestion that passes every other check
+        max_requests: Upper bound on requests sent, by default four times the number needed
+        session: requests.Session to use instead of the shared pooled one
+        
+    Returns:
+        list: Up to count suggestions, in the order they arrived
+    """
+    url = f"{(base_url or GEMINI_BASE_URL).rstrip('/')}/v1beta/models/{GEMINI_MODEL}:generateContent"
+    session = session or get_session(concurrency)
+    if max_requests is None:
+        max_requests = 4 * max(1, -(-count // batch_size))
+    prompt = _build_prompt(batch_size, language, min_length, max_length, speech_duration, domain, context)
+    excluded = {normalize_text(text) for text in exclude or ()}
+    excluded_hashes = exclude_hashes or set()
+    # Seeds start at a random point so repeated generations do not repeat each other
+    first_seed = random.randrange(2 ** 31 - 2 ** 16)
+    found = {}
+    sent = failed = 0
+    stop = False
+    
+    logger.info(f"Requesting {count} text suggestions from Gemini API in {language}"
+                + (f" for domain '{domain}'" if domain else "") + f" ({concurrency} concurrent requests)")
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    pending = set()
+    try:
+        while True:
+            missing = count - len(found)
+            # Keep just enough requests in flight for the suggestions still missing
+            while (missing > 0 and not stop and sent < max_requests and len(pending) < concurrency
+                   and len(pending) * batch_size < missing):
+                pending.add(pool.submit(_request_suggestions, session, url, api_key, prompt, first_seed + sent))
+                sent += 1
+            if missing <= 0 or not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    suggestions = future.result()
+                except requests.HTTPError as e:
+                    failed += 1
+                    status = e.response.status_code
+                    logger.error(f"Gemini API request failed: {status} - {e.response.text[:500]}")
+                    # Client errors other than rate limiting will not go away by retrying
+                    if 400 <= status < 500 and status != 429:
+                        stop = True
+                    continue
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Gemini API request failed: {e}")
+                    continue
+                for suggestion in suggestions:
+                    key = normalize_text(suggestion)
+                    if (min_length <= len(suggestion) <= max_length and key not in found and key not in excluded
+                            and text_hash(suggestion) not in excluded_hashes
+                            and not (reject is not None and reject(suggestion))):
+                        found[key] = suggestion
+    finally:
+        # Responses still in flight are not needed any more
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    suggestions = list(found.values())[:count]
+    if len(suggestions) < count:
+        logger.warning(f"Got {len(suggestions)} of {count} text suggestions after {sent} requests ({failed} failed)")
+    else:
+        logger.info(f"Generated {len(suggestions)} valid text suggestions with {sent} requests")
+    return suggestions
+
 def generate_text_suggestions(api_key, language="English", count=3, min_length=32, max_length=140, 
-                             speech_duration=None, domain=None, context=None):
+                             speech_duration=None, domain=None, context=None, concurrency=DEFAULT_CONCURRENCY,
+                             base_url=None, exclude_hashes=None, reject=None, cache_path=None, refresh=False):
     """
     Generate text suggestions using Google's Gemini API
     
+    With a cache, suggestions generated earlier for the same settings are
+    served first, without any API call when there are enough of them; only
+    the shortfall is generated, and new suggestions are added to the cache.
+    
     Args:
         api_key: Gemini API key
         language: Target language for the suggestions
@@ -62,6 +291,12 @@ def generate_text_suggestions(api_key, language="English", count=3, min_length=3
         speech_duration: Target speech duration in seconds (overrides min/max length if provided)
         domain: Domain or topic for the suggestions (e.g., "technology", "cooking", "healthcare")
         context: Additional context or specific requirements for the suggestions
+        concurrency: Maximum number of requests in flight
+        base_url: API root, GEMINI_BASE_URL if not given
+        exclude_hashes: text_index hashes of texts already in the dataset, never suggested
+        reject: Callable returning True for other texts never to suggest, such as near-duplicates
+        cache_path: Path of the suggestion cache, None to always call the API
+        refresh: Generate count new suggestions even if cached ones are available
         
     Returns:
         list: List of suggested texts, empty list if error
@@ -75,99 +310,29 @@ def generate_text_suggestions(api_key, language="English", count=3, min_length=3
         min_length = max(32, min(min_length, 140))
         max_length = max(32, min(max_length, 140))
         
-        # Endpoint for Gemini Pro API
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        
-        # Add API key as query parameter
-        url = f"{url}?key={api_key}"
-        
-        # Create domain-specific text if provided
-        domain_text = ""
-        if domain:
-            domain_text = f"The sentences should be related to the domain or topic of '{domain}'. "
-            
-        # Add context if provided
-        context_text = ""
-        if context:
-            context_text = f"Consider this specific context or requirement: '{context}'. "
-        
-        # Create prompt
-        prompt = f"""Generate {count} natural-sounding sentences in {language} that would be good for 
-        voice recording samples. Each sentence should be between {min_length} and {max_length} characters, 
-        be conversational, clear, and engaging.
-        {domain_text}
-        {context_text}
-        These sentences should take approximately {speech_duration if speech_duration else 'unknown'} seconds to read aloud.
-        Make them sound natural, as if spoken by a real person.
-        
-        Format the output as a JSON array of strings, with no additional text or explanation.
-        Example format: ["First sentence here", "Second sentence here", "Third sentence here"]
-        """
-        
-        # Prepare request payload
-        payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {
-                            "text": prompt
-                        }
-                    ]
-                }
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "topP": 0.95,
-                "topK": 40
-            }
-        }
-        
-        # Make API request
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        logger.info(f"Requesting text suggestions from Gemini API in {language}" + 
-                  (f" for domain '{domain}'" if domain else ""))
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        
-        # Check for successful response
-        if response.status_code == 200:
-            response_data = response.json()
-            
-            # Extract text from response
-            if 'candidates' in response_data and len(response_data['candidates']) > 0:
-                text = response_data['candidates'][0]['content']['parts'][0]['text']
-                
-                # Try to parse JSON array from response
-                try:
-                    # Extract just the JSON array part if needed
-                    if '[' in text and ']' in text:
-                        start_idx = text.find('[')
-                        end_idx = text.rfind(']') + 1
-                        json_str = text[start_idx:end_idx]
-                    else:
-                        json_str = text
-                        
-                    suggestions = json.loads(json_str)
-                    
-                    # Ensure suggestions are within length constraints
-                    valid_suggestions = [s for s in suggestions 
-                                        if isinstance(s, str) and min_length <= len(s) <= max_length]
-                    
-                    logger.info(f"Generated {len(valid_suggestions)} valid text suggestions")
-                    return valid_suggestions
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse JSON from Gemini response: {e}")
-                    # Try to extract sentences directly if JSON parsing fails
-                    sentences = [s.strip() for s in text.split('.') 
-                                if min_length <= len(s.strip()) <= max_length]
-                    return sentences[:count]
-            
-        # Log error if request failed
-        logger.error(f"Gemini API request failed: {response.status_code} - {response.text}")
-        return []
+        cache_params = {"model": GEMINI_MODEL, "language": language, "domain": domain, "context": context,
+                        "min_length": min_length, "max_length": max_length, "speech_duration": speech_duration}
+        cached = []
+        if cache_path:
+            try:
+                cached = suggestion_cache.lookup(cache_path, cache_params, count, exclude_hashes,
+                                                 reject=reject, count_stats=not refresh)
+            except Exception as e:
+                logger.warning(f"Could not read the suggestion cache: {e}")
+            if len(cached) >= count and not refresh:
+                logger.info(f"Serving {count} text suggestions from the cache")
+                return cached[:count]
         
+        needed = count if refresh else count - len(cached)
+        suggestions = generate_suggestions(api_key, needed, language, min_length, max_length, speech_duration, domain,
+                                           context, concurrency=concurrency, base_url=base_url, exclude=cached,
+                                           exclude_hashes=exclude_hashes, reject=reject)
+        if cache_path and suggestions:
+            try:
+                suggestion_cache.store(cache_path, cache_params, suggestions)
+            except Exception as e:
+                logger.warning(f"Could not update the suggestion cache: {e}")
+        return suggestions if refresh else cached + suggestions
     except Exception as e:
         logger.error(f"Error generating text suggestions: {e}", exc_info=True)
-        return [] 
\ No newline at end of file
+        return []
@@ -1,37 +1,161 @@
 import pandas as pd
+import itertools
 import logging
 import os
+import threading
 
+from voice_recorder.audio_handlers import audio_index
+from voice_recorder.audio_handlers.audio_layout import split_audio_path
 from voice_recorder.audio_handlers.audio_processor import delete_audio_file
+from voice_recorder.data_handlers import journal, near_duplicates, recording_order, sqlite_store, text_index
+from voice_recorder.utils.common import AUDIO_DIR
 
 logger = logging.getLogger(__name__)
 
+# The cache hands out shallow views and is updated in place; copy-on-write
+# keeps those views independent of each other. It is complete from pandas
+# 2.2 (the minimum in requirements.txt) and always on from pandas 3.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Parsed datasets shared by every session in this process: path -> (signature, DataFrame)
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Entries this process committed to each cached dataset since it was read
+# from disk: path -> (generation, sequence number of the first entry, entries)
+_changes = {}
+_generations = itertools.count()
+# Entries kept per dataset; readers that fall further behind reload instead
+CHANGE_LOG_SIZE = 10000
+
+def _file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _signature(csv_path):
+    """Signature of every file that makes up a dataset, used to validate the cache"""
+    if sqlite_store.is_sqlite_path(csv_path):
+        paths = (csv_path, f"{csv_path}-wal")
+    else:
+        paths = (csv_path, journal.compacting_path(csv_path), journal.journal_path(csv_path))
+    return tuple(_file_signature(path) for path in paths)
+
+def dataset_signature(csv_path):
+    """Signature of the dataset files, which changes whenever the dataset is written"""
+    return _signature(csv_path)
+
+def _cache_key(csv_path):
+    return os.path.abspath(csv_path)
+
+def invalidate_cache(csv_path=None):
+    """
+    Drop cached data for one dataset, or for all datasets
+    
+    Args:
+        csv_path: Path to the dataset, or None to clear the whole cache
+    """
+    with _cache_lock:
+        if csv_path is None:
+            _cache.clear()
+            _changes.clear()
+        else:
+            _cache.pop(_cache_key(csv_path), None)
+            _changes.pop(_cache_key(csv_path), None)
+
+def _ensure_sqlite(db_path):
+    """
+    Import the sibling CSV (data/data.csv for data/data.db) into a new database
+    
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    if os.path.exists(db_path):
+        return
+    csv_path = os.path.splitext(db_path)[0] + ".csv"
+    if os.path.exists(csv_path):
+        logger.info(f"Migrating {csv_path} into new database {db_path}")
+        sqlite_store.import_dataframe(db_path, load_data(csv_path))
+
 def load_data(csv_file):
     """
     Load existing data from CSV or create a new one
     
+    The CSV is a snapshot; changes made since it was last written live in
+    an append-only journal next to it and are replayed on top. Paths ending
+    in .db, .sqlite or .sqlite3 are read from a SQLite database instead.
+    
+    The parsed data is cached for the whole process and reused for as long
+    as the files on disk are unchanged. The returned DataFrame is a shallow
+    view of the cached copy; with copy-on-write, changing it in place copies
+    the affected columns and leaves the cache untouched.
+    
     Args:
         csv_file: Path to the CSV file
         
     Returns:
         pd.DataFrame: DataFrame with the loaded data
     """
+    key = _cache_key(csv_file)
+    with journal.lock:
+        signature = _signature(csv_file)
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1].copy(deep=False)
+        
+        df = _read_data(csv_file)
+        # Only cache successful loads of files that exist on disk
+        if signature[0] is None:
+            signature = _signature(csv_file)
+        if df is not None and signature[0] is not None:
+            with _cache_lock:
+                _cache[key] = (signature, df)
+                _changes[key] = (next(_generations), 0, [])
+    
+    if df is None:
+        return pd.DataFrame(columns=["text", "audio", "recorded"])
+    return df.copy(deep=False)
+
+def _read_data(csv_file):
+    """Read a dataset from disk, returning None if it could not be read"""
     try:
-        df = pd.read_csv(csv_file)
+        if sqlite_store.is_sqlite_path(csv_file):
+            _ensure_sqlite(csv_file)
+            df = sqlite_store.load_data(csv_file)
+            logger.info(f"Successfully loaded {len(df)} records from {csv_file}")
+            return df
+        
+        with journal.lock:
+            try:
+                df = pd.read_csv(csv_file)
+            except FileNotFoundError:
+                logger.warning(f"CSV file {csv_file} not found. Creating a new DataFrame.")
+                # Create a new DataFrame with required columns
+                df = pd.DataFrame(columns=["text", "audio", "recorded"])
+            entries = journal.read_entries(csv_file)
+        
+        df = journal.normalize_columns(df)
+        if entries:
+            df = journal.apply_entries(df, entries)
+            logger.info(f"Replayed {len(entries)} journal entries for {csv_file}")
         logger.info(f"Successfully loaded {len(df)} records from {csv_file}")
         return df
-    except FileNotFoundError:
-        logger.warning(f"CSV file {csv_file} not found. Creating a new DataFrame.")
-        # Create a new DataFrame with required columns
-        return pd.DataFrame(columns=["text", "audio", "recorded"])
     except Exception as e:
         logger.error(f"Error loading data from {csv_file}: {e}")
-        return pd.DataFrame(columns=["text", "audio", "recorded"])
+        return None
 
 def save_data(df, csv_path):
     """
     Save DataFrame to CSV
     
+    This rewrites the whole snapshot and drops the journal, so it is meant
+    for bulk changes; single-row changes should go through _commit.
+    
     Args:
         df: DataFrame to save
         csv_path: Path to save the CSV file
@@ -39,15 +163,173 @@ def save_data(df, csv_path):
     Returns:
         bool: True if save was successful, False otherwise
     """
+    invalidate_cache(csv_path)
+    text_index.discard(csv_path)
+    near_duplicates.discard(csv_path)
+    recording_order.discard(csv_path)
     try:
-        df.to_csv(csv_path, index=False)
+        if sqlite_store.is_sqlite_path(csv_path):
+            sqlite_store.import_dataframe(csv_path, df)
+            logger.info(f"Successfully saved DataFrame to {csv_path}")
+            return True
+        
+        with journal.lock:
+            df.to_csv(csv_path, index=False)
+            journal.discard(csv_path)
         logger.info(f"Successfully saved DataFrame to {csv_path}")
         return True
     except Exception as e:
         logger.error(f"Error saving DataFrame to {csv_path}: {e}")
         return False
 
-def add_text(df, text, csv_path):
+def _commit(df, entries, csv_path, signatures=None):
+    """
+    Append mutation entries to the journal and apply them to the dataset
+    
+    For SQLite datasets the entries are applied as row-level updates instead.
+    
+    Add entries get their row index here, under the journal lock, from the
+    highest index of the dataset as it is on disk, so a caller holding an
+    out-of-date copy cannot reuse the index of a row added since.
+    
+    The entries are applied in place to the cached dataset. When df is the
+    whole dataset (as returned by load_data), the result is a shallow copy
+    of the cache, so a take costs the same however large the dataset is;
+    for a subset of the rows, the entries are applied to a copy of df.
+    
+    Args:
+        df: DataFrame the entries were computed against
+        entries: Journal entries to record
+        csv_path: Path to the CSV snapshot
+        signatures: MinHash signatures of the added texts if already
+            computed, so the near-duplicate index does not compute them again
+        
+    Returns:
+        tuple: (success, updated_df)
+    """
+    with journal.lock:
+        if sqlite_store.is_sqlite_path(csv_path):
+            try:
+                _ensure_sqlite(csv_path)
+                previous_signature = _signature(csv_path)
+                entries = sqlite_store.apply_entries(csv_path, entries)
+            except Exception as e:
+                logger.error(f"Error updating database {csv_path}: {e}")
+                invalidate_cache(csv_path)
+                return False, df
+        else:
+            # Write a header-only snapshot so the CSV path always exists on disk
+            if not os.path.exists(csv_path):
+                if not save_data(pd.DataFrame(columns=["text", "audio", "recorded"]), csv_path):
+                    return False, df
+            
+            entries = _assign_add_indexes(csv_path, entries)
+            previous_signature = _signature(csv_path)
+            if not journal.append_entries(csv_path, entries):
+                invalidate_cache(csv_path)
+                return False, df
+        
+        signature = _signature(csv_path)
+        added = [entry["text"] for entry in entries if entry.get("op") == "add"]
+        text_index.record_commit(csv_path, previous_signature, signature, added)
+        near_duplicates.record_commit(csv_path, previous_signature, signature, added, signatures)
+        links = {entry["index"]: entry.get("audio") for entry in entries if entry.get("op") in ("record", "clear")}
+        if links:
+            audio_index.record_commit(AUDIO_DIR, csv_path, previous_signature, signature, links)
+        updated_df = _update_cache(csv_path, previous_signature, entries, df)
+    
+    if updated_df is None:
+        updated_df = journal.apply_entries(df.copy(), entries)
+    if not sqlite_store.is_sqlite_path(csv_path):
+        journal.maybe_compact(csv_path)
+    return True, updated_df
+
+def _assign_add_indexes(csv_path, entries):
+    """Give add entries the next free row indexes of the dataset, like SQLite's MAX(id) + 1"""
+    if not any(entry.get("op") == "add" for entry in entries):
+        return entries
+    
+    current = load_data(csv_path)
+    next_index = int(current.index.max()) + 1 if len(current) else 0
+    assigned = []
+    for entry in entries:
+        if entry.get("op") == "add":
+            entry = dict(entry, index=next_index)
+            next_index += 1
+        assigned.append(entry)
+    return assigned
+
+def _update_cache(csv_path, previous_signature, entries, df):
+    """
+    Apply our own write to the cached copy in place, or drop it if it was already stale
+    
+    Args:
+        csv_path: Path to the dataset
+        previous_signature: Signature of the dataset files before the write
+        entries: Entries that were written
+        df: DataFrame the entries were computed against
+    
+    Returns:
+        pd.DataFrame: Shallow copy of the updated cache if df held the same
+            rows as the cache, None otherwise
+    """
+    key = _cache_key(csv_path)
+    with _cache_lock:
+        cached = _cache.pop(key, None)
+        changes = _changes.pop(key, None)
+    if cached is None or cached[0] != previous_signature or changes is None:
+        return None
+    
+    covers = len(df) == len(cached[1]) and df.index.equals(cached[1].index)
+    try:
+        # Only the changed cells are written; with copy-on-write, pandas
+        # copies a column only while shallow copies of it are still alive
+        cached_df = journal.apply_entries(cached[1], entries)
+    except Exception as e:
+        logger.error(f"Error updating cached data for {csv_path}: {e}")
+        return None
+    generation, first, logged = changes
+    logged.extend(entries)
+    if len(logged) > CHANGE_LOG_SIZE:
+        first += len(logged) - CHANGE_LOG_SIZE
+        del logged[:len(logged) - CHANGE_LOG_SIZE]
+    with _cache_lock:
+        _cache[key] = (_signature(csv_path), cached_df)
+        _changes[key] = (generation, first, logged)
+    return cached_df.copy(deep=False) if covers else None
+
+def load_changes(csv_path, version=None):
+    """
+    Load the dataset together with the changes this process made since a version
+    
+    Lets derived state (such as the recording order) catch up with single
+    takes and added texts without comparing every row. The changes are
+    unknown when the data was read from disk again in the meantime, for
+    example after another process wrote to it.
+    
+    Args:
+        csv_path: Path to the dataset
+        version: Version returned by an earlier call, or None
+        
+    Returns:
+        tuple: (DataFrame as from load_data, current version or None if the
+            data is not cached, entries committed since version or None if
+            they are unknown)
+    """
+    key = _cache_key(csv_path)
+    with journal.lock:
+        df = load_data(csv_path)
+        with _cache_lock:
+            changes = _changes.get(key)
+            if changes is None:
+                return df, None, None
+            generation, first, logged = changes
+            current = (generation, first + len(logged))
+            if version is None or version[0] != generation or not first <= version[1] <= current[1]:
+                return df, current, None
+            return df, current, logged[version[1] - first:]
+
+def add_text(df, text, csv_path, allow_near_duplicates=False):
     """
     Add a new text to the dataset
     
@@ -55,6 +337,7 @@ def add_text(df, text, csv_path):
         df: DataFrame to add text to
         text: Text to add
         csv_path: Path to save the updated DataFrame
+        allow_near_duplicates: Add the text even if a very similar one is already in the dataset
         
     Returns:
         tuple: (success, updated_df)
@@ -63,22 +346,135 @@ def add_text(df, text, csv_path):
         logger.warning(f"Add Text failed: Text length ({len(text)}) not within 32-140 characters.")
         return False, df
     
-    # Add to DataFrame
-    new_row = pd.DataFrame({
-        "text": [text],
-        "audio": [None],
-        "recorded": [False]
-    })
-    
-    updated_df = pd.concat([df, new_row], ignore_index=True)
+    if not allow_near_duplicates:
+        similar = find_similar_texts(csv_path, text)
+        if similar:
+            logger.warning(f"Add Text failed: text is a near-duplicate of row {similar[0][0]}: '{similar[0][1][:50]}'")
+            return False, df
     
-    # Save updated DataFrame
-    success = save_data(updated_df, csv_path)
+    # Record the new row in the journal; _commit assigns its index
+    entry = {"op": "add", "text": text}
+    success, updated_df = _commit(df, [entry], csv_path)
     if success:
         logger.info(f"New text added: '{text[:50]}...'" if len(text) > 50 else f"New text added: '{text}'")
     
     return success, updated_df
 
+def find_similar_texts(csv_path, text, threshold=near_duplicates.DEFAULT_THRESHOLD):
+    """
+    Find texts in the dataset that are near-duplicates of a text
+    
+    Args:
+        csv_path: Path to the dataset
+        text: Text to look up
+        threshold: Minimum estimated Jaccard similarity of character 5-grams
+        
+    Returns:
+        list: (row index, text, similarity) tuples, most similar first
+    """
+    df = load_data(csv_path)
+    index = load_near_duplicate_index(csv_path)
+    return [(df.index[i], df["text"].iloc[i], similarity) for i, similarity in index.find(text, threshold)]
+
+def load_text_hashes(csv_path):
+    """
+    Hashes of the normalized texts in the dataset, from its persistent hash index
+    
+    Args:
+        csv_path: Path to the dataset
+        
+    Returns:
+        set: Hashes as computed by text_index.text_hash
+    """
+    with journal.lock:
+        texts = load_data(csv_path)["text"].tolist()
+        signature = _signature(csv_path)
+    return text_index.load_index(csv_path, texts, signature)
+
+def load_near_duplicate_index(csv_path):
+    """
+    MinHash index of the texts in the dataset, from its persistent index file
+    
+    Args:
+        csv_path: Path to the dataset
+        
+    Returns:
+        near_duplicates.NearDuplicateIndex: Index whose ids are dataset row positions
+    """
+    with journal.lock:
+        texts = load_data(csv_path)["text"].tolist()
+        signature = _signature(csv_path)
+    return near_duplicates.load_index(csv_path, texts, signature)
+
+def add_texts(df, texts, csv_path):
+    """
+    Add several new texts to the dataset in a single write
+    
+    Texts outside the 32-140 character limit are skipped, as are texts whose
+    normalized form is already in the dataset (or earlier in the batch), and
+    texts very similar to one of those. Duplicates are found through a
+    persistent hash index of the dataset, near-duplicates through its MinHash
+    index.
+    
+    Args:
+        df: DataFrame to add the texts to
+        texts: Iterable of texts to add
+        csv_path: Path to save the updated DataFrame
+        
+    Returns:
+        tuple: (summary, updated_df) where summary is a dict with the
+            "added", "duplicates", "near_duplicates" and "invalid" counts
+    """
+    summary = {"added": 0, "duplicates": 0, "near_duplicates": 0, "invalid": 0}
+    try:
+        existing = load_text_hashes(csv_path)
+        similar_index = load_near_duplicate_index(csv_path)
+        batch_index = near_duplicates.NearDuplicateIndex()
+        
+        # Texts not already in the dataset are signed together, then checked in order
+        candidates = []
+        for text in texts:
+            if not isinstance(text, str) or len(text) < 32 or len(text) > 140:
+                summary["invalid"] += 1
+                continue
+            digest = text_index.text_hash(text)
+            if digest in existing:
+                summary["duplicates"] += 1
+                continue
+            candidates.append((text, digest))
+        
+        new_texts, new_signatures = [], []
+        seen = set()
+        for (text, digest), signature in zip(candidates, near_duplicates.minhash_batch([text for text, _ in candidates])):
+            if digest in seen:
+                summary["duplicates"] += 1
+                continue
+            if similar_index.query(signature) or batch_index.query(signature):
+                summary["near_duplicates"] += 1
+                continue
+            batch_index.add(signature)
+            seen.add(digest)
+            new_texts.append(text)
+            new_signatures.append(signature)
+        
+        if not new_texts:
+            logger.info(f"No new texts to add ({summary['duplicates']} duplicates, "
+                        f"{summary['near_duplicates']} near-duplicates, {summary['invalid']} invalid)")
+            return summary, df
+        
+        entries = [{"op": "add", "text": text} for text in new_texts]
+        success, updated_df = _commit(df, entries, csv_path, new_signatures)
+        if not success:
+            return summary, df
+        
+        summary["added"] = len(new_texts)
+        logger.info(f"Added {summary['added']} texts ({summary['duplicates']} duplicates, "
+                    f"{summary['near_duplicates']} near-duplicates, {summary['invalid']} invalid skipped)")
+        return summary, updated_df
+    except Exception as e:
+        logger.error(f"Error adding texts: {e}")
+        return summary, df
+
 def save_recording(df, text_index, audio_path, csv_path):
     """
     Save a recording to the dataset
@@ -93,21 +489,48 @@ def save_recording(df, text_index, audio_path, csv_path):
         tuple: (success, updated_df)
     """
     try:
-        # Update the DataFrame
-        df_copy = df.copy()
-        df_copy.loc[text_index, "audio"] = os.path.basename(audio_path)
-        df_copy.loc[text_index, "recorded"] = True
-        
-        # Save the updated DataFrame
-        success = save_data(df_copy, csv_path)
+        # Record the change in the journal, with the name relative to the
+        # audio directory (including shard directories)
+        audio_name = split_audio_path(audio_path)[1]
+        entry = {"op": "record", "index": int(text_index), "audio": audio_name}
+        success, df_copy = _commit(df, [entry], csv_path)
         if success:
-            logger.info(f"Recording saved for text index {text_index}: {os.path.basename(audio_path)}")
+            logger.info(f"Recording saved for text index {text_index}: {audio_name}")
             return True, df_copy
         return False, df
     except Exception as e:
         logger.error(f"Error saving recording data: {e}")
         return False, df
 
+def rename_audio_files(df, renames, csv_path):
+    """
+    Point recorded rows at renamed audio files in a single write
+    
+    Args:
+        df: DataFrame to update
+        renames: Dict of old audio file name -> new audio file name
+        csv_path: Path to save the updated DataFrame
+        
+    Returns:
+        tuple: (success, updated_df)
+    """
+    try:
+        recorded = df[(df["recorded"] == True) & df["audio"].isin(list(renames))]
+        entries = [
+            {"op": "record", "index": int(index), "audio": renames[audio]}
+            for index, audio in zip(recorded.index, recorded["audio"])
+        ]
+        if not entries:
+            return True, df
+        success, updated_df = _commit(df, entries, csv_path)
+        if success:
+            logger.info(f"Updated audio file names of {len(entries)} recordings")
+            return True, updated_df
+        return False, df
+    except Exception as e:
+        logger.error(f"Error renaming audio files: {e}")
+        return False, df
+
 def delete_recording(df, index, csv_path):
     """
     Delete an audio recording and update the dataset
@@ -124,20 +547,17 @@ def delete_recording(df, index, csv_path):
         # Get audio file path
         audio_filename = df.loc[index, "audio"]
         if audio_filename and not pd.isna(audio_filename):
-            audio_path = os.path.join("audio_files", audio_filename)
+            audio_path = os.path.join(AUDIO_DIR, *audio_filename.split("/"))
 
             # Attempt to delete the audio file, but proceed regardless
             deleted_file = delete_audio_file(audio_path)
             if not deleted_file:
                 logger.warning(f"Associated audio file was not found or couldn't be deleted: {audio_path}. Proceeding with CSV update.")
 
-            # Update the DataFrame regardless of file deletion success
-            df_copy = df.copy()
-            df_copy.loc[index, "audio"] = None
-            df_copy.loc[index, "recorded"] = False
-
-            # Save the updated DataFrame
-            if save_data(df_copy, csv_path):
+            # Update the dataset regardless of file deletion success
+            entry = {"op": "clear", "index": int(index)}
+            success, df_copy = _commit(df, [entry], csv_path)
+            if success:
                 logger.info(f"Recording entry cleared for text index {index}")
                 return True, df_copy
             else:
@@ -152,4 +572,96 @@ def delete_recording(df, index, csv_path):
             return False, df
     except Exception as e:
         logger.error(f"Error deleting recording: {e}")
-        return False, df 
\ No newline at end of file
+        return False, df
+
+def recorded_audio_summary(csv_path, audio_dir=AUDIO_DIR):
+    """
+    Totals over the audio files of the recorded rows
+    
+    The audio index keeps the totals up to date as takes are saved and
+    deleted, so the rows are only gone through when the dataset was changed
+    some other way.
+    
+    Args:
+        csv_path: Path to the dataset (CSV or SQLite)
+        audio_dir: Directory containing the audio files
+        
+    Returns:
+        dict: "files" (recorded rows whose audio file is indexed), "seconds" and "bytes"
+    """
+    with journal.lock:
+        signature = _signature(csv_path)
+        totals = audio_index.linked_summary(audio_dir, csv_path, signature)
+        if totals is None:
+            audio = load_records(csv_path, recorded=True)["audio"]
+            audio_index.link_files(audio_dir, audio.to_dict(), csv_path, signature)
+            totals = audio_index.linked_summary(audio_dir, csv_path, signature)
+    return totals
+
+def count_records(csv_path, recorded=None):
+    """
+    Count rows in the dataset without loading it where the backend allows
+    
+    Args:
+        csv_path: Path to the dataset (CSV or SQLite)
+        recorded: True or False to count only recorded or unrecorded rows, None for all
+        
+    Returns:
+        int: Number of matching rows
+    """
+    if sqlite_store.is_sqlite_path(csv_path):
+        try:
+            _ensure_sqlite(csv_path)
+            return sqlite_store.count_records(csv_path, recorded)
+        except Exception as e:
+            logger.error(f"Error counting records in {csv_path}: {e}")
+            return 0
+    
+    df = load_data(csv_path)
+    if recorded is None:
+        return len(df)
+    mask = df["recorded"] == True
+    return int(mask.sum()) if recorded else int((~mask).sum())
+
+def load_records(csv_path, recorded=None, offset=0, limit=None):
+    """
+    Load a page of rows, optionally only recorded or unrecorded ones
+    
+    Args:
+        csv_path: Path to the dataset (CSV or SQLite)
+        recorded: True or False to filter by recording status, None for all rows
+        offset: Number of matching rows to skip
+        limit: Maximum number of rows to return, None for no limit
+        
+    Returns:
+        pd.DataFrame: Matching rows, indexed like the full dataset
+    """
+    if sqlite_store.is_sqlite_path(csv_path):
+        try:
+            _ensure_sqlite(csv_path)
+            return sqlite_store.load_records(csv_path, recorded, offset, limit)
+        except Exception as e:
+            logger.error(f"Error loading records from {csv_path}: {e}")
+            return pd.DataFrame(columns=["text", "audio", "recorded"])
+    
+    df = load_data(csv_path)
+    if recorded is not None:
+        mask = df["recorded"] == True
+        df = df[mask] if recorded else df[~mask]
+    end = None if limit is None else offset + limit
+    return df.iloc[offset:end]
+
+def migrate_data(source_path, target_path):
+    """
+    Copy a dataset between storage backends, e.g. data/data.csv to data/data.db
+    
+    Args:
+        source_path: Path to the dataset to read
+        target_path: Path to the dataset to (over)write
+        
+    Returns:
+        bool: True if the copy was successful, False otherwise
+    """
+    df = load_data(source_path)
+    logger.info(f"Migrating {len(df)} records from {source_path} to {target_path}")
+    return save_data(df, target_path)
@@ -1,11 +1,37 @@
-import pandas as pd
-from datasets import Dataset, Audio
 import os
+import io
+import glob
+import json
+import re
+import time
+import wave
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from voice_recorder.audio_handlers import audio_layout
+from voice_recorder.data_handlers.csv_handler import load_data
 
 logger = logging.getLogger(__name__)
 
-def export_dataset(input_csv, audio_dir, output_dir):
+MANIFEST_FILE = "export_manifest.json"
+PARTS_DIR = "data"
+# Incremental exports write data/train-part-NNNNN.parquet; like the
+# data/train-NNNNN-of-NNNNN.parquet shards of full exports, the names put
+# every file in the train split on the Hub
+PART_PREFIX = "train-part-"
+SAMPLING_RATE = 24000
+
+# Rows per Parquet row group, and the ceiling on audio held in memory while writing
+DEFAULT_ROW_GROUP_SIZE = 500
+DEFAULT_MAX_MEMORY_MB = 512
+
+# Target size of each Parquet shard; 0 writes a single dataset.parquet
+DEFAULT_SHARD_SIZE_MB = 500
+
+def export_dataset(input_csv, audio_dir, output_dir, incremental=False, workers=1,
+                   row_group_size=DEFAULT_ROW_GROUP_SIZE, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                   shard_size_mb=DEFAULT_SHARD_SIZE_MB, audio_codec=None, quality_thresholds=None):
     """
     Export dataset to Hugging Face format
     
@@ -13,18 +39,36 @@ def export_dataset(input_csv, audio_dir, output_dir):
         input_csv: Path to the input CSV file
         audio_dir: Directory containing audio files
         output_dir: Directory to save the exported dataset
+        incremental: Only encode rows that are new or changed since the last
+            incremental export, writing Parquet parts under output_dir/data
+        workers: Number of threads that read, validate and transcode audio files
+            (and of processes that analyze quality, with quality_thresholds)
+        row_group_size: Maximum number of rows per Parquet row group
+        max_memory_mb: Ceiling on audio buffered in memory while writing, in MB;
+            row groups are flushed early to stay below it
+        shard_size_mb: Target size of each Parquet file under output_dir/data
+            (data/train-00000-of-000NN.parquet); 0 writes one dataset.parquet
+        audio_codec: Transcode the embedded audio to this codec ("flac" or "wav");
+            None embeds the audio files as they are stored
+        quality_thresholds: Leave out takes that fail these quality checks (see
+            quality.DEFAULT_THRESHOLDS); None exports every take
     
     Returns:
         success: Boolean indicating if export was successful
     """
+    write_options = {"workers": workers, "row_group_size": row_group_size, "max_memory_mb": max_memory_mb,
+                     "audio_codec": audio_codec}
+    timings = {"load": 0.0, "encode": 0.0, "write": 0.0}
     try:
+        start_time = time.perf_counter()
+        
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
         logger.info(f"Ensured output directory exists: {output_dir}")
         
         # Load CSV
         logger.info(f"Loading input CSV: {input_csv}")
-        df = pd.read_csv(input_csv)
+        df = load_data(input_csv)
         logger.info(f"Loaded {len(df)} records from CSV.")
         
         # Filter to only include recorded data
@@ -37,9 +81,25 @@ def export_dataset(input_csv, audio_dir, output_dir):
             logger.warning("No recorded data found in the input CSV. Export aborted.")
             return False
         
+        # Check every recording against the audio index before encoding anything
+        if not _check_audio_files(df, audio_dir):
+            return False
+        
+        if quality_thresholds is not None:
+            df = _filter_quality(df, audio_dir, quality_thresholds, workers)
+            if len(df) == 0:
+                logger.warning("No recordings pass the quality checks. Export aborted.")
+                return False
+        timings["load"] = time.perf_counter() - start_time
+        
+        if incremental:
+            success = _export_incremental(df, audio_dir, output_dir, write_options, shard_size_mb, timings)
+            _log_timings(timings, time.perf_counter() - start_time)
+            return success
+        
         # Ensure audio paths are absolute
         logger.info(f"Making audio paths absolute relative to: {audio_dir}")
-        df["audio"] = df["audio"].apply(lambda x: os.path.join(audio_dir, x))
+        df["audio"] = df["audio"].apply(lambda x: audio_layout.audio_path(audio_dir, x))
         
         # Select only the required columns for the final dataset
         logger.info("Selecting only 'text' and 'audio' columns for the final dataset.")
@@ -54,21 +114,480 @@ def export_dataset(input_csv, audio_dir, output_dir):
         logger.info(f"Saving full filtered data (for reference) to CSV: {output_csv_path}")
         df.to_csv(output_csv_path, index=False) # Save original df with all columns here
         
-        # Create Hugging Face dataset from the selected columns
-        logger.info("Creating Hugging Face Dataset object from selected columns ('text', 'audio').")
-        dataset = Dataset.from_pandas(df_final) # Use df_final here
-        
-        # Cast audio column to Audio feature
-        logger.info("Casting 'audio' column to Hugging Face Audio feature (sampling_rate=24000).")
-        dataset = dataset.cast_column("audio", Audio(sampling_rate=24000))
-        
-        # Save dataset to Parquet format
-        output_parquet_path = os.path.join(output_dir, "dataset.parquet")
-        logger.info(f"Saving dataset to Parquet format: {output_parquet_path}")
-        dataset.to_parquet(output_parquet_path)
+        # Save dataset to Parquet format, with the audio embedded as a
+        # Hugging Face Audio feature (sampling_rate=24000)
+        rows = [(os.path.basename(path), path, text) for text, path in zip(df_final["text"], df_final["audio"])]
+        if shard_size_mb:
+            shards = _split_rows(rows, max_bytes=shard_size_mb * 1024 * 1024)
+            written = []
+            for i, shard_rows in enumerate(shards):
+                shard = f"train-{i:05d}-of-{len(shards):05d}.parquet"
+                logger.info(f"Saving shard {i + 1}/{len(shards)} to Parquet format: {shard}")
+                os.makedirs(os.path.join(output_dir, PARTS_DIR), exist_ok=True)
+                _write_part(shard_rows, os.path.join(output_dir, PARTS_DIR, shard), write_options, timings)
+                written.append(shard)
+            # Drop files of earlier exports that are not part of this one
+            _remove_parquet_output(output_dir, keep=written)
+        else:
+            output_parquet_path = os.path.join(output_dir, "dataset.parquet")
+            logger.info(f"Saving dataset to Parquet format: {output_parquet_path}")
+            _write_part(rows, output_parquet_path, write_options, timings)
+            _remove_parquet_output(output_dir, keep=["dataset.parquet"])
         
+        _log_timings(timings, time.perf_counter() - start_time)
         logger.info("Dataset export completed successfully.")
         return True
     except Exception as e:
         logger.error(f"Error during dataset export: {e}", exc_info=True)
-        return False 
\ No newline at end of file
+        return False
+
+def _check_audio_files(df, audio_dir):
+    """
+    Check that the audio of every row exists, using the audio metadata index
+    
+    Args:
+        df: Recorded rows with an audio (file name) column
+        audio_dir: Directory containing audio files
+        
+    Returns:
+        bool: True if every file is present
+    """
+    from voice_recorder.audio_handlers import audio_index
+    
+    audio_index.reconcile(audio_dir)
+    metadata = audio_index.get_metadata(audio_dir, df["audio"].tolist())
+    missing = [name for name in df["audio"] if name not in metadata]
+    if missing:
+        logger.error(f"{len(missing)} audio files are missing or unreadable in {audio_dir}: {', '.join(missing[:5])}")
+        return False
+    
+    other_rates = sorted({meta["sample_rate"] for meta in metadata.values()} - {SAMPLING_RATE})
+    if other_rates:
+        logger.warning(f"Some recordings are not at {SAMPLING_RATE} Hz ({other_rates}); they are resampled when loaded")
+    hours = sum(metadata[name]["duration"] for name in df["audio"]) / 3600
+    logger.info(f"Exporting {hours:.2f} hours of audio from {len(df)} recordings")
+    return True
+
+def _filter_quality(df, audio_dir, thresholds, workers=1):
+    """
+    Drop rows whose audio fails the quality checks
+    
+    Args:
+        df: Recorded rows with an audio (file name) column
+        audio_dir: Directory containing audio files
+        thresholds: Quality limits, as in quality.DEFAULT_THRESHOLDS
+        workers: Number of processes used to analyze new files
+        
+    Returns:
+        pd.DataFrame: The rows that pass
+    """
+    from voice_recorder.audio_handlers.quality import failed_checks, update_quality_index
+    
+    index = update_quality_index(audio_dir, workers)
+    passes = df["audio"].map(lambda name: name in index and not failed_checks(index[name], thresholds))
+    logger.info(f"Quality checks: {int(passes.sum())} of {len(df)} recordings pass, "
+                f"{int((~passes).sum())} left out")
+    return df[passes.astype(bool)]
+
+def load_manifest(output_dir):
+    """
+    Load the manifest of an incremental export
+    
+    Args:
+        output_dir: Directory of the exported dataset
+        
+    Returns:
+        dict: {"rows": {audio file: {"size", "mtime_ns", "text", "part"}},
+            "parts": {part file: [audio files in row order]},
+            "audio_codec": export codec or None}
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {"rows": {}, "parts": {}}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_manifest(output_dir, manifest):
+    """Write the manifest atomically"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+def list_parquet_files(dataset_dir):
+    """
+    List the Parquet files of an exported dataset
+    
+    Args:
+        dataset_dir: Directory of the exported dataset
+        
+    Returns:
+        list: Paths of the shards under data/, or of dataset.parquet for a
+            single-file export; empty if there are none
+    """
+    shards = sorted(glob.glob(os.path.join(dataset_dir, PARTS_DIR, "*.parquet")))
+    if shards:
+        return shards
+    monolithic_path = os.path.join(dataset_dir, "dataset.parquet")
+    return [monolithic_path] if os.path.exists(monolithic_path) else []
+
+def _remove_parquet_output(output_dir, keep=()):
+    """
+    Remove Parquet files and the manifest left by earlier exports of another layout
+    
+    Args:
+        output_dir: Directory of the exported dataset
+        keep: File names written by this export (dataset.parquet, shard names
+            or, for incremental exports, the part names and the manifest)
+    """
+    paths = glob.glob(os.path.join(output_dir, PARTS_DIR, "*.parquet"))
+    paths.append(os.path.join(output_dir, "dataset.parquet"))
+    paths.append(os.path.join(output_dir, MANIFEST_FILE))
+    for path in paths:
+        if os.path.basename(path) not in keep and os.path.exists(path):
+            os.remove(path)
+
+def _features_metadata():
+    """Schema metadata that makes datasets load the audio column as Audio"""
+    features = {
+        "text": {"dtype": "string", "_type": "Value"},
+        "audio": {"sampling_rate": SAMPLING_RATE, "_type": "Audio"},
+    }
+    return {"huggingface": json.dumps({"info": {"features": features}})}
+
+def _log_timings(timings, total):
+    """Log how long each export stage took"""
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+    logger.info(f"Export timings: {stages} (total {total:.2f}s)")
+
+def _encode_audio(item, codec=None):
+    """
+    Read and validate one audio file (runs in a worker thread)
+    
+    Args:
+        item: (audio file name, audio path) tuple
+        codec: Codec to transcode the audio to, None to keep it as stored
+        
+    Returns:
+        tuple: (audio payload dict or None, error message or None)
+    """
+    from voice_recorder.audio_handlers.audio_processor import AUDIO_CODECS, codec_for_path, transcode_audio
+    
+    audio_file, audio_path = item
+    # Shard directories are not part of the exported file name
+    audio_file = os.path.basename(audio_file)
+    try:
+        with open(audio_path, "rb") as f:
+            data = f.read()
+        stored_codec = codec_for_path(audio_file)
+        if stored_codec == "wav":
+            with wave.open(io.BytesIO(data), "rb") as wf:
+                frames = wf.getnframes()
+        else:
+            import soundfile as sf
+            frames = sf.info(io.BytesIO(data)).frames
+        if frames == 0:
+            return None, f"{audio_path}: no audio frames"
+        if codec is not None and codec != stored_codec:
+            data = transcode_audio(data, codec)
+            audio_file = os.path.splitext(audio_file)[0] + AUDIO_CODECS[codec]
+    except Exception as e:
+        return None, f"{audio_path}: {e!r}"
+    return {"bytes": data, "path": audio_file}, None
+
+def encode_audio_files(items, workers=1, pool=None, codec=None):
+    """
+    Read and validate audio files, in a thread pool when workers > 1
+    
+    Passing the stored bytes through is file IO, and libsndfile releases
+    the GIL while transcoding, so threads overlap both without sending
+    every payload back from another process.
+    
+    Args:
+        items: List of (audio file name, audio path) tuples
+        workers: Number of worker threads
+        pool: Existing ThreadPoolExecutor to use instead of starting one
+        codec: Codec to transcode the audio to ("flac" or "wav"), None to keep it as stored
+        
+    Returns:
+        list: Audio payloads ({"bytes", "path"}) in the order of items
+        
+    Raises:
+        ValueError: If any file is missing or not a valid WAV or FLAC file
+    """
+    encode = partial(_encode_audio, codec=codec)
+    if pool is not None:
+        results = list(pool.map(encode, items))
+    elif workers > 1 and len(items) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(encode, items))
+    else:
+        results = [encode(item) for item in items]
+    
+    errors = [error for _, error in results if error]
+    if errors:
+        details = "; ".join(errors[:5])
+        raise ValueError(f"{len(errors)} audio files could not be exported: {details}")
+    return [payload for payload, _ in results]
+
+def _split_rows(rows, max_rows=None, max_bytes=None):
+    """
+    Split rows into consecutive groups bounded by row count and by audio bytes
+    
+    Args:
+        rows: List of (audio file, audio path, text) tuples
+        max_rows: Maximum number of rows per group, None for no limit
+        max_bytes: Maximum audio file bytes per group, None for no limit;
+            a single larger file still gets a group of its own
+        
+    Returns:
+        list: Lists of rows, one per group
+    """
+    groups, group, group_bytes = [], [], 0
+    for row in rows:
+        try:
+            size = os.path.getsize(row[1])
+        except OSError:
+            # Missing files are reported when the group is encoded
+            size = 0
+        full = ((max_rows is not None and len(group) >= max_rows)
+                or (max_bytes is not None and group_bytes + size > max_bytes))
+        if group and full:
+            groups.append(group)
+            group, group_bytes = [], 0
+        group.append(row)
+        group_bytes += size
+    if group:
+        groups.append(group)
+    return groups
+
+def _write_part(rows, part_path, write_options=None, timings=None):
+    """
+    Stream rows into a Parquet file with the audio bytes embedded
+    
+    Rows are read, encoded and written one row group at a time, so memory use
+    is bounded by the row group limits rather than by the total audio size.
+    The file is written under a temporary name and only moved into place once
+    complete.
+    
+    Args:
+        rows: List of (audio file, audio path, text) tuples
+        part_path: Path of the Parquet file to write
+        write_options: Dict with "workers", "row_group_size", "max_memory_mb" and "audio_codec"
+        timings: Optional dict whose "encode" and "write" stage times are increased
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    options = {"workers": 1, "row_group_size": DEFAULT_ROW_GROUP_SIZE, "max_memory_mb": DEFAULT_MAX_MEMORY_MB,
+               "audio_codec": None}
+    options.update(write_options or {})
+    workers = options["workers"]
+    
+    schema = pa.schema([
+        ("text", pa.string()),
+        ("audio", pa.struct([("bytes", pa.binary()), ("path", pa.string())])),
+    ], metadata=_features_metadata())
+    
+    # The audio is held both as Python bytes and as an Arrow buffer while a
+    # row group is written, so each group gets half of the memory ceiling
+    groups = _split_rows(rows, options["row_group_size"], options["max_memory_mb"] * 1024 * 1024 // 2)
+    encode_time = write_time = 0.0
+    tmp_path = f"{part_path}.tmp"
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 and len(rows) > 1 else None
+    try:
+        with pq.ParquetWriter(tmp_path, schema) as writer:
+            for group in groups:
+                start_time = time.perf_counter()
+                audio = encode_audio_files([(audio_file, audio_path) for audio_file, audio_path, _ in group], workers, pool,
+                                           codec=options["audio_codec"])
+                encoded_time = time.perf_counter()
+                
+                table = pa.table({"text": [row[2] for row in group], "audio": audio}, schema=schema)
+                writer.write_table(table, row_group_size=len(group))
+                del audio, table
+                
+                encode_time += encoded_time - start_time
+                write_time += time.perf_counter() - encoded_time
+        os.replace(tmp_path, part_path)
+        logger.info(f"Wrote {len(rows)} rows in {len(groups)} row groups to {part_path}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    if timings is not None:
+        timings["encode"] += encode_time
+        timings["write"] += write_time
+
+def _rewrite_part(part_path, keep, target_path):
+    """
+    Copy the rows to keep of a Parquet part into a new file, one row group at a time
+    
+    Args:
+        part_path: Path of the Parquet file
+        keep: Sorted positions of the rows to keep
+        target_path: Path of the new file; part_path is left untouched
+    """
+    import pyarrow.parquet as pq
+    
+    keep = set(keep)
+    tmp_path = f"{target_path}.tmp"
+    try:
+        parquet_file = pq.ParquetFile(part_path)
+        with pq.ParquetWriter(tmp_path, parquet_file.schema_arrow) as writer:
+            offset = 0
+            for i in range(parquet_file.num_row_groups):
+                table = parquet_file.read_row_group(i)
+                rows = [j for j in range(table.num_rows) if offset + j in keep]
+                offset += table.num_rows
+                if rows:
+                    writer.write_table(table.take(rows), row_group_size=len(rows))
+        os.replace(tmp_path, target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _part_name(number):
+    """File name of an incremental part"""
+    return f"{PART_PREFIX}{number:05d}.parquet"
+
+def _part_number(part):
+    """Number of an incremental part, from its current or legacy (part-NNNNN) name"""
+    return int(re.search(r"(\d+)\.parquet$", part).group(1))
+
+def _rename_legacy_parts(output_dir, manifest):
+    """
+    Rename parts of older incremental exports (part-NNNNN.parquet) into the train split
+    
+    Args:
+        output_dir: Directory of the exported dataset
+        manifest: Manifest as from load_manifest, updated in place and saved
+    """
+    renamed = {part: _part_name(_part_number(part)) for part in manifest["parts"] if not part.startswith(PART_PREFIX)}
+    if not renamed:
+        return
+    parts_dir = os.path.join(output_dir, PARTS_DIR)
+    for old_part, new_part in renamed.items():
+        os.replace(os.path.join(parts_dir, old_part), os.path.join(parts_dir, new_part))
+    manifest["parts"] = {renamed.get(part, part): audio_files for part, audio_files in manifest["parts"].items()}
+    for entry in manifest["rows"].values():
+        if entry.get("part") in renamed:
+            entry["part"] = renamed[entry["part"]]
+    _save_manifest(output_dir, manifest)
+    logger.info(f"Renamed {len(renamed)} parts of an earlier export to {PART_PREFIX}NNNNN.parquet")
+
+def _export_incremental(df, audio_dir, output_dir, write_options=None, shard_size_mb=0, timings=None):
+    """
+    Export recorded rows, re-encoding only rows that changed since the last run
+    
+    A row is unchanged when its audio file has the same size and mtime and its
+    text is the same as recorded in the manifest, and the export codec has
+    not changed. Parts that contain deleted or
+    changed rows are rewritten without them; their audio is not re-read.
+    
+    Rewritten parts get new names, and the manifest is saved after every
+    part is written, before the files it replaces are removed. An export
+    that fails halfway therefore leaves a manifest that matches the parts
+    on disk, and the next run picks up from there.
+    
+    Args:
+        df: Recorded rows with text and audio (file name) columns
+        audio_dir: Directory containing audio files
+        output_dir: Directory to save the exported dataset
+        write_options: Dict with "workers", "row_group_size", "max_memory_mb" and "audio_codec"
+        shard_size_mb: Target size of each new part, 0 for a single new part
+        timings: Optional dict of stage timings to add to
+    
+    Returns:
+        success: Boolean indicating if export was successful
+    """
+    parts_dir = os.path.join(output_dir, PARTS_DIR)
+    os.makedirs(parts_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    old_rows = manifest["rows"]
+    audio_codec = (write_options or {}).get("audio_codec")
+    if manifest.get("audio_codec") != audio_codec:
+        # Every row has to be encoded again with the new codec
+        old_rows = {}
+    
+    # Rows whose part file went missing have to be encoded again
+    manifest["parts"] = {part: audio_files for part, audio_files in manifest["parts"].items()
+                         if os.path.exists(os.path.join(parts_dir, part))}
+    _rename_legacy_parts(output_dir, manifest)
+    
+    # Work out which rows need encoding
+    current_rows = {}
+    new_rows = []
+    for audio_file, text in zip(df["audio"], df["text"]):
+        audio_path = audio_layout.audio_path(audio_dir, audio_file)
+        stat = os.stat(audio_path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "text": text}
+        current_rows[audio_file] = entry
+        
+        old = old_rows.get(audio_file)
+        if old is not None and old.get("part") in manifest["parts"] and all(old[key] == entry[key] for key in entry):
+            entry["part"] = old["part"]
+        else:
+            new_rows.append((audio_file, audio_path, text))
+    
+    parts = dict(manifest["parts"])
+    next_number = max((_part_number(part) for part in parts), default=-1) + 1
+    
+    def save_progress():
+        # Only rows that are in a listed part count as exported
+        rows = {audio_file: entry for audio_file, entry in current_rows.items() if entry.get("part") in parts}
+        _save_manifest(output_dir, {"rows": rows, "parts": parts, "audio_codec": audio_codec})
+    
+    # Drop deleted or changed rows from existing parts
+    dropped = 0
+    for part, audio_files in manifest["parts"].items():
+        part_path = os.path.join(parts_dir, part)
+        keep = [i for i, audio_file in enumerate(audio_files)
+                if current_rows.get(audio_file, {}).get("part") == part]
+        if len(keep) == len(audio_files):
+            continue
+        
+        dropped += len(audio_files) - len(keep)
+        del parts[part]
+        if keep:
+            new_part = _part_name(next_number)
+            next_number += 1
+            logger.info(f"Rewriting {part} as {new_part} without {len(audio_files) - len(keep)} stale rows")
+            _rewrite_part(part_path, keep, os.path.join(parts_dir, new_part))
+            parts[new_part] = [audio_files[i] for i in keep]
+            for i in keep:
+                current_rows[audio_files[i]]["part"] = new_part
+        else:
+            logger.info(f"Removing {part}, all of its rows are stale")
+        save_progress()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    
+    # Encode new and changed rows into new parts
+    if new_rows:
+        max_bytes = shard_size_mb * 1024 * 1024 if shard_size_mb else None
+        for part_rows in _split_rows(new_rows, max_bytes=max_bytes):
+            part = _part_name(next_number)
+            next_number += 1
+            logger.info(f"Encoding {len(part_rows)} new or changed rows into {part}")
+            _write_part(part_rows, os.path.join(parts_dir, part), write_options, timings)
+            parts[part] = [row[0] for row in part_rows]
+            for audio_file, _, _ in part_rows:
+                current_rows[audio_file]["part"] = part
+            save_progress()
+    
+    save_progress()
+    
+    # Keep the reference CSV and drop files written by earlier full exports
+    output_csv_path = os.path.join(output_dir, "dataset.csv")
+    df.to_csv(output_csv_path, index=False)
+    _remove_parquet_output(output_dir, keep=list(parts) + [MANIFEST_FILE])
+    
+    logger.info(
+        f"Incremental export completed: {len(current_rows) - len(new_rows)} unchanged, "
+        f"{len(new_rows)} encoded, {dropped} dropped, {len(parts)} parts."
+    )
+    return True
@@ -1,34 +1,307 @@
 import os
+import fnmatch
+import hashlib
+import json
 import logging
-from huggingface_hub import HfApi, create_repo
-from datasets import load_dataset
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 logger = logging.getLogger(__name__)
 
+# Local cache of file hashes, so unchanged files are not re-hashed on every push
+HASH_CACHE_FILE = ".hub_hashes.json"
+# Files a delta upload keeps in sync with the repository
+DELTA_PATTERNS = ["data/*.parquet", "dataset.parquet", "dataset.csv"]
+# Files uploaded by a push that has not been committed yet
+UPLOAD_STATE_FILE = ".upload_state.json"
+DEFAULT_UPLOAD_WORKERS = 4
+DEFAULT_MAX_RETRIES = 5
+
+def _matches(repo_path, patterns):
+    """True if a repo path matches one of the patterns, with * not crossing directories"""
+    return any(fnmatch.fnmatch(repo_path, pattern) and repo_path.count("/") == pattern.count("/")
+               for pattern in patterns)
+
+def _hash_file(path, size, chunk_size=8 * 1024 * 1024):
+    """Compute the LFS sha256 and git blob sha1 of a file in one pass"""
+    sha256 = hashlib.sha256()
+    sha1 = hashlib.sha1(f"blob {size}\0".encode("ascii"))
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            sha256.update(chunk)
+            sha1.update(chunk)
+    return {"sha256": sha256.hexdigest(), "git_sha1": sha1.hexdigest()}
+
+def local_file_hashes(dataset_dir, patterns=DELTA_PATTERNS):
+    """
+    Hash the dataset files that a delta upload would sync
+
+    Hashes are cached in HASH_CACHE_FILE by size and modification time,
+    so only files written since the last push are read again.
+
+    Args:
+        dataset_dir: Local dataset directory
+        patterns: Glob patterns of repo paths to include
+
+    Returns:
+        dict: Repo path -> {"size", "sha256", "git_sha1"}
+    """
+    cache_path = os.path.join(dataset_dir, HASH_CACHE_FILE)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+
+    hashes = {}
+    for root, _, files in os.walk(dataset_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            repo_path = os.path.relpath(path, dataset_dir).replace(os.sep, "/")
+            if not _matches(repo_path, patterns):
+                continue
+            stat = os.stat(path)
+            cached = cache.get(repo_path)
+            if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                entry = cached
+            else:
+                entry = dict(_hash_file(path, stat.st_size), size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            hashes[repo_path] = entry
+
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, indent=2)
+    return hashes
+
+def remote_file_hashes(api, repo_id, repo_type="dataset", patterns=DELTA_PATTERNS):
+    """
+    List the files in a repository with their hashes
+
+    Args:
+        api: HfApi instance, or any object with a compatible list_repo_tree
+        repo_id: Repository ID
+        repo_type: Type of repository
+        patterns: Glob patterns of repo paths to include
+
+    Returns:
+        dict: Repo path -> {"size", "sha256" (LFS files only), "git_sha1"}
+    """
+    hashes = {}
+    for item in api.list_repo_tree(repo_id, recursive=True, repo_type=repo_type):
+        blob_id = getattr(item, "blob_id", None)
+        if blob_id is None or not _matches(item.path, patterns):
+            continue
+        lfs = getattr(item, "lfs", None)
+        hashes[item.path] = {
+            "size": item.size,
+            "sha256": lfs.sha256 if lfs is not None else None,
+            "git_sha1": blob_id,
+        }
+    return hashes
+
+def plan_delta_upload(local, remote):
+    """
+    Compare local and remote file hashes
+
+    LFS files are compared by sha256 and regular files by their git blob id.
+
+    Args:
+        local: Result of local_file_hashes
+        remote: Result of remote_file_hashes
+
+    Returns:
+        tuple: (repo paths to upload, repo paths to delete)
+    """
+    upload = []
+    for path, entry in sorted(local.items()):
+        existing = remote.get(path)
+        if existing is None or existing["size"] != entry["size"]:
+            upload.append(path)
+        elif existing["sha256"] is not None:
+            if existing["sha256"] != entry["sha256"]:
+                upload.append(path)
+        elif existing["git_sha1"] != entry["git_sha1"]:
+            upload.append(path)
+    delete = sorted(path for path in remote if path not in local)
+    return upload, delete
+
+def _load_upload_state(state_path, repo_id):
+    """Load the files already uploaded by an interrupted push to the same repository"""
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if state.get("repo_id") != repo_id:
+        return {}
+    return state.get("files", {})
+
+def _save_upload_state(state_path, repo_id, files):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"repo_id": repo_id, "files": files}, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+def _with_retries(action, description, max_retries, backoff_seconds):
+    """Run action, retrying with exponential backoff when it raises"""
+    for attempt in range(max_retries + 1):
+        try:
+            return action()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_seconds * 2 ** attempt
+            logger.warning(f"{description} failed ({e!r}), retrying in {delay:.1f}s "
+                           f"(attempt {attempt + 1} of {max_retries})")
+            time.sleep(delay)
+
+def _upload_file(api, dataset_dir, repo_id, repo_type, path, uploaded, max_retries, backoff_seconds):
+    """Prepare the commit operation for one file and upload its content unless already uploaded"""
+    from huggingface_hub import CommitOperationAdd
+
+    operation = CommitOperationAdd(path_in_repo=path, path_or_fileobj=os.path.join(dataset_dir, *path.split("/")))
+    if not uploaded:
+        _with_retries(
+            lambda: api.preupload_lfs_files(repo_id, additions=[operation], repo_type=repo_type),
+            f"Uploading {path}", max_retries, backoff_seconds
+        )
+    return operation
+
+def push_delta(api, dataset_dir, repo_id, repo_type="dataset", commit_message="Upload voice dataset",
+               only_changed=True, workers=DEFAULT_UPLOAD_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+               backoff_seconds=1.0, progress=None):
+    """
+    Upload dataset files concurrently and commit them in a single commit
+
+    File contents are uploaded by a pool of workers, each file retried with
+    exponential backoff. Files that finished uploading are recorded in
+    UPLOAD_STATE_FILE, so a push that is interrupted continues with the
+    remaining files when it is run again. Remote Parquet files and
+    dataset.csv that no longer exist locally are deleted in the same commit.
+    Nothing is committed if the repository is already up to date.
+
+    Args:
+        api: HfApi instance, or any object with compatible list_repo_tree,
+            preupload_lfs_files and create_commit
+        dataset_dir: Local dataset directory
+        repo_id: Repository ID
+        repo_type: Type of repository
+        commit_message: Commit message for the upload
+        only_changed: Only upload files whose hashes differ from the repository
+        workers: Number of files uploaded at the same time
+        max_retries: Number of retries per file (and for the final commit)
+        backoff_seconds: Delay before the first retry, doubled for each further retry
+        progress: Optional callback called after each file as
+            progress(files_done, files_total, bytes_done, bytes_total, elapsed_seconds)
+
+    Returns:
+        tuple: (repo paths uploaded, repo paths deleted)
+    """
+    from huggingface_hub import CommitOperationDelete
+
+    local = local_file_hashes(dataset_dir)
+    remote = remote_file_hashes(api, repo_id, repo_type=repo_type)
+    upload, delete = plan_delta_upload(local, remote)
+    if not only_changed:
+        upload = sorted(local)
+
+    upload_bytes = sum(local[path]["size"] for path in upload)
+    logger.info(f"Upload plan: {len(upload)} files ({upload_bytes / 1024 / 1024:.1f} MB), "
+                f"{len(local) - len(upload)} unchanged, {len(delete)} to delete")
+    if not upload and not delete:
+        logger.info(f"{repo_id} is already up to date")
+        return upload, delete
+
+    state_path = os.path.join(dataset_dir, UPLOAD_STATE_FILE)
+    state = _load_upload_state(state_path, repo_id)
+    resumed = {path for path in upload if state.get(path) == local[path]["sha256"]}
+    if resumed:
+        logger.info(f"Resuming upload: {len(resumed)} files were already uploaded")
+
+    # Operations are collected in plan order so the commit is the same however uploads finish
+    operations = {}
+    files_done, bytes_done = 0, 0
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        futures = {
+            executor.submit(_upload_file, api, dataset_dir, repo_id, repo_type, path,
+                            path in resumed, max_retries, backoff_seconds): path
+            for path in upload
+        }
+        try:
+            for future in as_completed(futures):
+                path = futures[future]
+                operations[path] = future.result()
+                state[path] = local[path]["sha256"]
+                _save_upload_state(state_path, repo_id, state)
+
+                files_done += 1
+                bytes_done += local[path]["size"]
+                elapsed = time.perf_counter() - start_time
+                rate = bytes_done / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+                logger.info(f"Uploaded {path} ({files_done}/{len(upload)} files, "
+                            f"{bytes_done / 1024 / 1024:.1f} of {upload_bytes / 1024 / 1024:.1f} MB, {rate:.1f} MB/s)")
+                if progress is not None:
+                    progress(files_done, len(upload), bytes_done, upload_bytes, elapsed)
+        except Exception:
+            for pending in futures:
+                pending.cancel()
+            logger.error(f"Upload interrupted after {files_done} of {len(upload)} files; "
+                         f"run the push again to continue")
+            raise
+
+    commit_operations = [operations[path] for path in upload] + [CommitOperationDelete(path_in_repo=path) for path in delete]
+    _with_retries(
+        lambda: api.create_commit(
+            repo_id=repo_id,
+            repo_type=repo_type,
+            operations=commit_operations,
+            commit_message=commit_message
+        ),
+        f"Committing to {repo_id}", max_retries, backoff_seconds
+    )
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return upload, delete
+
 def push_to_huggingface(dataset_dir, 
                         repo_id=None, 
                         private=True, 
                         token=None, 
                         repo_type="dataset",
-                        commit_message="Upload voice dataset"):
+                        commit_message="Upload voice dataset",
+                        delta=False,
+                        api=None,
+                        workers=DEFAULT_UPLOAD_WORKERS,
+                        max_retries=DEFAULT_MAX_RETRIES,
+                        progress=None):
     """
     Push a dataset to the Hugging Face Hub
     
     Args:
-        dataset_dir: Local directory containing the dataset (with dataset.parquet)
+        dataset_dir: Local directory containing the dataset (with dataset.parquet,
+            or Parquet shards under data/)
         repo_id: ID for the repository (username/dataset-name format)
         private: Whether the repository should be private
         token: HuggingFace API token (if not provided, will use HUGGINGFACE_TOKEN env var)
         repo_type: Type of repository ("dataset" or "model")
         commit_message: Commit message for the upload
+        delta: Only upload files whose hashes differ from the repository, in one commit
+        api: HfApi-compatible object to use instead of creating one from the token
+        workers: Number of files uploaded at the same time (Parquet shards and delta uploads)
+        max_retries: Number of retries for each file before the upload fails
+        progress: Optional callback receiving (files_done, files_total, bytes_done, bytes_total, elapsed_seconds)
         
     Returns:
         success: Boolean indicating if push was successful
         repo_url: URL of the created repository if successful
     """
     try:
+        # Imported here because huggingface_hub and datasets take seconds to import
+        from huggingface_hub import HfApi
+        from voice_recorder.data_handlers.export_handler import list_parquet_files
+        
         # Check if token is provided or in environment variables
-        if token is None:
+        if token is None and api is None:
             token = os.environ.get("HUGGINGFACE_TOKEN")
             if token is None:
                 logger.error("No Hugging Face token provided and HUGGINGFACE_TOKEN not set in environment")
@@ -40,23 +313,25 @@ def push_to_huggingface(dataset_dir,
             return False, None
         
         # Initialize Hugging Face API
-        api = HfApi(token=token)
-        logger.info(f"Initialized Hugging Face API")
+        if api is None:
+            api = HfApi(token=token)
+            logger.info(f"Initialized Hugging Face API")
         
         # Check if dataset files exist
-        parquet_path = os.path.join(dataset_dir, "dataset.parquet")
-        if not os.path.exists(parquet_path):
-            logger.error(f"Dataset file not found: {parquet_path}")
+        data_files = list_parquet_files(dataset_dir)
+        if not data_files:
+            logger.error(f"Dataset files not found: neither {os.path.join(dataset_dir, 'dataset.parquet')} "
+                         f"nor Parquet shards in {os.path.join(dataset_dir, 'data')}")
             return False, None
+        sharded = os.path.basename(data_files[0]) != "dataset.parquet"
         
         # Create the repository if it doesn't exist
         try:
             logger.info(f"Creating repository: {repo_id}")
-            create_repo(
+            api.create_repo(
                 repo_id=repo_id,
                 repo_type=repo_type,
                 private=private,
-                token=token,
                 exist_ok=True
             )
         except Exception as e:
@@ -66,8 +341,18 @@ def push_to_huggingface(dataset_dir,
         # Upload the dataset
         logger.info(f"Uploading dataset from {dataset_dir} to {repo_id}")
         
+        if delta or sharded:
+            # Shards are uploaded as they are, several files at a time, in a
+            # single commit that also removes shards left by earlier uploads
+            push_delta(api, dataset_dir, repo_id, repo_type=repo_type, commit_message=commit_message,
+                       only_changed=delta, workers=workers, max_retries=max_retries, progress=progress)
+            repo_url = f"https://huggingface.co/datasets/{repo_id}"
+            logger.info(f"Dataset successfully uploaded to {repo_url}")
+            return True, repo_url
+        
         # Load and push the dataset
-        dataset = load_dataset("parquet", data_files={"train": parquet_path})
+        from datasets import load_dataset
+        dataset = load_dataset("parquet", data_files={"train": data_files})
         dataset.push_to_hub(
             repo_id=repo_id,
             private=private,
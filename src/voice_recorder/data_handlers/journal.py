@@ -0,0 +1,212 @@
+import pandas as pd
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fold the journal into the CSV snapshot once it grows past this many bytes
+COMPACT_THRESHOLD_BYTES = 256 * 1024
+
+# Guards journal appends, snapshot reads and the rename/replace steps of compaction
+lock = threading.RLock()
+# Held for the whole duration of a compaction; never acquire it while holding lock
+_compaction_lock = threading.Lock()
+
+def journal_path(csv_path):
+    """Path of the append-only journal that belongs to a CSV snapshot"""
+    return f"{csv_path}.journal"
+
+def compacting_path(csv_path):
+    """Path the journal is moved to while it is being folded into the snapshot"""
+    return f"{csv_path}.journal.compacting"
+
+def normalize_columns(df):
+    """Make sure the audio column can hold file names even when it was read as all-empty"""
+    if "audio" in df.columns:
+        df["audio"] = df["audio"].astype(object)
+    return df
+
+def append_entries(csv_path, entries):
+    """
+    Append mutation entries to the journal in a single write
+
+    Args:
+        csv_path: Path to the CSV snapshot the journal belongs to
+        entries: List of entry dicts ("op" is one of add, record or clear)
+
+    Returns:
+        bool: True if the entries were written, False otherwise
+    """
+    payload = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    try:
+        with lock:
+            with open(journal_path(csv_path), "a", encoding="utf-8") as f:
+                f.write(payload)
+                f.flush()
+        return True
+    except Exception as e:
+        logger.error(f"Error appending to journal for {csv_path}: {e}")
+        return False
+
+def _read_journal_file(path):
+    """Read entries from one journal file, skipping a torn trailing line"""
+    entries = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable journal line {line_number} in {path}")
+    except FileNotFoundError:
+        pass
+    return entries
+
+def read_entries(csv_path):
+    """
+    Read all pending journal entries in the order they were written
+
+    Args:
+        csv_path: Path to the CSV snapshot the journal belongs to
+
+    Returns:
+        list: Entries from an in-progress compaction followed by the live journal
+    """
+    with lock:
+        return _read_journal_file(compacting_path(csv_path)) + _read_journal_file(journal_path(csv_path))
+
+def apply_entries(df, entries):
+    """
+    Replay journal entries on top of a DataFrame
+
+    Every entry addresses its row by index and sets absolute values, so
+    replaying entries that are already part of the snapshot is harmless.
+    An add entry never overwrites a row that already exists.
+
+    Args:
+        df: DataFrame to update in place (pass a copy to keep the original)
+        entries: Journal entries to apply
+
+    Returns:
+        pd.DataFrame: DataFrame with the entries applied
+    """
+    new_rows = {}
+    for entry in entries:
+        op = entry.get("op")
+        index = entry.get("index")
+        if op == "add":
+            values = {"text": entry["text"], "audio": None, "recorded": False}
+        elif op == "record":
+            values = {"audio": entry["audio"], "recorded": True}
+        elif op == "clear":
+            values = {"audio": None, "recorded": False}
+        else:
+            logger.warning(f"Ignoring unknown journal entry: {entry}")
+            continue
+
+        if op == "add" and (index in new_rows or index in df.index):
+            existing = new_rows[index]["text"] if index in new_rows else df.loc[index, "text"]
+            if existing != entry["text"]:
+                logger.warning(f"Ignoring add entry for index {index}, which already holds another text: {entry}")
+            continue
+        if index in new_rows:
+            new_rows[index].update(values)
+        elif index in df.index:
+            for column, value in values.items():
+                df.loc[index, column] = value
+        elif op == "add":
+            new_rows[index] = values
+        else:
+            logger.debug(f"Ignoring journal entry for unknown index {index}: {entry}")
+
+    if new_rows:
+        df = pd.concat([df, pd.DataFrame.from_dict(new_rows, orient="index")])
+    return df
+
+def has_pending(csv_path):
+    """Check whether there are journal entries not yet folded into the snapshot"""
+    return os.path.exists(journal_path(csv_path)) or os.path.exists(compacting_path(csv_path))
+
+def discard(csv_path):
+    """Remove the journal after the snapshot was rewritten in full"""
+    with lock:
+        for path in (compacting_path(csv_path), journal_path(csv_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+def compact(csv_path):
+    """
+    Fold the journal into the CSV snapshot
+
+    The journal is moved aside first so new entries can keep being appended
+    while the snapshot is rebuilt. A crash at any point leaves the entries
+    either in the journal or in the snapshot, and replaying them is idempotent.
+    If another compaction is running, this waits for it to finish first.
+
+    Args:
+        csv_path: Path to the CSV snapshot
+
+    Returns:
+        bool: True if compaction succeeded or there was nothing to do
+    """
+    with _compaction_lock:
+        return _compact(csv_path)
+
+def _compact(csv_path):
+    with lock:
+        pending_path = compacting_path(csv_path)
+        if not os.path.exists(pending_path):
+            if not os.path.exists(journal_path(csv_path)):
+                return True
+            os.replace(journal_path(csv_path), pending_path)
+
+    tmp_path = f"{csv_path}.tmp"
+    try:
+        entries = _read_journal_file(pending_path)
+        try:
+            df = pd.read_csv(csv_path)
+        except FileNotFoundError:
+            df = pd.DataFrame(columns=["text", "audio", "recorded"])
+        df = normalize_columns(df)
+        df = apply_entries(df, entries)
+        df.to_csv(tmp_path, index=False)
+
+        with lock:
+            if not os.path.exists(pending_path):
+                # The snapshot was rewritten in full while we were compacting
+                os.remove(tmp_path)
+                return True
+            os.replace(tmp_path, csv_path)
+            os.remove(pending_path)
+        logger.info(f"Compacted {len(entries)} journal entries into {csv_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error compacting journal for {csv_path}: {e}")
+        return False
+
+def maybe_compact(csv_path, threshold=COMPACT_THRESHOLD_BYTES):
+    """
+    Start a background compaction once the journal is larger than the threshold
+
+    Args:
+        csv_path: Path to the CSV snapshot
+        threshold: Journal size in bytes that triggers compaction
+
+    Returns:
+        bool: True if a compaction was started
+    """
+    try:
+        size = os.path.getsize(journal_path(csv_path))
+    except OSError:
+        return False
+    if size < threshold or _compaction_lock.locked():
+        return False
+
+    logger.info(f"Journal for {csv_path} reached {size} bytes, compacting in background")
+    threading.Thread(target=compact, args=(csv_path,), daemon=True).start()
+    return True
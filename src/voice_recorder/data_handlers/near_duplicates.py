@@ -0,0 +1,416 @@
+import numpy as np
+import json
+import logging
+import os
+import threading
+
+from voice_recorder.data_handlers.text_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Texts are compared by the sets of their character n-grams
+NGRAM = 5
+# MinHash signature length, split into LSH bands of ROWS values each
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity of n-gram sets from which texts count as near-duplicates
+DEFAULT_THRESHOLD = 0.8
+# Inserts kept in unsorted buckets before the sorted band arrays are rebuilt
+MAX_PENDING = 50000
+
+# Fixed hash parameters, so signatures stay comparable across processes and runs
+_rng = np.random.default_rng(0x6E656172)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_OFFSETS = _rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+_POWERS = np.array([1000003 ** (NGRAM - 1 - i) % 2 ** 64 for i in range(NGRAM)], dtype=np.uint64)
+
+# Loaded indexes: path -> (file signature, NearDuplicateIndex)
+_indexes = {}
+_lock = threading.Lock()
+
+def minhash(text):
+    """
+    MinHash signature of the character n-grams of a normalized text
+
+    Each value keeps the top 16 bits of a 32-bit multiply-shift hash minimum,
+    so a signature takes 64 bytes and each band of 4 values packs into one
+    64-bit key.
+
+    Args:
+        text: Text to sign
+
+    Returns:
+        np.ndarray: NUM_PERM uint16 values
+    """
+    codes = np.frombuffer(normalize_text(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < NGRAM:
+        codes = np.concatenate([codes, np.zeros(NGRAM - len(codes), dtype=np.uint64)])
+    shingles = np.unique(np.lib.stride_tricks.sliding_window_view(codes, NGRAM) @ _POWERS)
+    hashes = (_MULTIPLIERS[:, None] * shingles[None, :] + _OFFSETS[:, None]) >> np.uint64(32)
+    return (hashes.min(axis=1) >> np.uint64(16)).astype(np.uint16)
+
+def minhash_batch(texts, chunk_shingles=1 << 15):
+    """
+    MinHash signatures of many texts at once, equal to minhash of each text
+
+    The n-grams of all texts are hashed together in chunks of about
+    chunk_shingles n-grams, and the minimum of each text is taken with
+    np.minimum.reduceat, so there is no per-text NumPy work.
+
+    Args:
+        texts: Texts to sign
+        chunk_shingles: Number of n-grams hashed per chunk, which bounds memory use
+
+    Returns:
+        np.ndarray: Signatures, shape (len(texts), NUM_PERM), uint16
+    """
+    encoded = []
+    for text in texts:
+        data = normalize_text(text).encode("utf-32-le")
+        if len(data) < NGRAM * 4:
+            data += bytes(NGRAM * 4 - len(data))
+        encoded.append(data)
+    signatures = np.zeros((len(encoded), NUM_PERM), dtype=np.uint16)
+    start = 0
+    while start < len(encoded):
+        # Take texts until the chunk holds about chunk_shingles n-grams
+        end, count = start, 0
+        while end < len(encoded) and (end == start or count < chunk_shingles):
+            count += len(encoded[end]) // 4 - NGRAM + 1
+            end += 1
+        lengths = np.array([len(data) // 4 for data in encoded[start:end]], dtype=np.int64)
+        codes = np.frombuffer(b"".join(encoded[start:end]), dtype=np.uint32).astype(np.uint64)
+        windows = np.lib.stride_tricks.sliding_window_view(codes, NGRAM) @ _POWERS
+        # Keep the windows that start and end within one text
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        counts = lengths - NGRAM + 1
+        valid = np.repeat(offsets, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+        shingles = windows[valid]
+        # The shift is monotonic, so it is applied after taking the minimum
+        hashes = np.multiply(_MULTIPLIERS[:, None], shingles[None, :])
+        hashes += _OFFSETS[:, None]
+        starts = np.cumsum(counts) - counts
+        signatures[start:end] = (np.minimum.reduceat(hashes, starts, axis=1) >> np.uint64(48)).astype(np.uint16).T
+        start = end
+    return signatures
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of text signatures
+
+    Every band of a signature is a 64-bit key. Keys are held in one sorted
+    array per band, so a lookup is a binary search per band, plus a small
+    dict of keys inserted since the arrays were last sorted. Candidates
+    sharing a band are confirmed by comparing whole signatures. Ids are the
+    positions of the texts in insertion order.
+    """
+
+    def __init__(self, signatures=None):
+        # Signatures live in a buffer that grows geometrically, so inserts do not copy the whole index
+        self._buffer = np.zeros((0, NUM_PERM), dtype=np.uint16)
+        self._size = 0
+        self._keys = [np.zeros(0, dtype=np.uint64) for _ in range(BANDS)]
+        self._ids = [np.zeros(0, dtype=np.int64) for _ in range(BANDS)]
+        self._pending = [{} for _ in range(BANDS)]
+        self._pending_count = 0
+        if signatures is not None and len(signatures):
+            self._buffer = np.ascontiguousarray(signatures, dtype=np.uint16).reshape(-1, NUM_PERM)
+            self._size = len(self._buffer)
+            self._sort()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def signatures(self):
+        """Signatures in id order, shape (len, NUM_PERM)"""
+        return self._buffer[:self._size]
+
+    def _sort(self):
+        """Rebuild the sorted band arrays from every signature"""
+        bands = self.signatures.view(np.uint64)
+        for band in range(BANDS):
+            order = np.argsort(bands[:, band], kind="stable")
+            self._keys[band] = bands[order, band]
+            self._ids[band] = order
+        self._pending = [{} for _ in range(BANDS)]
+        self._pending_count = 0
+
+    def add(self, signatures):
+        """
+        Insert signatures
+
+        Args:
+            signatures: Array of shape (n, NUM_PERM), or a single signature
+
+        Returns:
+            range: Ids given to the new signatures
+        """
+        signatures = np.ascontiguousarray(signatures, dtype=np.uint16).reshape(-1, NUM_PERM)
+        first = self._size
+        if first + len(signatures) > len(self._buffer):
+            grown = np.zeros((max(first + len(signatures), len(self._buffer) * 3 // 2, 1024), NUM_PERM), dtype=np.uint16)
+            grown[:first] = self._buffer[:first]
+            self._buffer = grown
+        self._buffer[first:first + len(signatures)] = signatures
+        self._size += len(signatures)
+        if self._pending_count + len(signatures) > MAX_PENDING:
+            self._sort()
+        else:
+            for offset, keys in enumerate(signatures.view(np.uint64)):
+                for band, key in enumerate(keys.tolist()):
+                    self._pending[band].setdefault(key, []).append(first + offset)
+            self._pending_count += len(signatures)
+        return range(first, self._size)
+
+    def query(self, signature, threshold=DEFAULT_THRESHOLD, limit=None):
+        """
+        Find indexed signatures similar to one signature
+
+        Args:
+            signature: Signature to look up
+            threshold: Minimum estimated Jaccard similarity
+            limit: Consider only ids below this one, None for all
+
+        Returns:
+            list: (id, similarity) tuples, most similar first
+        """
+        # Keys stay NumPy uint64 for the binary search; a Python int would
+        # make searchsorted convert the whole band array
+        keys = np.ascontiguousarray(signature, dtype=np.uint16).view(np.uint64)
+        candidates = []
+        for band, key in enumerate(keys):
+            band_keys = self._keys[band]
+            start = band_keys.searchsorted(key, side="left")
+            if start < len(band_keys) and band_keys[start] == key:
+                end = band_keys.searchsorted(key, side="right")
+                candidates.append(self._ids[band][start:end])
+            pending = self._pending[band].get(int(key))
+            if pending:
+                candidates.append(np.array(pending, dtype=np.int64))
+        if not candidates:
+            return []
+        ids = np.unique(np.concatenate(candidates))
+        if limit is not None:
+            ids = ids[ids < limit]
+        similarity = (self._buffer[ids] == np.asarray(signature, dtype=np.uint16)).mean(axis=1)
+        matches = similarity >= threshold
+        order = np.argsort(-similarity[matches], kind="stable")
+        return [(int(i), float(s)) for i, s in zip(ids[matches][order], similarity[matches][order])]
+
+    def find(self, text, threshold=DEFAULT_THRESHOLD):
+        """Find indexed texts similar to a text; see query"""
+        return self.query(minhash(text), threshold)
+
+def index_path(csv_path):
+    """Path of the near-duplicate index that belongs to a dataset"""
+    return f"{csv_path}.minhash"
+
+def signature_path(csv_path):
+    """Path of the file holding the dataset signature the index was last in step with"""
+    return f"{csv_path}.minhash.signature"
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _read_dataset_signature(csv_path):
+    try:
+        with open(signature_path(csv_path), "r", encoding="ascii") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_dataset_signature(csv_path, dataset_signature):
+    path = signature_path(csv_path)
+    if dataset_signature is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="ascii") as f:
+        json.dump(dataset_signature, f)
+    os.replace(tmp_path, path)
+
+def _as_stored(dataset_signature):
+    """Signature in the form it takes after a round trip through JSON"""
+    return None if dataset_signature is None else json.loads(json.dumps(dataset_signature))
+
+def _save(csv_path, signatures, dataset_signature):
+    """Replace the index file and its dataset signature; the caller holds _lock"""
+    path = index_path(csv_path)
+    signatures = np.ascontiguousarray(signatures, dtype=np.uint16).reshape(-1, NUM_PERM)
+    tmp_path = f"{path}.tmp"
+    signatures.tofile(tmp_path)
+    os.replace(tmp_path, path)
+    _write_dataset_signature(csv_path, dataset_signature)
+    index = NearDuplicateIndex(signatures)
+    _indexes[os.path.abspath(path)] = (_file_signature(path), index)
+    return index
+
+def load_index(csv_path, texts=None, dataset_signature=None):
+    """
+    Load the near-duplicate index of a dataset, rebuilding it if it is missing or out of date
+
+    Signatures are stored one per dataset row, in row order, in a flat
+    binary file next to the dataset. The index is out of date when its
+    length does not match the number of rows in texts, or when the dataset
+    files changed since the index was last brought in step with them.
+
+    Args:
+        csv_path: Path to the dataset
+        texts: All texts currently in the dataset, used to check and rebuild the index
+        dataset_signature: Signature of the dataset files texts was read from
+            (as csv_handler computes it), None to check the row count only
+
+    Returns:
+        NearDuplicateIndex: Index whose ids are dataset row positions
+    """
+    path = index_path(csv_path)
+    key = os.path.abspath(path)
+    with _lock:
+        signature = _file_signature(path)
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == signature:
+            index = cached[1]
+        elif signature is not None:
+            index = NearDuplicateIndex(np.fromfile(path, dtype=np.uint16))
+        else:
+            index = None
+
+        stale = texts is not None and (index is None or len(index) != len(texts))
+        if texts is not None and dataset_signature is not None and not stale:
+            stale = _read_dataset_signature(csv_path) != _as_stored(dataset_signature)
+        if stale:
+            logger.info(f"Rebuilding near-duplicate index for {csv_path} ({len(texts)} texts)")
+            return _save(csv_path, minhash_batch(texts), dataset_signature)
+        if index is None:
+            index = NearDuplicateIndex()
+
+        _indexes[key] = (signature, index)
+        return index
+
+def save_index(csv_path, signatures, dataset_signature=None):
+    """
+    Replace the index of a dataset with known signatures, such as those of a fresh import
+
+    Args:
+        csv_path: Path to the dataset
+        signatures: One signature per dataset row, in row order
+        dataset_signature: Signature of the dataset files the rows were written to
+    """
+    with _lock:
+        _save(csv_path, signatures, dataset_signature)
+
+def record_commit(csv_path, previous_signature, dataset_signature, texts=(), signatures=None):
+    """
+    Keep the index in step with a write to the dataset
+
+    The signatures of added texts are appended and the new dataset signature
+    is stored, but only if the index was in step with the dataset before the
+    write; otherwise it is left to be rebuilt on next use.
+
+    Args:
+        csv_path: Path to the dataset
+        previous_signature: Signature of the dataset files before the write
+        dataset_signature: Signature of the dataset files after the write
+        texts: Texts of the added rows, in row order
+        signatures: Signatures of the added rows if already computed, instead of texts
+    """
+    path = index_path(csv_path)
+    key = os.path.abspath(path)
+    with _lock:
+        if not os.path.exists(path) or _read_dataset_signature(csv_path) != _as_stored(previous_signature):
+            return
+        if signatures is None:
+            signatures = minhash_batch(texts)
+        signatures = np.ascontiguousarray(signatures, dtype=np.uint16).reshape(-1, NUM_PERM)
+        cached = _indexes.get(key)
+        in_sync = cached is not None and cached[0] == _file_signature(path)
+        if len(signatures):
+            with open(path, "ab") as f:
+                signatures.tofile(f)
+        _write_dataset_signature(csv_path, dataset_signature)
+        if in_sync:
+            cached[1].add(signatures)
+            _indexes[key] = (_file_signature(path), cached[1])
+        else:
+            _indexes.pop(key, None)
+
+def discard(csv_path):
+    """Remove the index after the dataset was replaced; it is rebuilt on next use"""
+    path = index_path(csv_path)
+    with _lock:
+        _indexes.pop(os.path.abspath(path), None)
+        for stale_path in (path, signature_path(csv_path)):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+def suggestion_filter(index, threshold=DEFAULT_THRESHOLD):
+    """
+    Predicate that rejects texts close to an indexed text or to a text it accepted before
+
+    Args:
+        index: Index of the texts already in the dataset
+        threshold: Minimum estimated Jaccard similarity of a near-duplicate
+
+    Returns:
+        callable: text -> True if the text should be rejected
+    """
+    accepted = NearDuplicateIndex()
+    lock = threading.Lock()
+
+    def reject(text):
+        signature = minhash(text)
+        with lock:
+            if index.query(signature, threshold) or accepted.query(signature, threshold):
+                return True
+            accepted.add(signature)
+            return False
+
+    return reject
+
+def duplicate_groups(index, threshold=DEFAULT_THRESHOLD):
+    """
+    Group indexed texts that are near-duplicates of each other
+
+    Each text is linked to the earlier texts it is similar to, and linked
+    texts are merged into groups (so a group can hold texts that are only
+    similar through a chain).
+
+    Args:
+        index: Index to examine
+        threshold: Minimum estimated Jaccard similarity
+
+    Returns:
+        list: Groups as lists of (id, similarity to the first id) tuples,
+            sorted by first id; texts without near-duplicates are left out
+    """
+    parent = list(range(len(index)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = index.signatures
+    for i in range(len(index)):
+        for j, _ in index.query(signatures[i], threshold, limit=i):
+            a, b = root(i), root(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    members = {}
+    for i in range(len(index)):
+        members.setdefault(root(i), []).append(i)
+    groups = []
+    for first, ids in sorted(members.items()):
+        if len(ids) > 1:
+            similarity = (signatures[ids] == signatures[first]).mean(axis=1)
+            groups.append([(i, float(s)) for i, s in zip(ids, similarity)])
+    return groups
@@ -0,0 +1,402 @@
+import heapq
+import logging
+import os
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+from voice_recorder.data_handlers.text_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Typical reading speed, used to estimate how long a text takes to record
+CHARS_PER_SECOND = 15.0
+# Length of the recommended queue shown on the record page
+QUEUE_LENGTH = 10
+# Texts scored per vectorized block while building the schedule
+BLOCK_SIZE = 20000
+# Texts compared on every update to notice that the dataset was replaced
+CHECK_SAMPLES = 16
+
+# Padding value in unit matrices; no unit reaches it (characters take 21 bits)
+_PAD = np.uint64(2 ** 63)
+# Row states
+_POOL, _QUEUED, _DONE = 0, 1, 2
+
+# Schedulers shared by every session in this process: path -> RecordingScheduler
+_schedulers = {}
+_lock = threading.Lock()
+
+def text_units(text):
+    """
+    Coverage units of a text: its characters and character pairs
+
+    The text is normalized as for duplicate detection and framed by spaces,
+    so pairs at word starts and ends count as well. Each unit is an int:
+    the code point of a character, or two code points packed into 42 bits.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        set: Unit ints
+    """
+    codes = [ord(char) for char in f" {normalize_text(text)} "]
+    return set(codes) | {first << 21 | second for first, second in zip(codes, codes[1:])}
+
+def _normalize_texts(texts):
+    """normalize_text for many texts, with the Unicode steps run once over a joined string"""
+    texts = [str(text) for text in texts]
+    normalized = unicodedata.normalize("NFKC", "\x00".join(texts)).casefold().split("\x00")
+    if len(normalized) != len(texts):
+        # A text contained the separator
+        return [normalize_text(text) for text in texts]
+    # Splitting on whitespace collapses runs and strips the ends, like normalize_text
+    return [" ".join(text.split()) for text in normalized]
+
+def _unit_matrix(normalized):
+    """
+    Units of normalized texts, one row per text
+
+    Every row holds the distinct units of a text in sorted order, followed
+    by _PAD; sorting short rows is much faster than one sort of all units.
+
+    Args:
+        normalized: Normalized texts, best of similar lengths
+
+    Returns:
+        np.ndarray: uint64 matrix of shape (len(normalized), units per row)
+    """
+    width = max(map(len, normalized), default=0) + 2
+    padded = "".join([f" {text} ".ljust(width, "\x00") for text in normalized])
+    chars = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).reshape(len(normalized), width).astype(np.uint64)
+    pairs = (chars[:, :-1] << np.uint64(21)) | chars[:, 1:]
+    units = np.concatenate([np.where(chars == 0, _PAD, chars), np.where(chars[:, 1:] == 0, _PAD, pairs)], axis=1)
+    units.sort(axis=1)
+    repeated = units[:, 1:] == units[:, :-1]
+    units[:, 1:][repeated] = _PAD
+    return units
+
+class RecordingScheduler:
+    """
+    Recording order that maximizes coverage gained per recorded minute
+
+    Coverage is counted over characters and character pairs (see
+    text_units). A unit already recorded n times is worth 1 / (n + 1), so
+    rare characters and pairs are preferred without ignoring common ones.
+    The score of a text is the worth of its units divided by its estimated
+    length in minutes.
+
+    Scores only go down as recordings are added, so the order is kept with
+    lazy greedy selection: every text starts with the score it had when
+    the scheduler was built, held in one sorted array, and a text is
+    rescored only when it reaches the front. Texts rescored since are kept
+    in a heap, and a rescored text that still beats every other bound is
+    the best one. Picking the next text therefore rescores a handful of
+    texts, however many are unrecorded.
+
+    Rows are dataset positions; rows may be appended and recorded, but a
+    recording that is removed again requires a new scheduler.
+    """
+
+    # Dataset version (see csv_handler.load_changes) the scheduler is up to date with
+    data_version = None
+
+    def __init__(self, texts, recorded, index=None):
+        """
+        Args:
+            texts: Every text in the dataset, in row order
+            recorded: Boolean array, True for recorded rows
+            index: Row labels to report, defaults to positions
+        """
+        self._texts = list(texts)
+        self._index = np.arange(len(self._texts)) if index is None else np.asarray(index)
+        recorded = np.asarray(recorded, dtype=bool)
+        self._status = np.where(recorded, _DONE, _POOL).astype(np.int8)
+        self._counts = {}
+        self._version = 0
+        self._heap = []
+        self._plan = None
+        self._sorted_index = bool((np.diff(self._index) > 0).all()) if self._index.dtype.kind in "iu" else False
+
+        # Count the units of recorded texts in one pass
+        done = np.flatnonzero(recorded)
+        if len(done):
+            units = np.concatenate([block[block != _PAD] for block, _, _ in self._blocks(done)])
+            keys, counts = np.unique(units, return_counts=True)
+            self._counts = dict(zip(keys.tolist(), counts.tolist()))
+
+        pool = np.flatnonzero(~recorded)
+        self._minutes = np.ones(len(self._texts))
+        self._scores = np.zeros(len(self._texts))
+        self._scores[pool] = self._score_rows(pool)
+        self._order = pool[np.argsort(-self._scores[pool], kind="stable")]
+        self._next = 0
+
+    def __len__(self):
+        """Number of rows not recorded"""
+        return int((self._status != _DONE).sum())
+
+    def _blocks(self, rows):
+        """Yield (unit matrix, positions in rows, normalized lengths) for blocks of rows of similar text lengths"""
+        lengths = np.fromiter((len(str(self._texts[row])) for row in rows.tolist()), dtype=np.int64, count=len(rows))
+        order = np.argsort(lengths, kind="stable")
+        for start in range(0, len(rows), BLOCK_SIZE):
+            positions = order[start:start + BLOCK_SIZE]
+            normalized = _normalize_texts([self._texts[row] for row in rows[positions].tolist()])
+            yield _unit_matrix(normalized), positions, np.fromiter(map(len, normalized), dtype=np.float64, count=len(positions))
+
+    def _score_rows(self, rows):
+        """Score many rows against the current counts, vectorized, and set their estimated lengths"""
+        scores = np.zeros(len(rows))
+        keys = np.fromiter(self._counts, dtype=np.uint64, count=len(self._counts))
+        counts = np.fromiter(self._counts.values(), dtype=np.float64, count=len(self._counts))
+        order = np.argsort(keys)
+        keys, counts = keys[order], counts[order]
+        for units, positions, lengths in self._blocks(rows):
+            valid = units != _PAD
+            values = units[valid]
+            if len(keys):
+                position = np.minimum(keys.searchsorted(values), len(keys) - 1)
+                worth = 1.0 / (1.0 + np.where(keys[position] == values, counts[position], 0.0))
+            else:
+                worth = np.ones(len(values))
+            # Valid units come out row by row, so their rows follow from the counts per row
+            owners = np.repeat(np.arange(len(positions)), valid.sum(axis=1))
+            gains = np.bincount(owners, weights=worth, minlength=len(positions))
+            minutes = np.maximum(lengths, 1) / CHARS_PER_SECOND / 60
+            self._minutes[rows[positions]] = minutes
+            scores[positions] = gains / minutes
+        return scores
+
+    def _score(self, row, overlay):
+        """Score of one row against the counts plus planned units"""
+        gain = sum(1.0 / (1 + self._counts.get(unit, 0) + overlay.get(unit, 0)) for unit in text_units(self._texts[row]))
+        return gain / self._minutes[row]
+
+    def _select(self, heap, position, moved, exclude, overlay, stamp):
+        """
+        Lazy greedy step: find the row with the best score
+
+        The row is left on top of heap with its exact score. When planning
+        ahead, heap is a copy, and moved and exclude collect the rows taken
+        from the sorted array and the rows already planned, so the shared
+        state is not changed.
+
+        Returns:
+            tuple: (row or None, score, new position in the sorted array)
+        """
+        while True:
+            while position < len(self._order) and (self._status[self._order[position]] != _POOL
+                                                   or (moved is not None and self._order[position] in moved)):
+                position += 1
+            while heap and (self._status[heap[0][1]] == _DONE or heap[0][1] in exclude):
+                heapq.heappop(heap)
+            pool_bound = self._scores[self._order[position]] if position < len(self._order) else -np.inf
+            if not heap and pool_bound == -np.inf:
+                return None, 0.0, position
+
+            if heap and -heap[0][0] >= pool_bound:
+                negative_score, row, entry_stamp = heap[0]
+                if entry_stamp == stamp:
+                    return row, -negative_score, position
+                heapq.heappop(heap)
+            else:
+                row = int(self._order[position])
+                position += 1
+                if moved is None:
+                    self._status[row] = _QUEUED
+                else:
+                    moved.add(row)
+            heapq.heappush(heap, (-self._score(row, overlay), row, stamp))
+
+    def recommend(self, count=QUEUE_LENGTH):
+        """
+        Next texts to record, best first
+
+        Each text after the first is picked as if the ones before it had
+        been recorded. The plan is kept until the dataset changes.
+
+        Args:
+            count: Number of texts to plan
+
+        Returns:
+            list: (row label, text, new units, estimated seconds) tuples
+        """
+        if self._plan is not None and self._plan[0] == (self._version, count):
+            return self._plan[1]
+
+        plan = []
+        row, _, self._next = self._select(self._heap, self._next, None, (), {}, self._version)
+        heap, position, moved, exclude, overlay = list(self._heap), self._next, set(), set(), {}
+        step = 0
+        while row is not None and len(plan) < count:
+            units = text_units(self._texts[row])
+            new_units = sum(1 for unit in units if not self._counts.get(unit) and not overlay.get(unit))
+            plan.append((self._index[row].item(), self._texts[row], new_units, float(self._minutes[row] * 60)))
+            exclude.add(row)
+            for unit in units:
+                overlay[unit] = overlay.get(unit, 0) + 1
+            step += 1
+            if len(plan) < count:
+                row, _, position = self._select(heap, position, moved, exclude, overlay, (self._version, step))
+        self._plan = ((self._version, count), plan)
+        return plan
+
+    def mark_recorded(self, rows):
+        """Count the units of newly recorded rows and drop them from the order"""
+        for row in rows:
+            if self._status[row] == _DONE:
+                continue
+            self._status[row] = _DONE
+            for unit in text_units(self._texts[row]):
+                self._counts[unit] = self._counts.get(unit, 0) + 1
+            self._version += 1
+            self._plan = None
+
+    def update(self, texts, recorded, index=None):
+        """
+        Catch up with the dataset
+
+        Appended rows are scored and newly recorded rows are counted.
+
+        Args:
+            texts: Every text in the dataset, in row order
+            recorded: Boolean array, True for recorded rows
+            index: Row labels, defaults to positions
+
+        Returns:
+            bool: False if the scheduler cannot follow the change (rows
+                removed, replaced or no longer recorded) and must be rebuilt
+        """
+        known = len(self._texts)
+        recorded = np.asarray(recorded, dtype=bool)
+        if len(texts) < known or ((self._status == _DONE) & ~recorded[:known]).any():
+            return False
+        for row in np.linspace(0, known - 1, min(known, CHECK_SAMPLES)).astype(int).tolist():
+            if str(texts[row]) != str(self._texts[row]):
+                return False
+
+        self.mark_recorded(np.flatnonzero(recorded[:known] & (self._status != _DONE)).tolist())
+        if len(texts) > known:
+            labels = np.arange(known, len(texts)) if index is None else np.asarray(index)[known:]
+            self._append(texts[known:], labels, recorded[known:])
+        return True
+
+    def apply_changes(self, entries):
+        """
+        Catch up with entries committed to the dataset (as from csv_handler.load_changes)
+
+        Only the rows the entries name are touched, so a take or an added
+        text costs the same however large the dataset is.
+
+        Args:
+            entries: Journal entries in commit order
+
+        Returns:
+            bool: False if an entry cannot be followed (a recording was
+                cleared or a row is unknown) and the scheduler must catch up
+                with update or be rebuilt
+        """
+        added = {}
+        for entry in entries:
+            op = entry.get("op")
+            if op == "add" and entry["index"] not in added and self._row(entry["index"]) is None:
+                added[entry["index"]] = entry["text"]
+                continue
+            if added:
+                self._append(list(added.values()), list(added), np.zeros(len(added), dtype=bool))
+                added = {}
+            row = self._row(entry.get("index"))
+            if op != "record" or row is None:
+                return False
+            self.mark_recorded([row])
+        if added:
+            self._append(list(added.values()), list(added), np.zeros(len(added), dtype=bool))
+        return True
+
+    def _row(self, label):
+        """Position of a row label, or None if it is not known"""
+        if not self._sorted_index or label is None:
+            return None
+        row = int(self._index.searchsorted(label))
+        return row if row < len(self._index) and self._index[row] == label else None
+
+    def _append(self, texts, labels, recorded):
+        """Add rows at the end, counting the recorded ones and scoring the others"""
+        known = len(self._texts)
+        labels = np.asarray(labels)
+        self._sorted_index = (self._sorted_index and labels.dtype.kind in "iu"
+                              and bool((np.diff(labels) > 0).all()) and (not known or labels[0] > self._index[-1]))
+        self._texts.extend(texts)
+        self._index = np.concatenate([self._index, labels])
+        self._status = np.concatenate([self._status, np.full(len(labels), _POOL, dtype=np.int8)])
+        self._minutes = np.concatenate([self._minutes, np.ones(len(labels))])
+        self._scores = np.concatenate([self._scores, np.zeros(len(labels))])
+        new_rows = np.arange(known, len(self._texts))
+        self.mark_recorded(new_rows[recorded].tolist())
+        pool = new_rows[~recorded]
+        self._scores[pool] = self._score_rows(pool)
+        # New rows join the heap with exact scores
+        for row in pool.tolist():
+            self._status[row] = _QUEUED
+            heapq.heappush(self._heap, (-self._scores[row], row, self._version))
+        self._plan = None
+
+def get_scheduler(csv_path):
+    """
+    Scheduler of a dataset, built on first use and then kept up to date
+
+    Changes committed by this process are followed entry by entry. The
+    whole dataset is compared only when it was read from disk again (after
+    another process wrote to it or the journal was compacted).
+
+    Args:
+        csv_path: Path to the dataset
+
+    Returns:
+        RecordingScheduler: Scheduler whose row labels are the dataset index
+    """
+    # Imported here because csv_handler imports this module
+    from voice_recorder.data_handlers.csv_handler import load_changes
+
+    key = os.path.abspath(csv_path)
+    with _lock:
+        scheduler = _schedulers.get(key)
+        df, version, entries = load_changes(csv_path, scheduler.data_version if scheduler is not None else None)
+        if scheduler is not None and entries is not None and scheduler.apply_changes(entries):
+            scheduler.data_version = version
+            return scheduler
+
+        texts = df["text"].tolist()
+        recorded = (df["recorded"] == True).to_numpy()
+        if scheduler is None or not scheduler.update(texts, recorded, df.index.to_numpy()):
+            start_time = time.perf_counter()
+            scheduler = RecordingScheduler(texts, recorded, df.index.to_numpy())
+            logger.info(f"Built recording order for {csv_path}: {len(scheduler)} unrecorded texts "
+                        f"in {time.perf_counter() - start_time:.2f}s")
+            _schedulers[key] = scheduler
+        scheduler.data_version = version
+        return scheduler
+
+def recommend(csv_path, count=QUEUE_LENGTH):
+    """
+    Next texts to record for the widest coverage per recorded minute
+
+    Args:
+        csv_path: Path to the dataset
+        count: Number of texts to return
+
+    Returns:
+        list: (row label, text, new units, estimated seconds) tuples, best first
+    """
+    scheduler = get_scheduler(csv_path)
+    with _lock:
+        return scheduler.recommend(count)
+
+def discard(csv_path):
+    """Drop the scheduler of a dataset after it was replaced; it is rebuilt on next use"""
+    with _lock:
+        _schedulers.pop(os.path.abspath(csv_path), None)
@@ -0,0 +1,190 @@
+import pandas as pd
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+# Dataset paths with one of these extensions are stored in SQLite instead of CSV
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS texts (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    audio TEXT,
+    recorded INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_texts_recorded ON texts (recorded);
+CREATE INDEX IF NOT EXISTS idx_texts_audio ON texts (audio);
+"""
+
+def is_sqlite_path(path):
+    """Check whether a dataset path refers to a SQLite database"""
+    return str(path).lower().endswith(SQLITE_EXTENSIONS)
+
+def connect(db_path):
+    """
+    Open a connection to the dataset database, creating the schema if needed
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _where(recorded):
+    """Build the WHERE clause for an optional recorded filter"""
+    if recorded is None:
+        return "", ()
+    return " WHERE recorded = ?", (1 if recorded else 0,)
+
+def _to_dataframe(rows):
+    """Turn (id, text, audio, recorded) rows into the csv_handler DataFrame layout"""
+    df = pd.DataFrame(rows, columns=["id", "text", "audio", "recorded"])
+    df = df.set_index("id")
+    df.index.name = None
+    df["audio"] = df["audio"].astype(object)
+    df["recorded"] = df["recorded"].astype(bool)
+    return df
+
+def load_data(db_path):
+    """
+    Load all rows from the database
+
+    Args:
+        db_path: Path to the SQLite database file
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by row id with text, audio and recorded columns
+    """
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute("SELECT id, text, audio, recorded FROM texts ORDER BY id").fetchall()
+    return _to_dataframe(rows)
+
+def count_records(db_path, recorded=None):
+    """
+    Count rows, optionally only recorded or unrecorded ones
+
+    Args:
+        db_path: Path to the SQLite database file
+        recorded: True or False to filter by recording status, None for all rows
+
+    Returns:
+        int: Number of matching rows
+    """
+    where, params = _where(recorded)
+    with closing(connect(db_path)) as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM texts{where}", params).fetchone()[0]
+
+def load_records(db_path, recorded=None, offset=0, limit=None):
+    """
+    Load one page of rows in id order
+
+    Args:
+        db_path: Path to the SQLite database file
+        recorded: True or False to filter by recording status, None for all rows
+        offset: Number of matching rows to skip
+        limit: Maximum number of rows to return, None for no limit
+
+    Returns:
+        pd.DataFrame: DataFrame indexed by row id
+    """
+    where, params = _where(recorded)
+    query = f"SELECT id, text, audio, recorded FROM texts{where} ORDER BY id LIMIT ? OFFSET ?"
+    params = params + (-1 if limit is None else int(limit), int(offset))
+    with closing(connect(db_path)) as conn:
+        rows = conn.execute(query, params).fetchall()
+    return _to_dataframe(rows)
+
+def insert_texts(db_path, texts):
+    """
+    Insert new unrecorded texts in a single transaction
+
+    Args:
+        db_path: Path to the SQLite database file
+        texts: List of texts to insert
+
+    Returns:
+        list: Ids assigned to the inserted rows
+    """
+    with closing(connect(db_path)) as conn:
+        with conn:
+            start = conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM texts").fetchone()[0]
+            ids = list(range(start, start + len(texts)))
+            conn.executemany(
+                "INSERT INTO texts (id, text, audio, recorded) VALUES (?, ?, NULL, 0)",
+                zip(ids, texts)
+            )
+    return ids
+
+def apply_entries(db_path, entries):
+    """
+    Apply journal-style mutation entries as row-level changes in one transaction
+
+    Args:
+        db_path: Path to the SQLite database file
+        entries: Entry dicts as produced by csv_handler ("op" is add, record or clear)
+
+    Returns:
+        list: The entries, with add entries carrying the row id the database assigned
+    """
+    applied = []
+    with closing(connect(db_path)) as conn:
+        with conn:
+            next_id = conn.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM texts").fetchone()[0]
+            for entry in entries:
+                op = entry.get("op")
+                if op == "add":
+                    entry = dict(entry, index=next_id)
+                    conn.execute(
+                        "INSERT INTO texts (id, text, audio, recorded) VALUES (?, ?, NULL, 0)",
+                        (next_id, entry["text"])
+                    )
+                    next_id += 1
+                elif op == "record":
+                    conn.execute(
+                        "UPDATE texts SET audio = ?, recorded = 1 WHERE id = ?",
+                        (entry["audio"], int(entry["index"]))
+                    )
+                elif op == "clear":
+                    conn.execute(
+                        "UPDATE texts SET audio = NULL, recorded = 0 WHERE id = ?",
+                        (int(entry["index"]),)
+                    )
+                else:
+                    raise ValueError(f"Unknown entry op: {op}")
+                applied.append(entry)
+    return applied
+
+def import_dataframe(db_path, df):
+    """
+    Replace the database contents with rows from a csv_handler DataFrame
+
+    Args:
+        db_path: Path to the SQLite database file
+        df: DataFrame with text, audio and recorded columns
+
+    Returns:
+        int: Number of imported rows
+    """
+    rows = [
+        (int(index), text, None if pd.isna(audio) else str(audio), 1 if recorded == True else 0)
+        for index, text, audio, recorded in zip(df.index, df["text"], df["audio"], df["recorded"])
+    ]
+    with closing(connect(db_path)) as conn:
+        with conn:
+            conn.execute("DELETE FROM texts")
+            conn.executemany("INSERT INTO texts (id, text, audio, recorded) VALUES (?, ?, ?, ?)", rows)
+    logger.info(f"Imported {len(rows)} records into {db_path}")
+    return len(rows)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from voice_recorder.data_handlers.text_index import normalize_text, text_hash
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are not served and are dropped on the next write
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+# Least recently used entries beyond this count are evicted
+DEFAULT_MAX_ENTRIES = 200
+# Suggestions kept per entry; older ones are dropped first
+MAX_SUGGESTIONS_PER_ENTRY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    key TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    suggestions TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_suggestions_last_used ON suggestions (last_used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+COUNTERS = ["hits", "misses", "expired", "evicted"]
+
+def connect(cache_path):
+    """
+    Open the suggestion cache, creating it if needed
+
+    Args:
+        cache_path: Path to the SQLite cache file
+
+    Returns:
+        sqlite3.Connection: Open connection
+    """
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(cache_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def cache_key(params):
+    """
+    Key of a set of generation parameters
+
+    Text parameters are normalized (Unicode form, case and whitespace) and
+    empty values are left out, so settings that produce the same prompt
+    share an entry.
+
+    Args:
+        params: Dict such as model, language, domain, context, min_length,
+            max_length and speech_duration
+
+    Returns:
+        tuple: (key, canonical parameters as JSON)
+    """
+    canonical = {
+        name: normalize_text(value) if isinstance(value, str) else value
+        for name, value in params.items() if value not in (None, "")
+    }
+    encoded = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest(), encoded
+
+def _bump(conn, name, amount=1):
+    if amount:
+        conn.execute("INSERT INTO counters (name, value) VALUES (?, ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+def lookup(cache_path, params, count, exclude_hashes=None, reject=None, ttl=DEFAULT_TTL_SECONDS, count_stats=True):
+    """
+    Cached suggestions for a set of generation parameters
+
+    Suggestions whose text hash is in exclude_hashes (texts already in the
+    dataset) are left out. The lookup counts as a hit when at least count
+    suggestions remain, and as a miss otherwise.
+
+    Args:
+        cache_path: Path to the SQLite cache file
+        params: Generation parameters, as for cache_key
+        count: Number of suggestions wanted
+        exclude_hashes: Set of text_index hashes of texts to leave out
+        reject: Callable returning True for other texts to leave out, such as near-duplicates
+        ttl: Maximum age of an entry in seconds
+        count_stats: Update the hit and miss counters
+
+    Returns:
+        list: Cached suggestions not excluded, possibly fewer than count
+    """
+    key, _ = cache_key(params)
+    now = time.time()
+    with closing(connect(cache_path)) as conn:
+        with conn:
+            row = conn.execute("SELECT suggestions, created FROM suggestions WHERE key = ?", (key,)).fetchone()
+            suggestions = []
+            if row is not None and now - row[1] > ttl:
+                conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                _bump(conn, "expired")
+            elif row is not None:
+                conn.execute("UPDATE suggestions SET last_used = ? WHERE key = ?", (now, key))
+                excluded = exclude_hashes or set()
+                suggestions = [text for text in json.loads(row[0]) if text_hash(text) not in excluded
+                               and not (reject is not None and reject(text))]
+            if count_stats:
+                _bump(conn, "hits" if len(suggestions) >= count else "misses")
+    return suggestions
+
+def store(cache_path, params, suggestions, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Add suggestions to the entry of a set of generation parameters
+
+    Expired entries and the least recently used entries beyond max_entries
+    are evicted in the same transaction.
+
+    Args:
+        cache_path: Path to the SQLite cache file
+        params: Generation parameters, as for cache_key
+        suggestions: New suggestions; ones already in the entry are skipped
+        ttl: Maximum age of an entry in seconds
+        max_entries: Number of entries to keep
+    """
+    if not suggestions:
+        return
+    key, encoded = cache_key(params)
+    now = time.time()
+    with closing(connect(cache_path)) as conn:
+        with conn:
+            row = conn.execute("SELECT suggestions, created FROM suggestions WHERE key = ?", (key,)).fetchone()
+            existing, created = (json.loads(row[0]), row[1]) if row is not None and now - row[1] <= ttl else ([], now)
+            seen = {normalize_text(text) for text in existing}
+            merged = existing + [text for text in suggestions if normalize_text(text) not in seen]
+            merged = merged[-MAX_SUGGESTIONS_PER_ENTRY:]
+            conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, params, suggestions, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, encoded, json.dumps(merged, ensure_ascii=False), len(merged), created, now)
+            )
+            expired = conn.execute("DELETE FROM suggestions WHERE created < ?", (now - ttl,)).rowcount
+            evicted = conn.execute(
+                "DELETE FROM suggestions WHERE key IN "
+                "(SELECT key FROM suggestions ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (max_entries,)
+            ).rowcount
+            _bump(conn, "expired", expired)
+            _bump(conn, "evicted", evicted)
+
+def stats(cache_path):
+    """
+    Counters and size of the cache
+
+    Args:
+        cache_path: Path to the SQLite cache file
+
+    Returns:
+        dict: "entries", "suggestions" and every name in COUNTERS
+    """
+    result = dict.fromkeys(COUNTERS, 0)
+    if not os.path.exists(cache_path):
+        return dict(result, entries=0, suggestions=0)
+    with closing(connect(cache_path)) as conn:
+        result.update(conn.execute("SELECT name, value FROM counters"))
+        result["entries"], result["suggestions"] = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM suggestions"
+        ).fetchone()
+    return result
+
+def clear(cache_path):
+    """Remove every entry and reset the counters"""
+    if not os.path.exists(cache_path):
+        return
+    with closing(connect(cache_path)) as conn:
+        with conn:
+            conn.execute("DELETE FROM suggestions")
+            conn.execute("DELETE FROM counters")
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Loaded indexes: path -> (file signature, set of hashes)
+_indexes = {}
+_lock = threading.Lock()
+
+def index_path(csv_path):
+    """Path of the hash index that belongs to a dataset"""
+    return f"{csv_path}.hashes"
+
+def signature_path(csv_path):
+    """Path of the file holding the dataset signature the index was last in step with"""
+    return f"{csv_path}.hashes.signature"
+
+def normalize_text(text):
+    """Normalize text for duplicate detection (Unicode form, case and whitespace)"""
+    text = unicodedata.normalize("NFKC", str(text)).casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+def text_hash(text):
+    """Hash of the normalized text, as stored in the index"""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=8).hexdigest()
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _write(path, hashes, mode):
+    with open(path, mode, encoding="ascii") as f:
+        f.write("".join(h + "\n" for h in hashes))
+
+def _read_dataset_signature(csv_path):
+    try:
+        with open(signature_path(csv_path), "r", encoding="ascii") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_dataset_signature(csv_path, dataset_signature):
+    path = signature_path(csv_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="ascii") as f:
+        json.dump(dataset_signature, f)
+    os.replace(tmp_path, path)
+
+def _as_stored(dataset_signature):
+    """Signature in the form it takes after a round trip through JSON"""
+    return None if dataset_signature is None else json.loads(json.dumps(dataset_signature))
+
+def load_index(csv_path, texts=None, dataset_signature=None):
+    """
+    Load the hash index for a dataset, rebuilding it if it is missing or out of date
+
+    The index holds one hash per dataset row. It is considered out of date when
+    its size does not match the number of rows in texts, or when the dataset
+    files changed since the index was last brought in step with them.
+
+    Args:
+        csv_path: Path to the dataset
+        texts: All texts currently in the dataset, used to check and rebuild the index
+        dataset_signature: Signature of the dataset files texts was read from
+            (as csv_handler computes it), None to check the row count only
+
+    Returns:
+        set: Hashes of the normalized texts in the dataset
+    """
+    path = index_path(csv_path)
+    key = os.path.abspath(path)
+    with _lock:
+        signature = _file_signature(path)
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == signature:
+            hashes, count = cached[1], cached[2]
+        elif signature is not None:
+            with open(path, "r", encoding="ascii") as f:
+                lines = f.read().split()
+            hashes, count = set(lines), len(lines)
+        else:
+            hashes, count = None, None
+
+        stale = count != len(texts) if texts is not None else False
+        if texts is not None and dataset_signature is not None and not stale:
+            stale = _read_dataset_signature(csv_path) != _as_stored(dataset_signature)
+        if stale:
+            logger.info(f"Rebuilding text hash index for {csv_path} ({len(texts)} texts)")
+            rebuilt = [text_hash(text) for text in texts]
+            _write(path, rebuilt, "w")
+            if dataset_signature is not None:
+                _write_dataset_signature(csv_path, dataset_signature)
+            elif os.path.exists(signature_path(csv_path)):
+                os.remove(signature_path(csv_path))
+            hashes, count = set(rebuilt), len(rebuilt)
+            signature = _file_signature(path)
+        elif hashes is None:
+            hashes, count = set(), 0
+
+        _indexes[key] = (signature, hashes, count)
+        return hashes
+
+def record_commit(csv_path, previous_signature, dataset_signature, texts=()):
+    """
+    Keep the index in step with a write to the dataset
+
+    The hashes of added texts are appended and the new dataset signature is
+    stored, but only if the index was in step with the dataset before the
+    write; otherwise it is left to be rebuilt on next use.
+
+    Args:
+        csv_path: Path to the dataset
+        previous_signature: Signature of the dataset files before the write
+        dataset_signature: Signature of the dataset files after the write
+        texts: Texts of the added rows, in row order
+    """
+    path = index_path(csv_path)
+    key = os.path.abspath(path)
+    with _lock:
+        if not os.path.exists(path) or _read_dataset_signature(csv_path) != _as_stored(previous_signature):
+            return
+        hashes = [text_hash(text) for text in texts]
+        cached = _indexes.get(key)
+        in_sync = cached is not None and cached[0] == _file_signature(path)
+        if hashes:
+            _write(path, hashes, "a")
+        _write_dataset_signature(csv_path, dataset_signature)
+        if in_sync:
+            cached[1].update(hashes)
+            _indexes[key] = (_file_signature(path), cached[1], cached[2] + len(hashes))
+        else:
+            _indexes.pop(key, None)
+
+def discard(csv_path):
+    """Remove the index after the dataset was replaced; it is rebuilt on next use"""
+    path = index_path(csv_path)
+    with _lock:
+        _indexes.pop(os.path.abspath(path), None)
+        for stale_path in (path, signature_path(csv_path)):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
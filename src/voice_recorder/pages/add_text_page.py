@@ -3,8 +3,12 @@ import time
 import logging
 import os
 
-from voice_recorder.data_handlers.csv_handler import load_data, add_text
-from voice_recorder.data_handlers.ai_text_generator import generate_text_suggestions, estimate_character_count
+from voice_recorder.utils.common import DATA_PATH, SUGGESTION_CACHE_PATH
+from voice_recorder.data_handlers.csv_handler import (
+    load_data, load_near_duplicate_index, load_text_hashes, add_text, add_texts, find_similar_texts
+)
+from voice_recorder.data_handlers import near_duplicates, suggestion_cache
+from voice_recorder.data_handlers.ai_text_generator import DEFAULT_CONCURRENCY, generate_text_suggestions, estimate_character_count
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +17,7 @@ def show_add_text_page():
     st.header("Add New Text")
     
     # Load existing data
-    csv_path = "data/data.csv"
+    csv_path = DATA_PATH
     df = load_data(csv_path)
     
     # Add tabs for manual entry and AI suggestions
@@ -57,13 +61,17 @@ def show_add_text_page():
             if use_saved_key:
                 api_key = st.session_state.gemini_api_key
         
+        concurrency = st.number_input("Parallel requests", min_value=1, max_value=16, value=DEFAULT_CONCURRENCY,
+                                      help="Number of requests sent to Gemini at the same time")
+        
         # Basic settings
         st.markdown("### Text Settings")
         col1, col2 = st.columns(2)
         with col1:
             language = st.text_input("Language", value="English", help="Specify the language for generated texts")
         with col2:
-            suggestion_count = st.number_input("Number of suggestions", min_value=1, max_value=10, value=3)
+            suggestion_count = st.number_input("Number of suggestions", min_value=1, max_value=500, value=3,
+                                               help="Requests are repeated until this many valid, distinct suggestions arrive")
         
         # Domain and Context
         st.markdown("### Content Guidance")
@@ -113,8 +121,20 @@ def show_add_text_page():
         
         # Button to generate suggestions
         st.markdown("### Generate")
+        refresh = st.checkbox("Fetch new suggestions", value=False,
+                              help="Ask Gemini for new suggestions even if suggestions for these settings are cached")
         generate_button = st.button("Generate Text Suggestions", key="generate_suggestions")
         
+        cache_stats = suggestion_cache.stats(SUGGESTION_CACHE_PATH)
+        cache_col, clear_col = st.columns([4, 1])
+        with cache_col:
+            st.caption(f"Suggestion cache: {cache_stats['suggestions']} suggestions for {cache_stats['entries']} settings, "
+                       f"{cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        with clear_col:
+            if st.button("Clear cache", key="clear_suggestion_cache"):
+                suggestion_cache.clear(SUGGESTION_CACHE_PATH)
+                st.rerun()
+        
         if generate_button:
             if not api_key:
                 st.error("Please enter a Gemini API key in the API Settings section.")
@@ -125,6 +145,12 @@ def show_add_text_page():
                         "api_key": api_key,
                         "language": language,
                         "count": suggestion_count,
+                        "concurrency": concurrency,
+                        # Texts already in the dataset, or very similar to one, are never suggested
+                        "exclude_hashes": load_text_hashes(csv_path),
+                        "reject": near_duplicates.suggestion_filter(load_near_duplicate_index(csv_path)),
+                        "cache_path": SUGGESTION_CACHE_PATH,
+                        "refresh": refresh,
                         "domain": domain if domain else None,
                         "context": context if context else None
                     }
@@ -184,12 +210,18 @@ def show_add_text_page():
                     if st.button("Use This", key=f"use_suggestion_{i}"):
                         process_add_text(suggestion, df, csv_path)
                         
-            # Option to clear suggestions
-            if st.button("Clear Suggestions", key="clear_suggestions"):
-                st.session_state.text_suggestions = []
-                if 'generation_params' in st.session_state:
-                    del st.session_state.generation_params
-                st.rerun()
+            col1, col2 = st.columns(2)
+            with col1:
+                # Option to add every suggestion at once
+                if st.button("Add All Suggestions", key="add_all_suggestions"):
+                    process_add_texts(st.session_state.text_suggestions, df, csv_path)
+            with col2:
+                # Option to clear suggestions
+                if st.button("Clear Suggestions", key="clear_suggestions"):
+                    st.session_state.text_suggestions = []
+                    if 'generation_params' in st.session_state:
+                        del st.session_state.generation_params
+                    st.rerun()
             
 
 def process_add_text(text, df, csv_path):
@@ -199,7 +231,13 @@ def process_add_text(text, df, csv_path):
     else:
         logger.info(f"Attempting to add new text: '{text[:50]}...'" if len(text) > 50 else f"Attempting to add new text: '{text}'")
         
-        success, df = add_text(df, text, csv_path)
+        similar = find_similar_texts(csv_path, text) if 32 <= len(text) <= 140 else []
+        if similar:
+            st.error(f"A very similar text is already in the dataset: \"{similar[0][1]}\"")
+            return
+        
+        # Near-duplicates were checked above, so add_text does not query the index again
+        success, df = add_text(df, text, csv_path, allow_near_duplicates=True)
         
         if success:
             st.success("Text added successfully!")
@@ -209,4 +247,27 @@ def process_add_text(text, df, csv_path):
             time.sleep(1)
             st.rerun()
         else:
-            st.error("Text must be between 32 and 140 characters.")
\ No newline at end of file
+            st.error("Text must be between 32 and 140 characters.")
+
+def process_add_texts(texts, df, csv_path):
+    """Add several texts to the dataset at once, skipping invalid texts and duplicates"""
+    logger.info(f"Attempting to add {len(texts)} texts")
+    
+    summary, df = add_texts(df, texts, csv_path)
+    
+    skipped = []
+    if summary["duplicates"]:
+        skipped.append(f"{summary['duplicates']} already in the dataset")
+    if summary["near_duplicates"]:
+        skipped.append(f"{summary['near_duplicates']} very similar to other texts")
+    if summary["invalid"]:
+        skipped.append(f"{summary['invalid']} not within 32-140 characters")
+    skipped_text = f" Skipped {', '.join(skipped)}." if skipped else ""
+    
+    if summary["added"]:
+        st.success(f"Added {summary['added']} texts.{skipped_text}")
+        st.session_state.text_suggestions = []
+        time.sleep(1)
+        st.rerun()
+    else:
+        st.warning(f"No texts were added.{skipped_text}")
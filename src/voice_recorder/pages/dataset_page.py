@@ -1,86 +1,219 @@
 import streamlit as st
 import logging
+import math
 import os
 
-from voice_recorder.data_handlers.csv_handler import load_data, delete_recording
-from voice_recorder.audio_handlers.audio_processor import delete_audio_file
+from voice_recorder.utils.common import AUDIO_DIR, DATA_PATH
+from voice_recorder.data_handlers.csv_handler import (
+    count_records, dataset_signature, delete_recording, load_records, recorded_audio_summary
+)
+from voice_recorder.audio_handlers import audio_index
+from voice_recorder.audio_handlers.audio_layout import audio_path
+from voice_recorder.audio_handlers.quality import (
+    METRICS, QUALITY_INDEX_FILE, failed_checks, load_quality_index, update_quality_index
+)
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+QUALITY_FILTERS = ["All recordings", "Failing quality checks", "Passing quality checks"]
+
+# Last filtered and sorted rows per dataset: path -> (key, DataFrame), so
+# paging through them does not go over every recording again
+_quality_views = {}
+
+def format_quality(metrics):
+    """One-line summary of the quality metrics of a take"""
+    snr = "n/a" if metrics["snr_db"] is None else f"{metrics['snr_db']:.0f} dB"
+    return (f"{metrics['voiced_seconds']:.1f}s voiced of {metrics['duration']:.1f}s · "
+            f"peak {metrics['peak_dbfs']:.1f} dBFS · RMS {metrics['rms_dbfs']:.1f} dBFS · "
+            f"SNR {snr} · clipping {metrics['clipping_ratio']:.2%}")
+
+def quality_records(csv_path, quality, quality_filter, sort_by, descending):
+    """
+    Load the recorded rows, filtered and sorted by their quality metrics
+    
+    The result is kept until the dataset, the quality index or the options
+    change, so moving between pages does not filter and sort again.
+    
+    Args:
+        csv_path: Path to the dataset
+        quality: Quality index, as returned by load_quality_index
+        quality_filter: One of QUALITY_FILTERS
+        sort_by: Name of a metric to sort by, or None for dataset order
+        descending: Sort from the highest value down
+        
+    Returns:
+        pd.DataFrame: Matching recorded rows
+    """
+    try:
+        stat = os.stat(os.path.join(AUDIO_DIR, QUALITY_INDEX_FILE))
+        quality_signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        quality_signature = None
+    key = (dataset_signature(csv_path), quality_signature, quality_filter, sort_by, descending)
+    cached = _quality_views.get(os.path.abspath(csv_path))
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    df = load_records(csv_path, recorded=True)
+    metrics = df["audio"].map(quality.get)
+    if quality_filter != QUALITY_FILTERS[0]:
+        failing = metrics.map(lambda m: m is not None and bool(failed_checks(m)))
+        df = df[failing if quality_filter == QUALITY_FILTERS[1] else ~failing & metrics.notna()]
+        metrics = metrics[df.index]
+    if sort_by is not None:
+        values = metrics.map(lambda m: m.get(sort_by) if m is not None else None).astype(float)
+        df = df.loc[values.sort_values(ascending=not descending, na_position="last", kind="stable").index]
+    _quality_views[os.path.abspath(csv_path)] = (key, df)
+    return df
+
 def show_dataset_page():
     """Display the dataset overview page"""
     st.header("Dataset Overview")
-    
-    # Load existing data
-    csv_path = "data/data.csv"
-    df = load_data(csv_path)
-    
+
+    csv_path = DATA_PATH
+
     # Display statistics
-    col1, col2, col3 = st.columns(3)
+    recorded_count = count_records(csv_path, recorded=True)
+    remaining_count = count_records(csv_path, recorded=False)
+    # Bring the audio metadata index up to date once per session
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+    if not st.session_state.get("audio_index_reconciled"):
+        audio_index.reconcile(AUDIO_DIR)
+        st.session_state.audio_index_reconciled = True
+    # Only takes linked to a recorded row count, not abandoned takes or other files on disk
+    audio_totals = recorded_audio_summary(csv_path, AUDIO_DIR)
+    
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Texts", len(df))
+        st.metric("Total Texts", recorded_count + remaining_count)
     with col2:
-        st.metric("Recorded", len(df[df["recorded"] == True]))
+        st.metric("Recorded", recorded_count)
     with col3:
-        st.metric("Remaining", len(df[df["recorded"] != True]))
-    
+        st.metric("Remaining", remaining_count)
+    with col4:
+        st.metric("Recorded Hours", f"{audio_totals['seconds'] / 3600:.2f}",
+                  help=f"{audio_totals['files']} of {recorded_count} recordings indexed, "
+                       f"{audio_totals['bytes'] / 1024 / 1024:.1f} MB")
+    if st.button("Rescan audio files", help="Update the audio index after files were changed outside the app"):
+        audio_index.reconcile(AUDIO_DIR)
+        st.rerun()
+
     # Add a data management section
     st.subheader("Data Management")
     
+    # Quality metrics of the recordings, analyzed on demand
+    with st.expander("Recording quality"):
+        if st.button("Analyze recordings", help="Measure level, clipping, SNR and voiced duration of new or changed recordings"):
+            with st.spinner("Analyzing recordings..."):
+                update_quality_index(AUDIO_DIR, workers=os.cpu_count() or 1)
+        quality = load_quality_index(AUDIO_DIR)
+        st.caption(f"{len(quality)} recordings analyzed")
+        qcol1, qcol2, qcol3 = st.columns([2, 2, 1])
+        with qcol1:
+            quality_filter = st.selectbox("Show", QUALITY_FILTERS, key="quality_filter")
+        with qcol2:
+            sort_choice = st.selectbox("Sort by", ["Dataset order"] + METRICS, key="quality_sort")
+        with qcol3:
+            descending = st.checkbox("Descending", key="quality_descending")
+    sort_by = None if sort_choice == "Dataset order" else sort_choice
+    by_quality = quality_filter != QUALITY_FILTERS[0] or sort_by is not None
+
     # Display the data with interactive components
     # Filter options
-    view_option = st.radio(
-        "View options:", 
-        ["All Entries", "Recorded Only", "Unrecorded Only"], 
-        horizontal=True
-    )
-    
-    # Filter the dataframe based on selection
-    if view_option == "Recorded Only":
-        filtered_df = df[df["recorded"] == True]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        view_option = st.radio(
+            "View options:",
+            ["All Entries", "Recorded Only", "Unrecorded Only"],
+            horizontal=True
+        )
+    with col2:
+        page_size = st.selectbox("Rows per page", PAGE_SIZE_OPTIONS, key="dataset_page_size")
+
+    if by_quality:
+        # Quality metrics only exist for recordings, so they are filtered in memory
+        quality_df = quality_records(csv_path, quality, quality_filter, sort_by, descending)
+        recorded_filter, total = True, len(quality_df)
+        st.caption("Showing recorded entries only while filtering or sorting by quality.")
+    elif view_option == "Recorded Only":
+        recorded_filter, total = True, recorded_count
     elif view_option == "Unrecorded Only":
-        filtered_df = df[df["recorded"] != True]
+        recorded_filter, total = False, remaining_count
     else:
-        filtered_df = df.copy()
-    
+        recorded_filter, total = None, recorded_count + remaining_count
+
+    # Pick the page to show
+    page_count = max(1, math.ceil(total / page_size))
+    page = st.number_input(
+        f"Page (of {page_count})",
+        min_value=1,
+        max_value=page_count,
+        value=min(st.session_state.get("dataset_page", 1), page_count),
+        step=1
+    )
+    st.session_state.dataset_page = page
+
+    # Load only the rows on this page
+    if by_quality:
+        page_df = quality_df.iloc[(page - 1) * page_size:page * page_size]
+    else:
+        page_df = load_records(
+            csv_path,
+            recorded=recorded_filter,
+            offset=(page - 1) * page_size,
+            limit=page_size
+        )
+
     # Display dataframe with actions
-    if not filtered_df.empty:
+    if not page_df.empty:
+        first_row = (page - 1) * page_size + 1
+        st.caption(f"Showing {first_row}-{first_row + len(page_df) - 1} of {total}")
+
+        # Look up the audio files on this page in the index instead of on disk
+        recorded_audio = page_df.loc[page_df["recorded"] == True, "audio"]
+        audio_meta = audio_index.get_metadata(AUDIO_DIR, recorded_audio.tolist())
+
         # Create columns for display and actions
-        for idx, row in filtered_df.iterrows():
+        for idx, row in page_df.iterrows():
             col1, col2, col3 = st.columns([3, 1, 1])
-            
+
             with col1:
                 text = row["text"]
                 # Truncate long text for display
                 display_text = text if len(text) < 60 else f"{text[:57]}..."
                 st.text(display_text)
-            
+                metrics = quality.get(row["audio"]) if row["recorded"] == True else None
+                if metrics is not None:
+                    failed = failed_checks(metrics)
+                    st.caption(("⚠️ " + ", ".join(failed) + " · " if failed else "") + format_quality(metrics))
+
             with col2:
                 if row["recorded"] == True:
-                    audio_file = os.path.join("audio_files", row["audio"])
-                    if os.path.exists(audio_file):
-                        st.audio(audio_file, format="audio/wav")
-                    else:
+                    meta = audio_meta.get(row["audio"])
+                    if meta is None:
                         st.warning("Audio file missing")
+                    # Only load the audio once the user asks to play it
+                    elif st.toggle(f"Play ({meta['duration']:.1f}s)", key=f"play_{idx}"):
+                        audio_file = audio_path(AUDIO_DIR, row["audio"])
+                        audio_format = "audio/flac" if audio_file.lower().endswith(".flac") else "audio/wav"
+                        st.audio(audio_file, format=audio_format)
                 else:
                     st.info("Not recorded")
-            
+
             with col3:
                 if row["recorded"] == True:
                     if st.button("Delete", key=f"delete_{idx}"):
                         logger.info(f"Deleting recording for text index: {idx}")
-                        
-                        # Delete audio file
-                        audio_path = os.path.join("audio_files", row["audio"])
-                        delete_audio_file(audio_path)
-                        
-                        # Update database
-                        success, df = delete_recording(df, idx, csv_path)
-                        
+
+                        # Delete the audio file and update the dataset
+                        success, page_df = delete_recording(page_df, idx, csv_path)
+
                         if success:
                             st.success("Recording deleted successfully!")
                             st.rerun()
                         else:
                             st.error("Failed to delete recording.")
     else:
-        st.info("No records match the selected filter.") 
\ No newline at end of file
+        st.info("No records match the selected filter.")
@@ -2,8 +2,10 @@ import streamlit as st
 import logging
 import os
 
-from voice_recorder.data_handlers.export_handler import export_dataset
+from voice_recorder.utils.common import DATA_PATH
+from voice_recorder.data_handlers.export_handler import export_dataset, list_parquet_files
 from voice_recorder.data_handlers.huggingface_uploader import push_to_huggingface
+from voice_recorder.audio_handlers.quality import DEFAULT_THRESHOLDS
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +14,49 @@ def show_export_page():
     st.header("Export Dataset to Hugging Face Format")
     
     # Input for export settings
-    input_csv = st.text_input("Input CSV Path", value="data/data.csv")
+    input_csv = st.text_input("Input CSV Path", value=DATA_PATH, help="Path to the dataset CSV, or a .db file for a SQLite dataset")
     audio_dir = st.text_input("Audio Directory", value="audio_files")
     output_dir = st.text_input("Output Directory", value="my_voice_dataset")
+    incremental = st.checkbox(
+        "Incremental export", value=True,
+        help="Only encode recordings that are new or changed since the last incremental export"
+    )
+    with st.expander("Advanced export settings"):
+        workers = st.number_input(
+            "Workers", min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1,
+            help="Number of threads used to read and encode audio files (and processes used for quality checks)"
+        )
+        row_group_size = st.number_input(
+            "Rows per row group", min_value=1, value=500,
+            help="Maximum number of recordings per Parquet row group"
+        )
+        max_memory_mb = st.number_input(
+            "Memory ceiling (MB)", min_value=16, value=512,
+            help="Row groups are written early to keep buffered audio below this size"
+        )
+        shard_size_mb = st.number_input(
+            "Shard size (MB)", min_value=0, value=500,
+            help="Target size of each data/train-*.parquet shard (train-NNNNN-of-NNNNN for full exports, "
+                 "train-part-NNNNN for incremental ones); 0 writes a single dataset.parquet, "
+                 "or a single new part per incremental export"
+        )
+        quality_filter = st.checkbox(
+            "Leave out takes that fail quality checks",
+            help="Skip clipped, too quiet, noisy or nearly silent recordings (see the Dataset page)"
+        )
+        codec_choice = st.selectbox(
+            "Audio codec", ["As stored", "flac", "wav"],
+            help="Transcode the embedded audio; FLAC is lossless and about half the size of WAV"
+        )
+    export_options = {
+        "incremental": incremental,
+        "workers": workers,
+        "row_group_size": row_group_size,
+        "max_memory_mb": max_memory_mb,
+        "shard_size_mb": shard_size_mb,
+        "audio_codec": None if codec_choice == "As stored" else codec_choice,
+        "quality_thresholds": DEFAULT_THRESHOLDS if quality_filter else None,
+    }
     
     # Create tabs for local export and HF upload
     export_tab, upload_tab = st.tabs(["Export Locally", "Upload to Hugging Face"])
@@ -33,17 +75,14 @@ def show_export_page():
             else:
                 # Show spinner during export
                 with st.spinner("Exporting dataset..."):
-                    success = export_dataset(input_csv, audio_dir, output_dir)
+                    success = export_dataset(input_csv, audio_dir, output_dir, **export_options)
                     
                     if success:
                         st.success(f"Dataset successfully exported to {output_dir}")
                         
                         # Show info about the exported files
-                        st.info(
-                            f"Exported files:\n"
-                            f"- {os.path.join(output_dir, 'dataset.csv')}\n"
-                            f"- {os.path.join(output_dir, 'dataset.parquet')}"
-                        )
+                        exported_files = [os.path.join(output_dir, 'dataset.csv')] + list_parquet_files(output_dir)
+                        st.info("Exported files:\n" + "\n".join(f"- {path}" for path in exported_files))
                     else:
                         st.error("Export failed. Check logs for details.")
     
@@ -55,6 +94,10 @@ def show_export_page():
         token = st.text_input("Hugging Face Token", type="password", 
                               help="Your Hugging Face API token. If not provided, will use HUGGINGFACE_TOKEN environment variable.")
         is_private = st.checkbox("Make repository private", value=True)
+        delta_upload = st.checkbox("Only upload changed files", value=True,
+                                   help="Compare file hashes with the repository and upload only new or changed files in one commit")
+        upload_workers = st.number_input("Parallel uploads", min_value=1, max_value=16, value=4,
+                                         help="Number of files uploaded at the same time; each file is retried on failure")
         
         # Offer to export before uploading
         export_before_upload = st.checkbox("Export before uploading", value=True, 
@@ -69,7 +112,7 @@ def show_export_page():
                 if export_before_upload:
                     st.info("Exporting dataset before uploading...")
                     with st.spinner("Exporting dataset..."):
-                        export_success = export_dataset(input_csv, audio_dir, output_dir)
+                        export_success = export_dataset(input_csv, audio_dir, output_dir, **export_options)
                         
                         if not export_success:
                             st.error("Failed to export dataset. Upload aborted.")
@@ -79,6 +122,16 @@ def show_export_page():
                 
                 # Now upload to Hugging Face
                 st.info(f"Uploading to Hugging Face Hub: {repo_id}")
+                progress_bar = st.progress(0.0, text="Preparing upload...")
+                
+                def show_progress(files_done, files_total, bytes_done, bytes_total, elapsed):
+                    rate = bytes_done / elapsed / 1024 / 1024 if elapsed > 0 else 0.0
+                    progress_bar.progress(
+                        bytes_done / bytes_total if bytes_total else 1.0,
+                        text=f"Uploaded {files_done}/{files_total} files "
+                             f"({bytes_done / 1024 / 1024:.1f} of {bytes_total / 1024 / 1024:.1f} MB, {rate:.1f} MB/s)"
+                    )
+                
                 with st.spinner("Uploading to Hugging Face Hub..."):
                     # If token is empty, pass None to use env variable
                     hf_token = token if token else None
@@ -86,11 +139,15 @@ def show_export_page():
                         dataset_dir=output_dir,
                         repo_id=repo_id,
                         private=is_private,
-                        token=hf_token
+                        token=hf_token,
+                        delta=delta_upload,
+                        workers=upload_workers,
+                        progress=show_progress
                     )
                     
                     if success:
                         st.success(f"Dataset successfully uploaded to Hugging Face!")
                         st.markdown(f"[View your dataset on Hugging Face]({repo_url})")
                     else:
-                        st.error("Failed to upload dataset to Hugging Face. Check logs for details.") 
\ No newline at end of file
+                        st.error("Failed to upload dataset to Hugging Face. Check logs for details. "
+                                 "Uploading again continues with the files that were not uploaded yet.") 
\ No newline at end of file
@@ -3,38 +3,87 @@ import time
 import logging
 import os
 
+from voice_recorder.utils.common import DATA_PATH, AUDIO_CODEC, AUDIO_DIR
 from voice_recorder.utils.session import init_session_state
-from voice_recorder.data_handlers.csv_handler import load_data, save_recording
-from voice_recorder.audio_handlers.audio_processor import save_audio, create_unique_filename
-from voice_recorder.audio_handlers.recorder import record_audio
+from voice_recorder.data_handlers import recording_order
+from voice_recorder.data_handlers.csv_handler import load_data, load_records, save_recording
+from voice_recorder.audio_handlers.audio_processor import AUDIO_CODECS, create_unique_filename, delete_audio_file
+from voice_recorder.audio_handlers.recorder import StreamingRecorder, remove_stale_parts
+from voice_recorder.audio_handlers.vad import DEFAULT_STOP_SILENCE_SECONDS
 
 logger = logging.getLogger(__name__)
 
+def finish_take():
+    """Stop the running recorder and keep its file as the current take"""
+    recorder = st.session_state.recorder
+    st.session_state.recorder = None
+    st.session_state.recording = False
+    if recorder is not None and recorder.stop():
+        st.session_state.take_file = recorder.file_path
+    elif recorder is not None:
+        st.session_state.take_file = None
+        st.error("Nothing was recorded. Check your microphone and try again.")
+
+def discard_take():
+    """Remove the current take that was not saved"""
+    if st.session_state.take_file:
+        delete_audio_file(st.session_state.take_file)
+    st.session_state.take_file = None
+
+@st.fragment(run_every=0.5)
+def show_recording_status():
+    """Show the length of the running take, and finish it once it reaches its maximum"""
+    recorder = st.session_state.recorder
+    if recorder is None:
+        return
+    if not recorder.active:
+        finish_take()
+        st.rerun(scope="app")
+    st.markdown(f"🔴 **Recording in progress...** {recorder.duration:.1f}s")
+
 def show_record_page():
     """Display the record from CSV page"""
     st.header("Record Voice for Existing Text")
     
     # Initialize session state
     init_session_state()
+    # Clear out takes abandoned mid-recording by earlier sessions, once per session
+    if not st.session_state.get("stale_parts_removed"):
+        remove_stale_parts(AUDIO_DIR)
+        st.session_state.stale_parts_removed = True
     
-    # Load existing data
-    csv_path = "data/data.csv"
-    df = load_data(csv_path)
-    
-    # Filter dataframe to show only unrecorded texts
-    unrecorded_df = df[df["recorded"].fillna(False) == False]
+    # Load only the unrecorded texts
+    csv_path = DATA_PATH
+    unrecorded_df = load_records(csv_path, recorded=False)
     
     if len(unrecorded_df) > 0:
+        order = st.radio(
+            "Order:", ["Recommended", "File order"], horizontal=True,
+            help="Recommended puts first the texts that add the most characters and character pairs "
+                 "not yet recorded (or recorded least) per estimated minute of speech"
+        )
+        if order == "Recommended":
+            # Queue of the next texts, each picked as if the ones before it were recorded
+            queue = recording_order.recommend(csv_path)
+            texts = {index: text for index, text, _, _ in queue}
+            details = {index: (new_units, seconds) for index, _, new_units, seconds in queue}
+        else:
+            texts = unrecorded_df["text"].to_dict()
+            details = {}
+        
         # Select a text to record
         text_index = st.selectbox(
             "Select a text to record:",
-            options=unrecorded_df.index.tolist(),
-            format_func=lambda x: unrecorded_df.loc[x, "text"],
-            key=f"selectbox_{st.session_state.get('rerun_key', 0)}"
+            options=list(texts),
+            format_func=lambda x: texts[x],
+            key=f"selectbox_{order}_{st.session_state.get('rerun_key', 0)}"
         )
         
         if text_index is not None:
-            selected_text = unrecorded_df.loc[text_index, "text"]
+            selected_text = texts[text_index]
+            if text_index in details:
+                new_units, seconds = details[text_index]
+                st.caption(f"Adds {new_units} characters or character pairs not recorded yet, in about {seconds:.0f}s.")
             st.session_state.current_text = selected_text
             
             st.markdown(f"### Text to record:")
@@ -44,69 +93,89 @@ def show_record_page():
             # Audio recording interface
             sample_rate = 24000  # 24kHz as required
 
-            # Add slider for recording duration
-            duration = st.slider(
-                "Select Recording Duration (seconds):", 
+            # Add slider for the longest allowed take
+            max_duration = st.slider(
+                "Maximum Recording Duration (seconds):", 
                 min_value=3,
-                max_value=15,
-                value=10,
+                max_value=600,
+                value=30,
                 step=1
             )
-            st.caption(f"Recording will last for {duration} seconds.")
+            silence_col, trim_col = st.columns(2)
+            with silence_col:
+                stop_on_silence = st.number_input(
+                    "Stop after silence (seconds)", min_value=0.0, max_value=10.0,
+                    value=DEFAULT_STOP_SILENCE_SECONDS, step=0.5,
+                    help="Stop automatically once you have been silent this long after speaking; 0 to disable"
+                )
+            with trim_col:
+                trim = st.checkbox("Trim silence", value=True,
+                                   help="Remove silence before and after the speech when the take ends")
+            if stop_on_silence:
+                st.caption(f"Recording stops when you press Stop, after {stop_on_silence:g}s of silence, "
+                           f"or after {max_duration} seconds.")
+            else:
+                st.caption(f"Recording stops when you press Stop, or after {max_duration} seconds.")
             
             # Start/stop recording buttons
             col1, col2 = st.columns([1, 3])
             with col1:
-                if not st.session_state.recording:
+                if st.session_state.recorder is None:
                     if st.button("Start Recording", key=f"start_rec_{text_index}"):
-                        logger.info(f"Starting recording for text index: {text_index}, duration: {duration}s")
-                        st.session_state.recording = True
-                        st.session_state.audio_data = []
-                        st.rerun()
+                        logger.info(f"Starting recording for text index: {text_index}, max duration: {max_duration}s")
+                        discard_take()
+                        recorder = StreamingRecorder(
+                            create_unique_filename(AUDIO_DIR, extension=AUDIO_CODECS[AUDIO_CODEC]),
+                            sample_rate,
+                            max_duration=max_duration,
+                            stop_on_silence=stop_on_silence or None,
+                            trim=trim
+                        )
+                        try:
+                            st.session_state.recorder = recorder.start()
+                            st.session_state.recording = True
+                            st.rerun()
+                        except Exception as e:
+                            logger.error(f"Could not start recording: {e}")
+                            st.error(f"Could not start recording: {e}")
                 else:
                     if st.button("Stop Recording", key=f"stop_rec_{text_index}"):
                         logger.info("Stopping recording manually.")
-                        st.session_state.recording = False 
+                        finish_take()
                         st.rerun()
             
-            # Recording indicator and execution
+            # Recording indicator, refreshed while the take is written in the background
             with col2:
-                if st.session_state.recording:
-                    st.markdown("🔴 **Recording in progress...**")
-                    
-                    # Record audio
-                    audio_data = record_audio(duration, sample_rate)
-                    
-                    # Update session state
-                    st.session_state.audio_data = audio_data
-                    st.session_state.recording = False
-                    st.rerun()
+                if st.session_state.recorder is not None:
+                    show_recording_status()
             
             # Display recorded audio and save button
-            if len(st.session_state.audio_data) > 0 and not st.session_state.recording:
-                st.audio(st.session_state.audio_data, sample_rate=sample_rate)
+            take_file = st.session_state.take_file
+            if take_file and os.path.exists(take_file) and st.session_state.recorder is None:
+                st.audio(take_file)
                 
-                if st.button("Save Recording", key=f"save_rec_{text_index}"):
+                save_col, discard_col = st.columns([1, 3])
+                with save_col:
+                    save_clicked = st.button("Save Recording", key=f"save_rec_{text_index}")
+                with discard_col:
+                    if st.button("Discard", key=f"discard_rec_{text_index}"):
+                        discard_take()
+                        st.rerun()
+                
+                if save_clicked:
                     logger.info(f"Attempting to save recording for text index: {text_index}")
                     
-                    # Create a unique filename
-                    audio_filename = create_unique_filename("audio_files")
+                    # The take is already on disk; link it to the text
+                    success, _ = save_recording(load_data(csv_path), text_index, take_file, csv_path)
                     
-                    # Save audio file
-                    if save_audio(st.session_state.audio_data, sample_rate, audio_filename):
-                        # Update the dataset
-                        success, df = save_recording(df, text_index, audio_filename, csv_path)
-                        
-                        if success:
-                            st.success(f"Recording saved successfully as {os.path.basename(audio_filename)}!")
-                            st.session_state.audio_data = []
-                            st.session_state['rerun_key'] = st.session_state.get('rerun_key', 0) + 1
-                            time.sleep(1)
-                            st.rerun()
-                        else:
-                            st.error("Failed to update dataset. Audio file saved but not linked.")
+                    if success:
+                        st.success(f"Recording saved successfully as {os.path.basename(take_file)}!")
+                        st.session_state.take_file = None
+                        st.session_state['rerun_key'] = st.session_state.get('rerun_key', 0) + 1
+                        time.sleep(1)
+                        st.rerun()
                     else:
-                        st.error("Failed to save audio file.")
+                        st.error("Failed to update dataset. Audio file saved but not linked.")
     else:
-        logger.info("No unrecorded texts found in Tab 1.")
-        st.info("No unrecorded texts found. Add new texts in the 'Add New Text' tab or import more.") 
\ No newline at end of file
+        logger.info("No unrecorded texts found on the record page.")
+        st.info("No unrecorded texts found. Add new texts in the 'Add New Text' page or import more.") 
\ No newline at end of file
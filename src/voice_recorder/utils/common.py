@@ -3,8 +3,22 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Dataset location; use a .db/.sqlite path to store the dataset in SQLite
+DATA_PATH = os.environ.get("VOICE_RECORDER_DATA", "data/data.csv")
+
+# Directory holding the recordings, in shard subdirectories
+AUDIO_DIR = "audio_files"
+
+# Cache of AI text suggestions, shared by every session
+SUGGESTION_CACHE_PATH = os.environ.get("VOICE_RECORDER_SUGGESTION_CACHE", "data/suggestion_cache.db")
+
+# Storage codec for new recordings ("flac" or "wav")
+AUDIO_CODEC = os.environ.get("VOICE_RECORDER_CODEC", "flac")
+
 def ensure_directories():
     """Create necessary directories if they don't exist"""
     os.makedirs("data", exist_ok=True)
-    os.makedirs("audio_files", exist_ok=True)
-    logger.info("Ensured data and audio_files directories exist") 
\ No newline at end of file
+    if os.path.dirname(DATA_PATH):
+        os.makedirs(os.path.dirname(DATA_PATH), exist_ok=True)
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+    logger.info(f"Ensured data and {AUDIO_DIR} directories exist") 
\ No newline at end of file
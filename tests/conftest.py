@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app and its scripts import voice_recorder from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
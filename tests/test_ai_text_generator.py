@@ -0,0 +1,125 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from voice_recorder.data_handlers import ai_text_generator
+from voice_recorder.data_handlers.ai_text_generator import generate_suggestions
+from voice_recorder.data_handlers.text_index import text_hash
+
+
+def sentence(number):
+    return f"This is generated sentence number {number} for the stub server."
+
+
+class GeminiStub:
+    """Local stand-in for the generateContent endpoint, answering with respond(request_number)"""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    number = len(stub.requests)
+                    stub.requests.append({"path": self.path, "key": self.headers.get("x-goog-api-key"),
+                                          "payload": payload})
+                status, texts = stub.respond(number)
+                if status == 200:
+                    body = {"candidates": [{"content": {"parts": [{"text": json.dumps(texts)}]}}]}
+                else:
+                    body = {"error": {"code": status, "message": "stub error"}}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Start a stub and point GEMINI_BASE_URL at it"""
+    stubs = []
+
+    def start(respond):
+        stub = GeminiStub(respond).__enter__()
+        stubs.append(stub)
+        monkeypatch.setattr(ai_text_generator, "GEMINI_BASE_URL", stub.url)
+        return stub
+
+    yield start
+    for stub in stubs:
+        stub.__exit__(None, None, None)
+
+
+def test_returns_exactly_count_valid_unique_suggestions(gemini):
+    # Each batch mixes new sentences with repeats, case variants and texts outside the length bounds
+    def respond(number):
+        return 200, [sentence(number * 2), sentence(number * 2 + 1), sentence(0).upper(), "Too short.", "x" * 200]
+
+    stub = gemini(respond)
+    suggestions = generate_suggestions("key", 7, batch_size=5, concurrency=2)
+
+    assert len(suggestions) == 7
+    assert len({s.casefold() for s in suggestions}) == 7
+    assert all(32 <= len(s) <= 140 for s in suggestions)
+    assert all(r["path"].endswith(f"/models/{ai_text_generator.GEMINI_MODEL}:generateContent") for r in stub.requests)
+    assert all(r["key"] == "key" for r in stub.requests)
+    seeds = [r["payload"]["generationConfig"]["seed"] for r in stub.requests]
+    assert len(set(seeds)) == len(seeds)
+
+
+def test_leaves_out_excluded_and_rejected_texts(gemini):
+    gemini(lambda number: (200, [sentence(i) for i in range(number * 4, number * 4 + 4)]))
+    in_dataset = {text_hash(sentence(1)), text_hash(sentence(2))}
+    seen = []
+
+    def reject(text):
+        seen.append(text)
+        return text == sentence(3)
+
+    suggestions = generate_suggestions("key", 4, batch_size=4, concurrency=1,
+                                       exclude=[sentence(0)], exclude_hashes=in_dataset, reject=reject)
+
+    assert suggestions == [sentence(4), sentence(5), sentence(6), sentence(7)]
+    # reject only sees texts that pass the other checks
+    assert sentence(1) not in seen and sentence(0) not in seen
+
+
+def test_stops_after_max_requests(gemini):
+    # The model keeps repeating itself, so count can never be reached
+    stub = gemini(lambda number: (200, [sentence(0), sentence(1)]))
+
+    suggestions = generate_suggestions("key", 10, batch_size=5, concurrency=2, max_requests=3)
+
+    assert suggestions == [sentence(0), sentence(1)]
+    assert len(stub.requests) == 3
+
+
+def test_stops_on_client_error(gemini):
+    stub = gemini(lambda number: (400, None))
+
+    assert generate_suggestions("bad key", 10, batch_size=5, concurrency=2, max_requests=20) == []
+    # Only the first wave of requests goes out
+    assert len(stub.requests) <= 2
@@ -0,0 +1,101 @@
+import os
+
+import pandas as pd
+import pytest
+
+from voice_recorder.data_handlers import csv_handler, near_duplicates, text_index
+
+
+TEXTS = [
+    "The quick brown fox jumps over the lazy dog near the river bank.",
+    "Please remember to water the plants before you leave for the weekend.",
+    "Our train was delayed by almost an hour because of the heavy snow.",
+]
+
+
+@pytest.fixture(params=["data.csv", "data.db"])
+def csv_path(tmp_path, monkeypatch, request):
+    monkeypatch.setattr(csv_handler, "AUDIO_DIR", str(tmp_path / "audio"))
+    path = str(tmp_path / request.param)
+    csv_handler.invalidate_cache()
+    summary, _ = csv_handler.add_texts(csv_handler.load_data(path), TEXTS, path)
+    assert summary["added"] == 3
+    yield path
+    csv_handler.invalidate_cache()
+
+
+def rewrite_externally(csv_path, df):
+    """Replace the dataset the way another tool would, bypassing the app's indexes"""
+    if csv_path.endswith(".db"):
+        from voice_recorder.data_handlers import sqlite_store
+        sqlite_store.import_dataframe(csv_path, df)
+    else:
+        df.to_csv(csv_path, index=False)
+        for path in (f"{csv_path}.journal", f"{csv_path}.journal.compacting"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_add_texts_skips_duplicates_near_duplicates_and_invalid(csv_path):
+    summary, df = csv_handler.add_texts(csv_handler.load_data(csv_path), [
+        "  THE QUICK BROWN FOX jumps over the lazy   dog near the river bank.",  # in the dataset
+        "A completely new sentence about learning to play the violin at night.",
+        "a completely new sentence about learning to play the violin at night.",  # earlier in the batch
+        "Please remember to water the plants before you leave for the weekend!!",  # near-duplicate
+        "Too short.",
+        None,
+    ], csv_path)
+
+    assert summary == {"added": 1, "duplicates": 2, "near_duplicates": 1, "invalid": 2}
+    assert df["text"].tolist() == TEXTS + ["A completely new sentence about learning to play the violin at night."]
+    assert csv_handler.load_data(csv_path)["text"].tolist() == df["text"].tolist()
+
+
+def test_add_texts_keeps_the_indexes_in_step(csv_path):
+    new_text = "A completely new sentence about learning to play the violin at night."
+    csv_handler.add_texts(csv_handler.load_data(csv_path), [new_text], csv_path)
+
+    assert text_index.text_hash(new_text) in csv_handler.load_text_hashes(csv_path)
+    index = csv_handler.load_near_duplicate_index(csv_path)
+    assert len(index) == 4
+    assert index.find(new_text + "!")[0][0] == 3
+
+
+def test_cache_is_invalidated_by_an_external_edit(csv_path):
+    df = csv_handler.load_data(csv_path)
+    assert csv_handler.load_data(csv_path)["text"].tolist() == TEXTS
+
+    edited = df.copy()
+    edited.loc[1, "text"] = "A sentence written by another tool while the app was running."
+    rewrite_externally(csv_path, edited)
+
+    assert csv_handler.load_data(csv_path)["text"].tolist() == edited["text"].tolist()
+
+
+def test_returned_frames_do_not_share_changes(csv_path):
+    df = csv_handler.load_data(csv_path)
+    df.loc[0, "text"] = "Changed only in this copy of the data, not in the cache."
+
+    assert csv_handler.load_data(csv_path)["text"].tolist() == TEXTS
+
+
+def test_near_duplicate_index_is_rebuilt_after_an_external_edit(csv_path):
+    # Same number of rows, so only the dataset signature shows the index is stale
+    csv_handler.find_similar_texts(csv_path, TEXTS[0])
+    edited = csv_handler.load_data(csv_path).copy()
+    edited.loc[0, "text"] = "An entirely different sentence about baking bread on a Sunday."
+    rewrite_externally(csv_path, edited)
+
+    assert csv_handler.find_similar_texts(csv_path, TEXTS[0] + "!") == []
+    assert [row for row, _, _ in csv_handler.find_similar_texts(csv_path, edited.loc[0, "text"] + "!")] == [0]
+    assert text_index.text_hash(TEXTS[0]) not in csv_handler.load_text_hashes(csv_path)
+
+
+def test_near_duplicate_index_matches_a_rebuild(csv_path):
+    csv_handler.add_text(csv_handler.load_data(csv_path),
+                         "Another sentence that is added one at a time through add_text.", csv_path)
+    index = csv_handler.load_near_duplicate_index(csv_path)
+
+    rebuilt = near_duplicates.minhash_batch(csv_handler.load_data(csv_path)["text"].tolist())
+    assert (index.signatures == rebuilt).all()
+    assert (rebuilt == [near_duplicates.minhash(t) for t in csv_handler.load_data(csv_path)["text"]]).all()
@@ -0,0 +1,134 @@
+import hashlib
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from voice_recorder.data_handlers import huggingface_uploader
+from voice_recorder.data_handlers.huggingface_uploader import UPLOAD_STATE_FILE, push_delta
+
+
+class FakeHfApi:
+    """In-memory repository with the parts of HfApi that push_delta uses"""
+
+    def __init__(self, files=None, fail_uploads=()):
+        self.files = dict(files or {})
+        self.fail_uploads = set(fail_uploads)
+        self.preuploaded = []
+        self.commits = []
+
+    def list_repo_tree(self, repo_id, recursive=False, repo_type=None):
+        for path, content in sorted(self.files.items()):
+            blob_id = hashlib.sha1(f"blob {len(content)}\0".encode("ascii") + content).hexdigest()
+            lfs = SimpleNamespace(sha256=hashlib.sha256(content).hexdigest()) if path.endswith(".parquet") else None
+            yield SimpleNamespace(path=path, size=len(content), blob_id=blob_id, lfs=lfs)
+
+    def preupload_lfs_files(self, repo_id, additions, repo_type=None):
+        for operation in additions:
+            if operation.path_in_repo in self.fail_uploads:
+                raise ConnectionError(f"upload of {operation.path_in_repo} failed")
+            self.preuploaded.append(operation.path_in_repo)
+
+    def create_commit(self, repo_id, operations, commit_message, repo_type=None):
+        self.commits.append(operations)
+        for operation in operations:
+            if hasattr(operation, "path_or_fileobj"):
+                with open(operation.path_or_fileobj, "rb") as f:
+                    self.files[operation.path_in_repo] = f.read()
+            else:
+                del self.files[operation.path_in_repo]
+
+
+def write(dataset_dir, repo_path, content):
+    path = os.path.join(dataset_dir, *repo_path.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def dataset_dir(tmp_path):
+    write(tmp_path, "data/train-00000-of-00002.parquet", b"unchanged shard")
+    write(tmp_path, "data/train-00001-of-00002.parquet", b"changed shard, new content")
+    write(tmp_path, "dataset.csv", b"text,audio\n")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def api():
+    return FakeHfApi({
+        "data/train-00000-of-00002.parquet": b"unchanged shard",
+        "data/train-00001-of-00002.parquet": b"changed shard, old content",
+        # Left by an earlier export with more shards
+        "data/train-00002-of-00003.parquet": b"stale shard",
+        # Files the exporter does not write
+        "README.md": b"# Dataset card",
+        ".gitattributes": b"*.parquet filter=lfs",
+        "data/extra/notes.parquet": b"uploaded by hand",
+        "images/cover.png": b"png",
+    })
+
+
+def test_push_delta_uploads_changed_files_in_one_commit(dataset_dir, api):
+    uploaded, deleted = push_delta(api, dataset_dir, "user/voice", backoff_seconds=0)
+
+    assert uploaded == ["data/train-00001-of-00002.parquet", "dataset.csv"]
+    assert sorted(api.preuploaded) == uploaded
+    assert len(api.commits) == 1
+    added = [op.path_in_repo for op in api.commits[0] if hasattr(op, "path_or_fileobj")]
+    assert added == uploaded
+
+
+def test_push_delta_deletes_only_exporter_files(dataset_dir, api):
+    _, deleted = push_delta(api, dataset_dir, "user/voice", backoff_seconds=0)
+
+    assert deleted == ["data/train-00002-of-00003.parquet"]
+    assert sorted(api.files) == [
+        ".gitattributes", "README.md", "data/extra/notes.parquet",
+        "data/train-00000-of-00002.parquet", "data/train-00001-of-00002.parquet",
+        "dataset.csv", "images/cover.png",
+    ]
+
+
+def test_push_delta_skips_commit_when_up_to_date(dataset_dir, api):
+    push_delta(api, dataset_dir, "user/voice", backoff_seconds=0)
+    api.preuploaded.clear()
+
+    uploaded, deleted = push_delta(api, dataset_dir, "user/voice", backoff_seconds=0)
+
+    assert (uploaded, deleted) == ([], [])
+    assert api.preuploaded == []
+    assert len(api.commits) == 1
+
+
+def test_push_delta_resumes_interrupted_upload(dataset_dir, api):
+    api.fail_uploads = {"dataset.csv"}
+    with pytest.raises(ConnectionError):
+        push_delta(api, dataset_dir, "user/voice", workers=1, max_retries=1, backoff_seconds=0)
+    assert api.commits == []
+    assert os.path.exists(os.path.join(dataset_dir, UPLOAD_STATE_FILE))
+
+    api.fail_uploads = set()
+    api.preuploaded.clear()
+    uploaded, _ = push_delta(api, dataset_dir, "user/voice", workers=1, backoff_seconds=0)
+
+    assert uploaded == ["data/train-00001-of-00002.parquet", "dataset.csv"]
+    assert api.preuploaded == ["dataset.csv"]
+    assert len(api.commits) == 1
+    assert not os.path.exists(os.path.join(dataset_dir, UPLOAD_STATE_FILE))
+
+
+def test_plan_delta_upload_compares_lfs_and_git_hashes():
+    local = {
+        "data/a.parquet": {"size": 3, "sha256": "new", "git_sha1": "x"},
+        "dataset.csv": {"size": 3, "sha256": "ignored", "git_sha1": "same"},
+    }
+    remote = {
+        "data/a.parquet": {"size": 3, "sha256": "old", "git_sha1": "x"},
+        "dataset.csv": {"size": 3, "sha256": None, "git_sha1": "same"},
+        "data/b.parquet": {"size": 1, "sha256": "b", "git_sha1": "b"},
+    }
+
+    assert huggingface_uploader.plan_delta_upload(local, remote) == (["data/a.parquet"], ["data/b.parquet"])
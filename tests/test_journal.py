@@ -0,0 +1,116 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from voice_recorder.data_handlers import csv_handler, journal
+
+
+def text(number):
+    return f"Sentence number {number} that is long enough to be added."
+
+
+@pytest.fixture
+def csv_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_handler, "AUDIO_DIR", str(tmp_path / "audio"))
+    path = str(tmp_path / "data.csv")
+    pd.DataFrame({"text": [text(0), text(1)], "audio": [None, None], "recorded": [False, False]}).to_csv(path, index=False)
+    csv_handler.invalidate_cache()
+    yield path
+    csv_handler.invalidate_cache()
+
+
+def write_journal(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+
+def snapshot(csv_path):
+    return journal.normalize_columns(pd.read_csv(csv_path))
+
+
+def test_entries_are_appended_and_replayed(csv_path):
+    assert journal.append_entries(csv_path, [{"op": "add", "index": 2, "text": text(2)}])
+    assert journal.append_entries(csv_path, [{"op": "record", "index": 0, "audio": "a.wav"},
+                                             {"op": "clear", "index": 0},
+                                             {"op": "record", "index": 1, "audio": "b.wav"}])
+
+    assert [entry["op"] for entry in journal.read_entries(csv_path)] == ["add", "record", "clear", "record"]
+    df = csv_handler.load_data(csv_path)
+    assert df["text"].tolist() == [text(0), text(1), text(2)]
+    assert df["recorded"].tolist() == [False, True, False]
+    assert df.loc[1, "audio"] == "b.wav"
+    # The snapshot is untouched until compaction
+    assert len(snapshot(csv_path)) == 2
+
+
+def test_torn_trailing_line_is_skipped(csv_path):
+    journal.append_entries(csv_path, [{"op": "record", "index": 0, "audio": "a.wav"}])
+    with open(journal.journal_path(csv_path), "a", encoding="utf-8") as f:
+        f.write('{"op": "record", "index": 1, "au')
+
+    df = csv_handler.load_data(csv_path)
+    assert df["recorded"].tolist() == [True, False]
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(csv_path):
+    journal.append_entries(csv_path, [{"op": "add", "index": 2, "text": text(2)},
+                                      {"op": "record", "index": 2, "audio": "c.wav"}])
+    before = csv_handler.load_data(csv_path)
+
+    assert journal.compact(csv_path)
+
+    assert not journal.has_pending(csv_path)
+    pd.testing.assert_frame_equal(snapshot(csv_path), before.reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(csv_handler.load_data(csv_path), before, check_dtype=False)
+
+
+def test_crash_before_snapshot_replace_is_recovered(csv_path):
+    # The journal was moved aside, then the process died; later writes went to a new journal
+    write_journal(journal.compacting_path(csv_path), [{"op": "add", "index": 2, "text": text(2)}])
+    write_journal(journal.journal_path(csv_path), [{"op": "record", "index": 2, "audio": "c.wav"}])
+
+    df = csv_handler.load_data(csv_path)
+    assert df["text"].tolist() == [text(0), text(1), text(2)]
+    assert df.loc[2, "audio"] == "c.wav"
+
+    # The next compaction finishes the interrupted one, and the one after folds the new journal
+    assert journal.compact(csv_path)
+    assert not os.path.exists(journal.compacting_path(csv_path))
+    assert os.path.exists(journal.journal_path(csv_path))
+    assert journal.compact(csv_path)
+    assert not journal.has_pending(csv_path)
+    assert snapshot(csv_path)["audio"].tolist()[2] == "c.wav"
+
+
+def test_crash_after_snapshot_replace_replays_harmlessly(csv_path):
+    # The snapshot already holds the entries, but the process died before removing the moved journal
+    entries = [{"op": "add", "index": 2, "text": text(2)}, {"op": "record", "index": 2, "audio": "c.wav"}]
+    compacted = journal.apply_entries(snapshot(csv_path), entries)
+    compacted.to_csv(csv_path, index=False)
+    write_journal(journal.compacting_path(csv_path), entries)
+
+    df = csv_handler.load_data(csv_path)
+    assert df["text"].tolist() == [text(0), text(1), text(2)]
+
+    assert journal.compact(csv_path)
+    assert len(snapshot(csv_path)) == 3
+    assert not journal.has_pending(csv_path)
+
+
+def test_add_entry_never_overwrites_another_row(csv_path):
+    df = journal.apply_entries(snapshot(csv_path), [{"op": "add", "index": 1, "text": text(9)}])
+
+    assert df["text"].tolist() == [text(0), text(1)]
+
+
+def test_adds_from_an_out_of_date_copy_get_new_indexes(csv_path):
+    stale = csv_handler.load_data(csv_path)
+
+    assert csv_handler.add_text(stale, text(2), csv_path)[0]
+    assert csv_handler.add_text(stale, text(3), csv_path)[0]
+
+    df = csv_handler.load_data(csv_path)
+    assert df["text"].tolist() == [text(0), text(1), text(2), text(3)]
+    assert df.index.tolist() == [0, 1, 2, 3]